@@ -0,0 +1,114 @@
+"""Signed, expiring bearer tokens for the JSON API.
+
+POST /api/auth/token issues an access token and a refresh token for a
+login session. Both are itsdangerous signatures over a small claim set:
+the access token carries the user id, username and is_admin, so a
+request presenting it is authenticated from the signature alone, with
+no session cookie and no user lookup. Access tokens live ACCESS_TTL
+seconds; the refresh token (REFRESH_TTL) trades for a new access token
+with freshly loaded claims. Refresh tokens also carry a tag of the
+user's password hash, so changing or resetting the password ends every
+API login session at its next refresh.
+
+Revoking a login session adds its session id to the revoked_token
+table. Every worker keeps the revoked ids in memory and reloads them
+when the stamp file next to the database changes, the same way
+user_cache.py spreads invalidations, so checking a token stays a set
+lookup plus one stat().
+"""
+
+import hashlib
+import os
+import secrets
+import threading
+import time
+
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+ACCESS_TTL = int(os.environ.get('ACCESS_TOKEN_TTL', 15 * 60))
+REFRESH_TTL = int(os.environ.get('REFRESH_TOKEN_TTL', 30 * 24 * 3600))
+ACCESS_SALT = 'api-access'
+REFRESH_SALT = 'api-refresh'
+
+class TokenError(Exception):
+    """A token that is malformed, expired or revoked"""
+
+def credential_tag(password_hash):
+    """Short digest of a password hash; changes whenever the password does"""
+    return hashlib.sha256(password_hash.encode('utf-8')).hexdigest()[:16]
+
+class TokenSigner:
+    """Issue and verify access/refresh tokens signed with secret_key"""
+
+    def __init__(self, secret_key, access_ttl=ACCESS_TTL, refresh_ttl=REFRESH_TTL):
+        self.access_ttl = access_ttl
+        self.refresh_ttl = refresh_ttl
+        self._access = URLSafeTimedSerializer(secret_key, salt=ACCESS_SALT)
+        self._refresh = URLSafeTimedSerializer(secret_key, salt=REFRESH_SALT)
+
+    @staticmethod
+    def new_session_id():
+        return secrets.token_urlsafe(16)
+
+    def access_token(self, session_id, user_id, username, is_admin):
+        return self._access.dumps({'sid': session_id, 'uid': user_id, 'usr': username, 'adm': bool(is_admin)})
+
+    def refresh_token(self, session_id, user_id, password_hash):
+        return self._refresh.dumps({'sid': session_id, 'uid': user_id, 'cred': credential_tag(password_hash)})
+
+    def _load(self, serializer, token, max_age):
+        try:
+            return serializer.loads(token, max_age=max_age)
+        except SignatureExpired:
+            raise TokenError('Token expired') from None
+        except BadSignature:
+            raise TokenError('Invalid token') from None
+
+    def verify_access(self, token):
+        """Claims of a valid access token; raises TokenError"""
+        return self._load(self._access, token, self.access_ttl)
+
+    def verify_refresh(self, token):
+        """Claims of a valid refresh token; raises TokenError"""
+        return self._load(self._refresh, token, self.refresh_ttl)
+
+class RevocationCache:
+    """In-memory set of revoked session ids, reloaded when the stamp changes.
+
+    load() returns the ids that are still revoked (their tokens could
+    otherwise still be valid).
+    """
+
+    def __init__(self, stamp_path, load):
+        self.stamp_path = stamp_path
+        self.load = load
+        self.reloads = 0
+        self._lock = threading.Lock()
+        self._revoked = None
+        self._generation = None
+
+    def _read_generation(self):
+        try:
+            return os.stat(self.stamp_path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def is_revoked(self, session_id):
+        generation = self._read_generation()
+        with self._lock:
+            if self._revoked is None or generation != self._generation:
+                self._revoked = frozenset(self.load())
+                self._generation = generation
+                self.reloads += 1
+            return session_id in self._revoked
+
+    def changed(self):
+        """Make every process reload; call after committing a revocation"""
+        os.makedirs(os.path.dirname(self.stamp_path), exist_ok=True)
+        with open(self.stamp_path, 'a'):
+            pass
+        with self._lock:
+            # Force a new mtime even if the last change was within timer resolution
+            stamp = max(time.time_ns(), (self._generation or 0) + 1)
+            os.utime(self.stamp_path, ns=(stamp, stamp))
+            self._revoked = None
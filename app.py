@@ -1,14 +1,39 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify, flash, session, send_from_directory
+from flask import Flask, Request, render_template, request, redirect, url_for, jsonify, flash, session, send_from_directory, send_file, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import case, cast, event, func, not_, null, or_, select, union_all, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, make_transient_to_detached, object_session
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from werkzeug.security import generate_password_hash, check_password_hash
 from werkzeug.utils import secure_filename
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from functools import wraps
+import json
+import mimetypes
 import os
-import markdown
 from pathlib import Path
-import uuid
+try:
+    import fcntl
+except ImportError:  # not available on Windows; saves are then unlocked
+    fcntl = None
+from api_tokens import RevocationCache, TokenError, TokenSigner, credential_tag
+from dashboard_cache import DashboardSnapshotCache, Snapshot, snapshot_etag
+from image_store import STORED_NAME_RE, HashingUpload
+from lesson_cache import LessonRenderCache, content_hash
+from lesson_search import LessonSearchIndex
+from plan_registry import PLAN
+from user_cache import UserIdentityCache
+from write_behind import WriteBehindJournal
+import complexity
+import grader
+import metrics
+import review_scheduler
+import sqlite_mode
+from asset_build import BUILD_DIR as ASSET_BUILD_DIR, build_validators, current_assets, load_manifest as load_asset_manifest
+from lesson_build import BUILD_DIR as LESSON_BUILD_DIR, load_manifest, load_segment, seed_cache
+from precompress import ENCODING_SUFFIXES, choose_encoding, splice_gzip
 
 app = Flask(__name__)
 app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///codility_progress.db')
@@ -18,12 +43,40 @@ app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-secret-key-change-in-production')
 app.config['UPLOAD_FOLDER'] = os.path.join(app.static_folder, 'uploads')
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+# WAL, busy_timeout and pooling for a SQLite file shared by the workers
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = sqlite_mode.engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'svg'}
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
 
 db = SQLAlchemy(app)
 login_manager = LoginManager(app)
 login_manager.login_view = 'login'
 login_manager.login_message = 'Please log in to access this page.'
+lesson_cache = LessonRenderCache(max_entries=int(os.environ.get('LESSON_CACHE_SIZE', 32)))
+
+# Request/SQL metrics for /metrics; gunicorn.conf.py points METRICS_DIR at
+# a directory shared by the workers
+metrics_registry = metrics.MetricsRegistry(os.environ.get('METRICS_DIR'))
+slow_request_seconds = os.environ.get('SLOW_REQUEST_SECONDS')
+with app.app_context():
+    write_serializer = sqlite_mode.setup(db.engine)
+    metrics.instrument(app, db.engine, metrics_registry,
+                       float(slow_request_seconds) if slow_request_seconds else None)
+
+# Write views run one at a time across workers on SQLite and are retried
+# if the database is still locked (see sqlite_mode.py)
+serialized_write = write_serializer.retrying(db.session)
+
+# Warm the lesson cache from the ahead-of-time build (see lesson_build.py)
+lesson_manifest = load_manifest(LESSON_BUILD_DIR) or {'lessons': {}}
+seed_cache(lesson_cache, lesson_manifest, Path(__file__).parent / 'lessons', LESSON_BUILD_DIR)
+
+# Fingerprinted CSS/JS from the asset build (see asset_build.py), keyed by
+# source name and by fingerprinted path
+static_assets = current_assets(load_asset_manifest(ASSET_BUILD_DIR) or {}, app.static_folder)
+fingerprinted_assets = {entry['path']: entry for entry in static_assets.values()}
+# Lesson pages link the fingerprinted URLs, so their validators change with the build
+asset_build_id, asset_build_modified = build_validators(static_assets)
 
 # Models
 class User(UserMixin, db.Model):
@@ -39,12 +92,103 @@ class User(UserMixin, db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+user_cache = UserIdentityCache(
+    os.path.join(app.instance_path, 'user_cache.stamp'),
+    max_entries=int(os.environ.get('USER_CACHE_SIZE', 1024)),
+    ttl=int(os.environ.get('USER_CACHE_TTL', 300)),
+)
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    """Load the session user, normally without a database round trip"""
+    user_id = int(user_id)
+    snapshot = user_cache.get(user_id)
+    if snapshot is not None:
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return db.session.merge(user, load=False)
+
+    user = db.session.get(User, user_id)
+    if user is not None:
+        user_cache.put(user_id, {c.key: getattr(user, c.key) for c in User.__table__.columns})
+    return user
+
+# Changed users are dropped from every worker's cache once the change
+# commits; dropping them at flush time would let another worker re-cache
+# the old row before the commit. None in the set means every user.
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_user(mapper, connection, user):
+    """Password resets and is_admin changes (including from create_admin.py
+    and reset_password.py) drop the user from every worker's cache"""
+    object_session(user).info.setdefault('users_changed', set()).add(user.id)
+
+@event.listens_for(Session, 'do_orm_execute')
+def invalidate_cached_users_on_bulk_write(orm_execute_state):
+    """Bulk query.update()/delete() skip mapper events, so drop every user"""
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper is User.__mapper__:
+        orm_execute_state.session.info.setdefault('users_changed', set()).add(None)
+
+@event.listens_for(Session, 'after_commit')
+def invalidate_committed_users(session):
+    users = session.info.pop('users_changed', None)
+    if not users:
+        return
+    if None in users:
+        user_cache.invalidate()
+    else:
+        for user_id in users:
+            user_cache.invalidate(user_id)
+
+# API bearer tokens (see api_tokens.py)
+class RevokedToken(db.Model):
+    """A login session whose tokens are no longer accepted"""
+    session_id = db.Column(db.String(32), primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    # Once the session's refresh token has expired the row can go
+    expires_at = db.Column(db.DateTime, nullable=False)
+
+def load_revoked_sessions():
+    return db.session.execute(select(RevokedToken.session_id).where(
+        RevokedToken.expires_at > datetime.utcnow())).scalars().all()
+
+token_signer = TokenSigner(app.config['SECRET_KEY'])
+revoked_sessions = RevocationCache(os.path.join(app.instance_path, 'revoked_tokens.stamp'), load_revoked_sessions)
+
+def bearer_token():
+    """The token of an "Authorization: Bearer ..." header, or None"""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    return (token.strip() or None) if scheme.lower() == 'bearer' else None
+
+@login_manager.request_loader
+def load_user_from_token(request):
+    """Authenticate an API request from its access token alone.
+
+    The user is rebuilt from the token's claims, so neither the session
+    nor the user table is read.
+    """
+    token = bearer_token()
+    if token is None:
+        return None
+    try:
+        claims = token_signer.verify_access(token)
+    except TokenError:
+        return None
+    if revoked_sessions.is_revoked(claims['sid']):
+        return None
+    user = User(id=claims['uid'], username=claims['usr'], is_admin=claims['adm'])
+    make_transient_to_detached(user)
+    return db.session.merge(user, load=False)
+
+# Progress rows belong to a user; visitors who are not logged in share the
+# guest board, which also holds progress recorded before per-user tracking.
+GUEST_USER_ID = 0
 
 class DayProgress(db.Model):
+    __table_args__ = (db.UniqueConstraint('user_id', 'week', 'day', name='uq_day_progress_user_week_day'),)
+
     id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False, default=GUEST_USER_ID, server_default=str(GUEST_USER_ID))
     week = db.Column(db.Integer, nullable=False)
     day = db.Column(db.Integer, nullable=False)
     completed = db.Column(db.Boolean, default=False)
@@ -52,13 +196,31 @@ class DayProgress(db.Model):
     completed_date = db.Column(db.DateTime)
 
 class TaskProgress(db.Model):
+    __table_args__ = (db.UniqueConstraint('user_id', 'week', 'day', 'task_name', name='uq_task_progress_user_week_day_task'),)
+
     id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False, default=GUEST_USER_ID, server_default=str(GUEST_USER_ID))
     week = db.Column(db.Integer, nullable=False)
     day = db.Column(db.Integer, nullable=False)
     task_name = db.Column(db.String(200), nullable=False)
     completed = db.Column(db.Boolean, default=False)
     score = db.Column(db.Integer)
     notes = db.Column(db.Text, default='')
+    # Latest empirical complexity estimate, e.g. 'O(n)', and its confidence
+    complexity = db.Column(db.String(20))
+    complexity_confidence = db.Column(db.Float)
+    # Last time the task was completed or scored, for the review queue
+    reviewed_at = db.Column(db.DateTime)
+
+class ProgressCounter(db.Model):
+    """Running per-user completion counts, kept in step with the progress tables"""
+    user_id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+
+def progress_user_id():
+    """Id whose progress the current request reads and writes"""
+    return current_user.id if current_user.is_authenticated else GUEST_USER_ID
 
 # Admin required decorator
 def admin_required(f):
@@ -69,282 +231,898 @@ def admin_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-# Training plan data structure
-TRAINING_PLAN = {
-    1: {
-        'title': 'WEEK 1 – Foundations (TypeScript + Basic DSA)',
-        'focus': 'loops, arrays, functions, time complexity',
-        'days': {
-            1: {
-                'title': 'TypeScript Language Basics',
-                'topics': ['Functions', 'Arrays & objects', 'For / while loops'],
-                'tasks': ['10 small array manipulations']
-            },
-            2: {
-                'title': 'Big-O (Beginner Level)',
-                'topics': ['O(n), O(n²), O(log n)', 'Recognize slow vs fast solutions'],
-                'tasks': ['Binary Gap']
-            },
-            3: {
-                'title': 'Arrays I',
-                'topics': [],
-                'tasks': ['OddOccurrencesInArray', 'CyclicRotation']
-            },
-            4: {
-                'title': 'Arrays II',
-                'topics': [],
-                'tasks': ['Two Sum (LeetCode Easy)', 'Remove Duplicates (LC Easy)']
-            },
-            5: {
-                'title': 'Reading Problems + Working With Edge cases',
-                'topics': ['Practice identifying edge cases'],
-                'tasks': ['TapeEquilibrium', 'PermMissingElem']
-            },
-            6: {
-                'title': 'Review + Fix Weakness',
-                'topics': ['Focus on speed + correctness'],
-                'tasks': ['Do 3–4 easy tasks again']
-            },
-            7: {
-                'title': 'REST',
-                'topics': ['Take a break!'],
-                'tasks': []
-            }
-        }
-    },
-    2: {
-        'title': 'WEEK 2 – Counting, Prefix Sum & Hash Maps',
-        'focus': 'Codility Lesson 3–5, hash maps in TypeScript',
-        'days': {
-            8: {
-                'title': 'Counting Elements',
-                'topics': ['boolean arrays vs hash maps'],
-                'tasks': ['PermCheck', 'FrogJmp']
-            },
-            9: {
-                'title': 'Counting Practice',
-                'topics': [],
-                'tasks': ['MissingInteger', 'FrogRiverOne']
-            },
-            10: {
-                'title': 'Prefix Sums (Very Important)',
-                'topics': ['Prefix sum logic'],
-                'tasks': ['GenomicRangeQuery']
-            },
-            11: {
-                'title': 'Prefix Sums II',
-                'topics': ['Subarray sums'],
-                'tasks': ['LeetCode: Range Sum Query']
-            },
-            12: {
-                'title': 'Hash Map Practice',
-                'topics': ['Review TypeScript Map vs Object'],
-                'tasks': ['LC: Contains Duplicate', 'LC: First Unique Character']
-            },
-            13: {
-                'title': 'Mini Review',
-                'topics': ['Revisit prefix sums'],
-                'tasks': ['Redo MissingInteger fast', 'Redo FrogRiverOne']
-            },
-            14: {
-                'title': 'MOCK TEST (45 min)',
-                'topics': ['Target: 70%+'],
-                'tasks': ['OddOccurrencesInArray', 'FrogRiverOne', 'TapeEquilibrium']
-            }
-        }
-    },
-    3: {
-        'title': 'WEEK 3 – Sorting, Greedy & Basic Math',
-        'focus': 'sort, compare, greedy patterns',
-        'days': {
-            15: {'title': 'Sorting', 'topics': [], 'tasks': ['Distinct', 'MaxProductOfThree']},
-            16: {'title': 'Sorting II', 'topics': [], 'tasks': ['Triangle', 'Number of intersections (optional)']},
-            17: {'title': 'Greedy Algorithms', 'topics': [], 'tasks': ['TapeEquilibrium', 'TieRopes']},
-            18: {'title': 'Simple Math in DSA', 'topics': [], 'tasks': ['CountDiv', 'PassingCars']},
-            19: {'title': 'Extra Sorting Practice', 'topics': [], 'tasks': ['LC: Merge Sorted Array', 'LC: Sort Colors']},
-            20: {'title': 'Review', 'topics': ['Optimize speed'], 'tasks': ['Redo 3 solved tasks']},
-            21: {'title': 'MOCK TEST (60 min)', 'topics': ['Target: 75%+'], 'tasks': ['Distinct', 'MaxProductOfThree', 'FrogRiverOne']}
-        }
-    },
-    4: {
-        'title': 'WEEK 4 – Stacks, Queues, Leaders (Major Week)',
-        'focus': 'stack patterns, dominance, StoneWall',
-        'days': {
-            22: {'title': 'Stacks', 'topics': [], 'tasks': ['Brackets', 'LC: Valid Parentheses']},
-            23: {'title': 'Stack Simulation', 'topics': [], 'tasks': ['Fish', 'StoneWall (VERY common!)']},
-            24: {'title': 'Leaders & Dominator', 'topics': [], 'tasks': ['Dominator', 'EquiLeader']},
-            25: {'title': 'Stacks & Queues Review', 'topics': [], 'tasks': ['Redo Fish', 'Redo StoneWall']},
-            26: {'title': 'Hard Stack Practice', 'topics': [], 'tasks': ['LC: Daily Temperatures (optional)', 'Redo Brackets']},
-            27: {'title': 'Review', 'topics': [], 'tasks': ['Focus StoneWall + EquiLeader']},
-            28: {'title': 'MOCK TEST (70 min)', 'topics': ['Target: 80%+'], 'tasks': ['Brackets', 'StoneWall', 'Dominator']}
-        }
-    },
-    5: {
-        'title': 'WEEK 5 – Maximum Slices + DP Basics',
-        'focus': 'max subarray, max double slice, DP for Codility',
-        'days': {
-            29: {'title': 'Kadane\'s Algorithm', 'topics': [], 'tasks': ['MaxSliceSum', 'MaxProfit']},
-            30: {'title': 'Max Double Slice', 'topics': ['Handle negative cases'], 'tasks': ['MaxDoubleSliceSum']},
-            31: {'title': 'DP Basics (Beginner Friendly)', 'topics': ['What is DP', 'Subproblems, transitions, recursion → iteration'], 'tasks': []},
-            32: {'title': 'DP Practice', 'topics': [], 'tasks': ['NumberSolitaire']},
-            33: {'title': 'DP Review', 'topics': [], 'tasks': ['Redo MaxSliceSum', 'Redo MaxProfit']},
-            34: {'title': 'Review', 'topics': [], 'tasks': ['Focus MaxDoubleSliceSum']},
-            35: {'title': 'MOCK TEST (75 min)', 'topics': ['Target: 80–85%'], 'tasks': ['MaxSliceSum', 'MaxProfit', 'MaxDoubleSliceSum']}
-        }
-    },
-    6: {
-        'title': 'WEEK 6 – Binary Search, Peaks, Flags, Sieve',
-        'focus': 'harder Codility topics',
-        'days': {
-            36: {'title': 'Binary Search', 'topics': ['Apply binary search to problems'], 'tasks': ['BinaryGap review', 'MinMaxDivision (optional)']},
-            37: {'title': 'Sieve of Eratosthenes', 'topics': [], 'tasks': ['CountFactors', 'CountSemiprimes']},
-            38: {'title': 'Peaks', 'topics': ['Practice subarray decomposition'], 'tasks': ['Peaks']},
-            39: {'title': 'Flags', 'topics': ['Hard but extremely common'], 'tasks': ['Flags']},
-            40: {'title': 'Rectangle / Geometry', 'topics': [], 'tasks': ['MinPerimeterRectangle', 'ChocolatesByNumbers']},
-            41: {'title': 'Review', 'topics': [], 'tasks': ['Redo Flags', 'Redo Peaks']},
-            42: {'title': 'MOCK TEST (75–90 min)', 'topics': ['Target: 85%+'], 'tasks': ['Flags', 'CountFactors', 'MaxSliceSum']}
-        }
-    },
-    7: {
-        'title': 'WEEK 7 – Reinforcement + Mid/Hard LeetCode',
-        'focus': 'fill gaps + strengthen thinking',
-        'days': {
-            43: {'title': 'Array Medium Review', 'topics': [], 'tasks': ['LC Medium array', 'LC Medium greedy']},
-            44: {'title': 'Array Medium Review (cont.)', 'topics': [], 'tasks': ['Continue LC Medium problems']},
-            45: {'title': 'Stack & Leader Review', 'topics': [], 'tasks': ['StoneWall', 'Fish', 'EquiLeader']},
-            46: {'title': 'Binary Search Review', 'topics': [], 'tasks': ['Flags', 'Peaks']},
-            47: {'title': 'Prefix Sum Review', 'topics': [], 'tasks': ['GenomicRangeQuery', 'MissingInteger']},
-            48: {'title': 'Mini Mock Test (60 min)', 'topics': ['Target: 90% on easier ones, 75% on hard ones'], 'tasks': ['3 medium tasks mixed']},
-            49: {'title': 'Free Review Day', 'topics': ['Redo anything difficult'], 'tasks': []}
-        }
-    },
-    8: {
-        'title': 'WEEK 8 – Final Codility Simulation Week',
-        'focus': 'simulate real exam conditions',
-        'days': {
-            51: {'title': 'Full Mock Test A (90 min)', 'topics': [], 'tasks': ['StoneWall', 'MaxDoubleSliceSum', 'TapeEquilibrium']},
-            52: {'title': 'Review results', 'topics': [], 'tasks': ['Analyze Mock Test A']},
-            53: {'title': 'Full Mock Test B (90 min)', 'topics': [], 'tasks': ['Fish', 'Flags', 'PermMissingElem']},
-            54: {'title': 'Review', 'topics': [], 'tasks': ['Analyze Mock Test B']},
-            55: {'title': 'Full Mock Test C (90 min)', 'topics': [], 'tasks': ['MaxProfit', 'GenomicRangeQuery', 'Dominator']},
-            56: {'title': 'Final Self-Assessment', 'topics': ['Goal: 85–90% correctness + optimized performance'], 'tasks': []}
-        }
-    }
-}
+# Login required decorator for JSON endpoints
+def api_login_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated:
+            return jsonify({'success': False, 'error': 'Login required'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
 
 # Routes
 @app.route('/')
 def index():
-    stats = get_overall_stats()
-    return render_template('index.html', weeks=TRAINING_PLAN, stats=stats)
+    stats = get_overall_stats(progress_user_id())
+    return render_template('index.html', weeks=PLAN.weeks, stats=stats)
 
 @app.route('/week/<int:week_num>')
 def week_view(week_num):
-    if week_num not in TRAINING_PLAN:
+    week_data = PLAN.weeks.get(week_num)
+    if week_data is None:
         return redirect(url_for('index'))
 
-    week_data = TRAINING_PLAN[week_num]
-    progress_data = {}
-
-    for day_num in week_data['days'].keys():
-        day_progress = DayProgress.query.filter_by(week=week_num, day=day_num).first()
-        task_progress = TaskProgress.query.filter_by(week=week_num, day=day_num).all()
-        progress_data[day_num] = {
-            'day_completed': day_progress.completed if day_progress else False,
-            'notes': day_progress.notes if day_progress else '',
-            'tasks': {tp.task_name: {'completed': tp.completed, 'score': tp.score} for tp in task_progress}
-        }
+    progress_data = load_progress(progress_user_id(), [week_num])[week_num]
 
     return render_template('week.html', week_num=week_num, week_data=week_data, progress=progress_data)
 
+@app.route('/tasks/<task_name>')
+def task_history(task_name):
+    """Every day of the plan that practises task_name, with the user's results"""
+    occurrences = PLAN.occurrences.get(task_name)
+    if occurrences is None:
+        return redirect(url_for('index'))
+
+    progress = load_progress(progress_user_id(), sorted({occurrence.week for occurrence in occurrences}))
+    attempts = []
+    for occurrence in occurrences:
+        result = progress[occurrence.week][occurrence.day]['tasks'].get(occurrence.label, {})
+        attempts.append({'occurrence': occurrence, 'completed': bool(result.get('completed')),
+                         'score': result.get('score'), 'complexity': result.get('complexity')})
+
+    scores = [attempt['score'] for attempt in attempts if attempt['score'] is not None]
+    summary = {
+        'attempts': len(attempts),
+        'completed': sum(attempt['completed'] for attempt in attempts),
+        'best_score': max(scores) if scores else None,
+    }
+    return render_template('task_history.html', task_name=task_name, attempts=attempts, summary=summary)
+
+@app.template_global()
+def repeated_tasks(label):
+    """Tasks named by a plan label that the plan practises on more than one day"""
+    return [task for task in PLAN.label_tasks.get(label, ()) if len(PLAN.occurrences.get(task, ())) > 1]
+
 @app.route('/api/toggle_day', methods=['POST'])
+@serialized_write
 def toggle_day():
     data = request.json
+    if write_behind:
+        return toggle_write_behind(DayProgress, 'set_day', data)
     week = data.get('week')
     day = data.get('day')
+    user_id = progress_user_id()
 
-    day_progress = DayProgress.query.filter_by(week=week, day=day).first()
+    day_progress = DayProgress.query.filter_by(user_id=user_id, week=week, day=day).first()
     if not day_progress:
-        day_progress = DayProgress(week=week, day=day)
+        day_progress = DayProgress(user_id=user_id, week=week, day=day)
         db.session.add(day_progress)
 
     day_progress.completed = not day_progress.completed
     day_progress.completed_date = datetime.now() if day_progress.completed else None
+    adjust_counter(user_id, 'completed_days', 1 if day_progress.completed else -1)
+    mark_progress_changed(user_id)
     db.session.commit()
 
     return jsonify({'success': True, 'completed': day_progress.completed})
 
 @app.route('/api/update_notes', methods=['POST'])
+@serialized_write
 def update_notes():
     data = request.json
     week = data.get('week')
     day = data.get('day')
     notes = data.get('notes', '')
+    user_id = progress_user_id()
 
-    day_progress = DayProgress.query.filter_by(week=week, day=day).first()
+    day_progress = DayProgress.query.filter_by(user_id=user_id, week=week, day=day).first()
     if not day_progress:
-        day_progress = DayProgress(week=week, day=day)
+        day_progress = DayProgress(user_id=user_id, week=week, day=day)
         db.session.add(day_progress)
 
     day_progress.notes = notes
+    mark_progress_changed(user_id)
     db.session.commit()
 
     return jsonify({'success': True})
 
 @app.route('/api/toggle_task', methods=['POST'])
+@serialized_write
 def toggle_task():
     data = request.json
+    if write_behind:
+        return toggle_write_behind(TaskProgress, 'set_task', data)
     week = data.get('week')
     day = data.get('day')
     task_name = data.get('task_name')
+    user_id = progress_user_id()
 
-    task_progress = TaskProgress.query.filter_by(week=week, day=day, task_name=task_name).first()
+    task_progress = TaskProgress.query.filter_by(user_id=user_id, week=week, day=day, task_name=task_name).first()
     if not task_progress:
-        task_progress = TaskProgress(week=week, day=day, task_name=task_name)
+        task_progress = TaskProgress(user_id=user_id, week=week, day=day, task_name=task_name)
         db.session.add(task_progress)
 
     task_progress.completed = not task_progress.completed
+    if task_progress.completed:
+        task_progress.reviewed_at = datetime.now()
+    adjust_counter(user_id, 'completed_tasks', 1 if task_progress.completed else -1)
+    mark_progress_changed(user_id)
     db.session.commit()
+    refresh_review_queue(user_id, [task_name])
 
     return jsonify({'success': True, 'completed': task_progress.completed})
 
 @app.route('/api/update_task_score', methods=['POST'])
+@serialized_write
 def update_task_score():
     data = request.json
     week = data.get('week')
     day = data.get('day')
     task_name = data.get('task_name')
     score = data.get('score')
+    user_id = progress_user_id()
 
-    task_progress = TaskProgress.query.filter_by(week=week, day=day, task_name=task_name).first()
+    task_progress = TaskProgress.query.filter_by(user_id=user_id, week=week, day=day, task_name=task_name).first()
     if not task_progress:
-        task_progress = TaskProgress(week=week, day=day, task_name=task_name)
+        task_progress = TaskProgress(user_id=user_id, week=week, day=day, task_name=task_name)
         db.session.add(task_progress)
 
     task_progress.score = score
+    if score is not None:
+        task_progress.reviewed_at = datetime.now()
+    mark_progress_changed(user_id)
     db.session.commit()
+    refresh_review_queue(user_id, [task_name])
 
     return jsonify({'success': True})
 
-def get_overall_stats():
-    total_days = sum(len(week['days']) for week in TRAINING_PLAN.values())
-    completed_days = DayProgress.query.filter_by(completed=True).count()
+# Batched progress mutations
+DAY_KEY = ['user_id', 'week', 'day']
+TASK_KEY = ['user_id', 'week', 'day', 'task_name']
+MAX_BATCH_MUTATIONS = 500
+
+def progress_insert(model):
+    """INSERT for model that supports ON CONFLICT upserts on this database"""
+    if db.engine.dialect.name == 'postgresql':
+        return pg_insert(model)
+    return sqlite_insert(model)
+
+def not_completed(model):
+    return not_(func.coalesce(model.completed, False))
+
+def _int_field(mutation, field):
+    value = mutation.get(field)
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise ValueError(f"'{field}' must be an integer")
+    return value
+
+def _task_name(mutation):
+    task_name = mutation.get('task_name')
+    if not isinstance(task_name, str) or not task_name:
+        raise ValueError("'task_name' is required")
+    return task_name
+
+def _toggle(model, key, values, extra_set=None):
+    """Upsert that inserts a completed row or flips an existing one.
+
+    Returns the new completed state.
+    """
+    stmt = progress_insert(model).values(completed=True, **values)
+    set_ = {'completed': not_completed(model)}
+    set_.update(extra_set or {})
+    stmt = stmt.on_conflict_do_update(index_elements=key, set_=set_).returning(model.completed)
+    return bool(db.session.execute(stmt).scalar_one())
+
+def _set_completed(model, key, values, completed, extra_set=None):
+    """Force completed to a value. Returns the change to the completed count."""
+    extra_set = extra_set or {}
+    if completed:
+        stmt = progress_insert(model).values(completed=True, **values)
+        stmt = stmt.on_conflict_do_update(index_elements=key, set_={'completed': True, **extra_set},
+                                          where=not_completed(model))
+        changed = db.session.execute(stmt.returning(model.id)).first() is not None
+        return 1 if changed else 0
+
+    # A missing row already reads as not completed, so only update
+    stmt = update(model).where(*[getattr(model, k) == values[k] for k in key], model.completed.is_(True))
+    return -db.session.execute(stmt.values(completed=False, **extra_set)).rowcount
+
+def _upsert_fields(model, key, values, fields):
+    """Upsert one row (a dict) or several (a list of dicts), updating fields on conflict"""
+    stmt = progress_insert(model).values(values)
+    stmt = stmt.on_conflict_do_update(index_elements=key, set_={f: stmt.excluded[f] for f in fields})
+    db.session.execute(stmt)
+
+def apply_progress_mutation(user_id, mutation, deltas):
+    """Apply one batch mutation to user_id's progress in the current transaction.
+
+    Adds completed-count changes to deltas and returns the per-mutation
+    result. Raises ValueError for malformed mutations.
+    """
+    if not isinstance(mutation, dict):
+        raise ValueError('Each mutation must be an object')
+    op = mutation.get('op')
+    week = _int_field(mutation, 'week')
+    day = _int_field(mutation, 'day')
+    key = {'user_id': user_id, 'week': week, 'day': day}
+    now = datetime.now()
+    mark_progress_changed(user_id)
+
+    if op == 'toggle_day':
+        completed = _toggle(DayProgress, DAY_KEY, dict(key, completed_date=now),
+                            {'completed_date': case((func.coalesce(DayProgress.completed, False), None), else_=now)})
+        deltas['completed_days'] += 1 if completed else -1
+        return {'completed': completed}
+
+    if op == 'set_day':
+        completed = bool(mutation.get('completed'))
+        deltas['completed_days'] += _set_completed(DayProgress, DAY_KEY, dict(key, completed_date=now),
+                                                   completed, {'completed_date': now if completed else None})
+        return {'completed': completed}
+
+    if op == 'update_notes':
+        notes = mutation.get('notes', '')
+        if not isinstance(notes, str):
+            raise ValueError("'notes' must be a string")
+        _upsert_fields(DayProgress, DAY_KEY, dict(key, notes=notes), ['notes'])
+        return {}
+
+    if op == 'toggle_task':
+        completed = _toggle(TaskProgress, TASK_KEY, dict(key, task_name=_task_name(mutation), reviewed_at=now),
+                            {'reviewed_at': case((func.coalesce(TaskProgress.completed, False), TaskProgress.reviewed_at),
+                                                 else_=now)})
+        deltas['completed_tasks'] += 1 if completed else -1
+        return {'completed': completed}
+
+    if op == 'set_task':
+        completed = bool(mutation.get('completed'))
+        deltas['completed_tasks'] += _set_completed(TaskProgress, TASK_KEY,
+                                                    dict(key, task_name=_task_name(mutation), reviewed_at=now),
+                                                    completed, {'reviewed_at': now} if completed else None)
+        return {'completed': completed}
+
+    if op == 'update_task_score':
+        score = mutation.get('score')
+        if score is not None and (not isinstance(score, int) or isinstance(score, bool)):
+            raise ValueError("'score' must be an integer or null")
+        if score is None:
+            _upsert_fields(TaskProgress, TASK_KEY, dict(key, task_name=_task_name(mutation), score=None), ['score'])
+        else:
+            _upsert_fields(TaskProgress, TASK_KEY, dict(key, task_name=_task_name(mutation), score=score, reviewed_at=now),
+                           ['score', 'reviewed_at'])
+        return {}
+
+    raise ValueError(f'Unknown mutation op: {op!r}')
+
+@app.route('/api/progress/batch', methods=['POST'])
+@serialized_write
+def progress_batch():
+    """Apply a list of progress mutations in a single transaction.
+
+    Body: {"mutations": [{"op": "toggle_day", "week": 1, "day": 3}, ...]}
+    Ops: toggle_day, set_day, update_notes, toggle_task, set_task,
+    update_task_score. Either every mutation is applied or none is.
+    """
+    data = request.json or {}
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Body must be a JSON object'}), 400
+    mutations = data.get('mutations')
+    if not isinstance(mutations, list) or not mutations:
+        return jsonify({'success': False, 'error': "'mutations' must be a non-empty list"}), 400
+    if len(mutations) > MAX_BATCH_MUTATIONS:
+        return jsonify({'success': False, 'error': f'At most {MAX_BATCH_MUTATIONS} mutations per batch'}), 400
+
+    user_id = progress_user_id()
+    flush_write_behind()
+    deltas = {name: 0 for name in COUNTER_MODELS}
+    try:
+        results = [apply_progress_mutation(user_id, mutation, deltas) for mutation in mutations]
+        for name, delta in deltas.items():
+            if delta:
+                adjust_counter(user_id, name, delta)
+        db.session.commit()
+    except ValueError as e:
+        db.session.rollback()
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    review_queue.invalidate(user_id)
+    return jsonify({'success': True, 'results': results})
+
+@app.route('/api/grade', methods=['POST'])
+@api_login_required
+def grade_solution():
+    """Grade a Python solution for a plan task and store its score.
+
+    Body: {"week": 2, "day": 9, "task_name": "FrogRiverOne", "code": "def solution(X, A): ..."}
+    """
+    data = request.json or {}
+    week = data.get('week')
+    day = data.get('day')
+    task_name = data.get('task_name')
+    code = data.get('code')
+
+    if not PLAN.has_task(week, day, task_name):
+        return jsonify({'success': False, 'error': 'Unknown task'}), 400
+    if not isinstance(code, str) or not code.strip():
+        return jsonify({'success': False, 'error': 'No code submitted'}), 400
+
+    grader_task = grader.resolve_task(task_name)
+    if grader_task is None:
+        return jsonify({'success': False, 'error': f'No automatic grader for {task_name}'}), 400
+
+    report = grader.grade(grader_task, code)
+    if 'error' not in report:
+        with write_serializer.section():
+            apply_progress_mutation(progress_user_id(), {'op': 'update_task_score', 'week': week, 'day': day,
+                                                         'task_name': task_name, 'score': report['score']}, {})
+            db.session.commit()
+        refresh_review_queue(progress_user_id(), [task_name])
+
+    return jsonify({'success': 'error' not in report, 'report': report})
+
+@app.route('/api/complexity', methods=['POST'])
+@api_login_required
+def estimate_complexity():
+    """Estimate the time complexity of a solution and store it on the task.
+
+    Body: {"week": 2, "day": 9, "task_name": "FrogRiverOne", "code": "...", "budget": 10}
+    budget is the CPU seconds to spend measuring (capped at complexity.MAX_BUDGET so the run
+    ends well inside the gunicorn worker timeout).
+    """
+    data = request.json or {}
+    week = data.get('week')
+    day = data.get('day')
+    task_name = data.get('task_name')
+    code = data.get('code')
+    budget = data.get('budget', complexity.DEFAULT_BUDGET)
+
+    if not PLAN.has_task(week, day, task_name):
+        return jsonify({'success': False, 'error': 'Unknown task'}), 400
+    if not isinstance(code, str) or not code.strip():
+        return jsonify({'success': False, 'error': 'No code submitted'}), 400
+    if not isinstance(budget, (int, float)) or isinstance(budget, bool) or budget <= 0:
+        return jsonify({'success': False, 'error': "'budget' must be a positive number"}), 400
+
+    grader_task = grader.resolve_task(task_name)
+    if grader_task not in complexity.SCALING:
+        return jsonify({'success': False, 'error': f'No complexity estimate for {task_name}'}), 400
+
+    report = complexity.estimate(grader_task, code, budget)
+    if report['complexity'] is not None:
+        key = {'user_id': progress_user_id(), 'week': week, 'day': day, 'task_name': task_name}
+        with write_serializer.section():
+            _upsert_fields(TaskProgress, TASK_KEY,
+                           dict(key, complexity=report['complexity'], complexity_confidence=report['confidence']),
+                           ['complexity', 'complexity_confidence'])
+            mark_progress_changed(key['user_id'])
+            db.session.commit()
+
+    return jsonify({'success': report['complexity'] is not None, 'report': report})
+
+def progress_rows(user_id, week_nums):
+    """One UNION ALL over user_id's DayProgress and TaskProgress rows in week_nums.
+
+    Day rows have a NULL task_name; columns only one table has are NULL in
+    the other's rows.
+    """
+    def missing(column):
+        return cast(null(), column.type).label(column.key)
+
+    days = select(DayProgress.week, DayProgress.day, missing(TaskProgress.task_name), DayProgress.completed,
+                  DayProgress.notes, missing(TaskProgress.score), missing(TaskProgress.complexity),
+                  missing(TaskProgress.complexity_confidence)).where(
+        DayProgress.user_id == user_id, DayProgress.week.in_(week_nums))
+    tasks = select(TaskProgress.week, TaskProgress.day, TaskProgress.task_name, TaskProgress.completed,
+                   missing(DayProgress.notes), TaskProgress.score, TaskProgress.complexity,
+                   TaskProgress.complexity_confidence).where(
+        TaskProgress.user_id == user_id, TaskProgress.week.in_(week_nums))
+    return union_all(days, tasks)
+
+def load_progress(user_id, week_nums=None):
+    """Load user_id's day and task progress for the given weeks (all by default).
+
+    Fetches every DayProgress and TaskProgress row for the weeks in one
+    query and builds the per-day progress dict in memory, so rendering a
+    week no longer costs two round trips per day.
+    """
+    if week_nums is None:
+        week_nums = list(PLAN.weeks)
+    week_nums = [w for w in week_nums if w in PLAN.weeks]
+
+    progress = {
+        week_num: {
+            day_num: {'day_completed': False, 'notes': '', 'tasks': {}}
+            for day_num in PLAN.weeks[week_num].days
+        }
+        for week_num in week_nums
+    }
+    if not week_nums:
+        return progress
+
+    for row in db.session.execute(progress_rows(user_id, week_nums)):
+        day = progress[row.week].get(row.day)
+        if day is None:
+            continue
+        if row.task_name is None:
+            day['day_completed'] = bool(row.completed)
+            day['notes'] = row.notes or ''
+        else:
+            day['tasks'][row.task_name] = {'completed': row.completed, 'score': row.score,
+                                           'complexity': row.complexity,
+                                           'complexity_confidence': row.complexity_confidence}
+
+    # Toggles still waiting in this worker's write-behind journal
+    for mutation in write_behind.pending_for(user_id) if write_behind else []:
+        day = progress.get(mutation['week'], {}).get(mutation['day'])
+        if day is None:
+            continue
+        if mutation['op'] == 'set_day':
+            day['day_completed'] = mutation['completed']
+        else:
+            task = day['tasks'].setdefault(mutation['task_name'], {'completed': False, 'score': None, 'complexity': None,
+                                                                   'complexity_confidence': None})
+            task['completed'] = mutation['completed']
+
+    return progress
+
+# Spaced-repetition review queue (see review_scheduler.py)
+REVIEW_QUEUE_LIMIT = 10
+MAX_REVIEW_QUEUE_LIMIT = 50
+
+def load_review_states(user_id, tasks=None):
+    """{task: review state} for the Codility tasks user_id has completed or
+    scored, or only for tasks, folding every plan label that names a task
+    into it"""
+    stmt = select(TaskProgress.task_name, TaskProgress.completed, TaskProgress.score, TaskProgress.reviewed_at).where(
+        TaskProgress.user_id == user_id)
+    if tasks is not None:
+        labels = set(tasks)
+        for task in tasks:
+            labels.update(occurrence.label for occurrence in PLAN.occurrences.get(task, ()))
+        stmt = stmt.where(TaskProgress.task_name.in_(labels))
+    else:
+        stmt = stmt.where(or_(TaskProgress.completed.is_(True), TaskProgress.score.isnot(None)))
+
+    rows = {task: [] for task in tasks or ()}
+    for label, completed, score, reviewed_at in db.session.execute(stmt):
+        for task in PLAN.label_tasks.get(label, ()):
+            if task in grader.TASKS:
+                rows.setdefault(task, []).append((completed, score, reviewed_at))
+    states = {task: review_scheduler.task_state(task, task_rows) for task, task_rows in rows.items()}
+    return states if tasks is not None else {task: state for task, state in states.items() if state}
+
+review_queue = review_scheduler.ReviewScheduler(
+    load_review_states,
+    max_users=int(os.environ.get('REVIEW_QUEUE_USERS', 256)),
+    ttl=int(os.environ.get('REVIEW_QUEUE_TTL', 60)),
+)
+
+def refresh_review_queue(user_id, labels):
+    """Re-key the tasks named by labels in user_id's review queue after a commit"""
+    if not review_queue.is_loaded(user_id):
+        return
+    tasks = {task for label in labels for task in PLAN.label_tasks.get(label, ()) if task in grader.TASKS}
+    if tasks:
+        review_queue.update(user_id, load_review_states(user_id, tasks))
+
+@app.route('/api/review_queue')
+def review_queue_api():
+    """The tasks most in need of review, soonest due first.
+
+    Query: ?limit=N (default 10, at most 50)
+    """
+    limit = request.args.get('limit', REVIEW_QUEUE_LIMIT, type=int)
+    if limit is None or not 1 <= limit <= MAX_REVIEW_QUEUE_LIMIT:
+        return jsonify({'success': False, 'error': f"'limit' must be between 1 and {MAX_REVIEW_QUEUE_LIMIT}"}), 400
+
+    tasks = []
+    for state, due, overdue in review_queue.next(progress_user_id(), limit):
+        tasks.append({
+            'task': state['task'],
+            'score': state['score'],
+            'repetitions': state['repetitions'],
+            'reviewed_at': state['reviewed_at'].isoformat(timespec='seconds') if state['reviewed_at'] else None,
+            'due_at': datetime.fromtimestamp(due).isoformat(timespec='seconds'),
+            'due': overdue,
+            'url': url_for('task_history', task_name=state['task']),
+        })
+    return jsonify({'success': True, 'tasks': tasks})
+
+COUNTER_MODELS = {
+    'completed_days': DayProgress,
+    'completed_tasks': TaskProgress,
+}
 
-    total_tasks = 0
-    for week in TRAINING_PLAN.values():
-        for day in week['days'].values():
-            total_tasks += len(day['tasks'])
+def adjust_counter(user_id, name, delta):
+    """Add delta to one of user_id's progress counters in the current transaction.
+
+    If the counter has not been initialised yet nothing is written; it
+    is built from the raw tables on the next read.
+    """
+    ProgressCounter.query.filter_by(user_id=user_id, name=name).update(
+        {ProgressCounter.value: ProgressCounter.value + delta}, synchronize_session=False)
+
+def rebuild_progress_counters(user_id=None):
+    """Recompute counters from the raw progress tables and commit.
+
+    Rebuilds a single user's counters, or every user's when user_id is
+    None. Returns {user_id: {name: value}}.
+    """
+    # The revision counter is not derived from the progress tables
+    counters = ProgressCounter.query.filter(ProgressCounter.name.in_(COUNTER_MODELS))
+    if user_id is not None:
+        counters = counters.filter_by(user_id=user_id)
+    counters.delete(synchronize_session=False)
+
+    values = {}
+    if user_id is not None:
+        values[user_id] = {name: 0 for name in COUNTER_MODELS}
+    for name, model in COUNTER_MODELS.items():
+        query = db.session.query(model.user_id, func.count()).filter(model.completed.is_(True))
+        if user_id is not None:
+            query = query.filter(model.user_id == user_id)
+        for owner, count in query.group_by(model.user_id):
+            values.setdefault(owner, {n: 0 for n in COUNTER_MODELS})[name] = count
+
+    for owner, owner_values in values.items():
+        for name, value in owner_values.items():
+            db.session.add(ProgressCounter(user_id=owner, name=name, value=value))
+        mark_progress_changed(owner)
+    db.session.commit()
+    return values
 
-    completed_tasks = TaskProgress.query.filter_by(completed=True).count()
+def read_progress_counters(user_id):
+    """user_id's counter values in one query, rebuilding them if any are missing"""
+    values = {c.name: c.value for c in ProgressCounter.query.filter_by(user_id=user_id)}
+    if all(name in values for name in COUNTER_MODELS):
+        return values
+    try:
+        return rebuild_progress_counters(user_id)[user_id]
+    except IntegrityError:
+        # Another worker seeded the counters first
+        db.session.rollback()
+        return {c.name: c.value for c in ProgressCounter.query.filter_by(user_id=user_id)}
+
+# Every progress write bumps the user's revision counter in the same
+# transaction; cached dashboards are only served for the current revision
+PROGRESS_REVISION = 'revision'
+
+def mark_progress_changed(user_id):
+    """Bump user_id's progress revision when the current transaction commits"""
+    db.session.info.setdefault('progress_changed', set()).add(user_id)
+
+@event.listens_for(Session, 'before_commit')
+def bump_progress_revisions(session):
+    users = session.info.pop('progress_changed', None)
+    if not users:
+        return
+    stmt = progress_insert(ProgressCounter).values(
+        [{'user_id': user_id, 'name': PROGRESS_REVISION, 'value': 1} for user_id in sorted(users)])
+    session.execute(stmt.on_conflict_do_update(index_elements=['user_id', 'name'],
+                                               set_={'value': ProgressCounter.value + 1}))
+
+@event.listens_for(Session, 'after_soft_rollback')
+def forget_uncommitted_changes(session, previous_transaction):
+    session.info.pop('progress_changed', None)
+    session.info.pop('users_changed', None)
+
+def read_progress_revision(user_id):
+    return db.session.execute(select(ProgressCounter.value).where(
+        ProgressCounter.user_id == user_id, ProgressCounter.name == PROGRESS_REVISION)).scalar() or 0
+
+def apply_journal_entries(entries):
+    """Apply write-behind (user_id, mutation) pairs and their counter changes in one transaction"""
+    with app.app_context():
+        deltas = {}
+        for user_id, mutation in entries:
+            apply_progress_mutation(user_id, mutation, deltas.setdefault(user_id, {name: 0 for name in COUNTER_MODELS}))
+        for user_id, user_deltas in deltas.items():
+            for name, delta in user_deltas.items():
+                if delta:
+                    adjust_counter(user_id, name, delta)
+        db.session.commit()
+    for user_id in {user_id for user_id, _ in entries}:
+        review_queue.invalidate(user_id)
+
+# Optional write-behind for checkbox toggles (see write_behind.py); enabled
+# by pointing WRITE_BEHIND_DIR at a journal directory. Pending toggles are
+# only visible to the worker that took them, so it needs a single worker.
+write_behind = None
+if os.environ.get('WRITE_BEHIND_DIR'):
+    if int(os.environ.get('WEB_CONCURRENCY', 1)) > 1:
+        raise RuntimeError('WRITE_BEHIND_DIR needs a single worker; unset it or set WEB_CONCURRENCY=1')
+    write_behind = WriteBehindJournal(
+        os.environ['WRITE_BEHIND_DIR'], apply_journal_entries, section=write_serializer.section,
+        interval=float(os.environ.get('WRITE_BEHIND_INTERVAL', 0.5)),
+        max_pending=int(os.environ.get('WRITE_BEHIND_MAX_PENDING', 200)))
+    write_behind.recover()
+
+def flush_write_behind():
+    """Commit pending toggles before writing completion state directly"""
+    if write_behind:
+        write_behind.flush()
+
+def toggle_write_behind(model, op, data):
+    """Toggle a day or task through the write-behind journal instead of committing"""
+    try:
+        mutation = {'op': op, 'week': _int_field(data, 'week'), 'day': _int_field(data, 'day')}
+        if model is TaskProgress:
+            mutation['task_name'] = _task_name(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    user_id = progress_user_id()
+    row = {k: v for k, v in mutation.items() if k != 'op'}
+    completed = write_behind.toggle(
+        user_id, mutation, lambda: db.session.query(model.completed).filter_by(user_id=user_id, **row).scalar())
+    return jsonify({'success': True, 'completed': completed})
+
+def get_overall_stats(user_id, progress=None):
+    """Overall completion stats for user_id.
+
+    Pass the result of load_progress() to derive the counts from already
+    loaded rows; otherwise they come from the user's ProgressCounter rows,
+    which act as a per-user stats cache shared by every worker.
+    """
+    if progress is not None:
+        days = [day for week in progress.values() for day in week.values()]
+        completed_days = sum(1 for day in days if day['day_completed'])
+        completed_tasks = sum(1 for day in days for task in day['tasks'].values() if task['completed'])
+    else:
+        counters = read_progress_counters(user_id)
+        completed_days = counters['completed_days']
+        completed_tasks = counters['completed_tasks']
 
     return {
-        'total_days': total_days,
+        'total_days': PLAN.total_days,
         'completed_days': completed_days,
-        'total_tasks': total_tasks,
+        'total_tasks': PLAN.total_tasks,
         'completed_tasks': completed_tasks,
-        'progress_percentage': int((completed_days / total_days) * 100) if total_days > 0 else 0
+        'progress_percentage': int((completed_days / PLAN.total_days) * 100) if PLAN.total_days > 0 else 0
     }
 
+# Whole plan with the user's progress for the dashboard, cached per user
+dashboard_snapshots = DashboardSnapshotCache(max_entries=int(os.environ.get('DASHBOARD_CACHE_SIZE', 256)))
+
+@event.listens_for(User, 'after_delete')
+def forget_dashboard(mapper, connection, user):
+    dashboard_snapshots.invalidate(user.id)
+
+def build_dashboard(user_id):
+    """Stats plus every week's days and tasks with user_id's progress"""
+    progress = load_progress(user_id)
+    weeks = []
+    for week in PLAN.weeks.values():
+        days = []
+        for day in week.days.values():
+            day_progress = progress[week.number][day.number]
+            tasks = []
+            for label in day.tasks:
+                task = day_progress['tasks'].get(label, {})
+                tasks.append({'name': label, 'completed': bool(task.get('completed')), 'score': task.get('score'),
+                              'complexity': task.get('complexity')})
+            days.append({'number': day.number, 'title': day.title, 'topics': list(day.topics),
+                         'completed': day_progress['day_completed'], 'notes': day_progress['notes'], 'tasks': tasks})
+        weeks.append({'number': week.number, 'title': week.title, 'focus': week.focus,
+                      'lesson': week.lesson.file if week.lesson else None, 'days': days})
+    return {'stats': get_overall_stats(user_id, progress), 'weeks': weeks}
+
+@app.route('/api/dashboard')
+def dashboard_api():
+    """The whole plan with the user's progress, revalidated with an ETag"""
+    user_id = progress_user_id()
+    # Read the revision before the rows: a write landing in between makes
+    # the snapshot newer than its revision, never older
+    revision = read_progress_revision(user_id)
+    # This worker's unflushed toggles are not covered by the revision
+    cacheable = not (write_behind and write_behind.pending_for(user_id))
+    snapshot = dashboard_snapshots.get(user_id, revision) if cacheable else None
+    if snapshot is None:
+        body = json.dumps(build_dashboard(user_id), separators=(',', ':')).encode('utf-8')
+        if cacheable:
+            snapshot = dashboard_snapshots.put(user_id, revision, body)
+        else:
+            snapshot = Snapshot(revision, snapshot_etag(body), body)
+
+    if request.if_none_match.contains(snapshot.etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(snapshot.body, mimetype='application/json')
+    response.set_etag(snapshot.etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+# Progress export/import as NDJSON: a header line, then one JSON object
+# per DayProgress/TaskProgress row
+PROGRESS_EXPORT_FORMAT = 'codility-progress'
+PROGRESS_EXPORT_VERSION = 1
+EXPORT_BATCH_SIZE = 500
+IMPORT_CHUNK_SIZE = 500
+MAX_IMPORT_LINE = 64 * 1024
+
+PROGRESS_RECORDS = {
+    'day': (DayProgress, DAY_KEY, ['completed', 'completed_date', 'notes']),
+    'task': (TaskProgress, TASK_KEY, ['completed', 'score', 'notes', 'complexity', 'complexity_confidence',
+                                      'reviewed_at']),
+}
+RECORD_FIELD_TYPES = {
+    'completed': bool,
+    'completed_date': datetime,
+    'notes': str,
+    'score': int,
+    'complexity': str,
+    'complexity_confidence': float,
+    'reviewed_at': datetime,
+}
+RECORD_FIELD_DEFAULTS = {'completed': False, 'notes': ''}
+
+def export_progress_lines(user_id=None):
+    """Yield user_id's progress (everyone's when None) as NDJSON lines.
+
+    Rows are read with yield_per, which uses a server-side cursor on
+    Postgres, so memory use stays flat however long the history is.
+    user_id is only written for the all-users export.
+    """
+    yield json.dumps({'type': 'header', 'format': PROGRESS_EXPORT_FORMAT, 'version': PROGRESS_EXPORT_VERSION,
+                      'exported_at': datetime.now(timezone.utc).isoformat(timespec='seconds')}) + '\n'
+    for kind, (model, key, fields) in PROGRESS_RECORDS.items():
+        key_columns = [getattr(model, k) for k in key]
+        stmt = select(*key_columns, *[getattr(model, f) for f in fields]).order_by(*key_columns)
+        if user_id is not None:
+            stmt = stmt.where(model.user_id == user_id)
+        for row in db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE)):
+            record = {'type': kind}
+            for name, value in row._mapping.items():
+                if name == 'user_id' and user_id is not None:
+                    continue
+                record[name] = value.isoformat() if isinstance(value, datetime) else value
+            yield json.dumps(record) + '\n'
+
+def _record_field(record, field):
+    value = record.get(field, RECORD_FIELD_DEFAULTS.get(field))
+    kind = RECORD_FIELD_TYPES[field]
+    if value is None:
+        return None
+    if kind is datetime:
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"'{field}' must be an ISO date or null") from None
+    if kind is float and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, kind) or (kind is int and isinstance(value, bool)):
+        raise ValueError(f"'{field}' must be {kind.__name__} or null")
+    return value
+
+def parse_progress_record(line, user_id=None):
+    """Parse one export line into (kind, row values); headers give (None, None).
+
+    Rows go to user_id, or to the user_id in the record when None.
+    Fields missing from the record get their column defaults, so an
+    imported row always matches the exported one exactly.
+    """
+    try:
+        record = json.loads(line)
+    except ValueError:
+        raise ValueError('invalid JSON') from None
+    if not isinstance(record, dict):
+        raise ValueError('each line must be a JSON object')
+
+    kind = record.get('type')
+    if kind == 'header':
+        if record.get('format') != PROGRESS_EXPORT_FORMAT or record.get('version') != PROGRESS_EXPORT_VERSION:
+            raise ValueError(f"not a {PROGRESS_EXPORT_FORMAT} v{PROGRESS_EXPORT_VERSION} export")
+        return None, None
+    if kind not in PROGRESS_RECORDS:
+        raise ValueError(f'unknown record type: {kind!r}')
+
+    model, key, fields = PROGRESS_RECORDS[kind]
+    values = {'user_id': _int_field(record, 'user_id') if user_id is None else user_id,
+              'week': _int_field(record, 'week'), 'day': _int_field(record, 'day')}
+    if kind == 'task':
+        values['task_name'] = _task_name(record)
+    for field in fields:
+        values[field] = _record_field(record, field)
+    return kind, values
+
+def import_progress_lines(lines, user_id=None):
+    """Upsert exported NDJSON lines, committing every IMPORT_CHUNK_SIZE rows.
+
+    Rows replace existing rows with the same key, so re-running an import
+    is safe. A malformed line raises ValueError naming the line; chunks
+    before it stay committed. Counters of every user touched are rebuilt
+    at the end. Returns the number of rows imported per record type.
+    """
+    pending = {kind: {} for kind in PROGRESS_RECORDS}
+    counts = {kind: 0 for kind in PROGRESS_RECORDS}
+    users = set()
+    flush_write_behind()
+
+    def flush():
+        with write_serializer.section():
+            for kind, rows in pending.items():
+                if rows:
+                    model, key, fields = PROGRESS_RECORDS[kind]
+                    _upsert_fields(model, key, list(rows.values()), fields)
+                    counts[kind] += len(rows)
+                    rows.clear()
+            db.session.commit()
+
+    try:
+        for number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                kind, values = parse_progress_record(line, user_id)
+            except ValueError as e:
+                raise ValueError(f'line {number}: {e}') from None
+            if kind is None:
+                continue
+            key = PROGRESS_RECORDS[kind][1]
+            # One row per key in a statement: Postgres rejects an upsert
+            # that touches the same row twice
+            pending[kind][tuple(values[k] for k in key)] = values
+            users.add(values['user_id'])
+            if sum(len(rows) for rows in pending.values()) >= IMPORT_CHUNK_SIZE:
+                flush()
+        flush()
+    finally:
+        db.session.rollback()
+        for owner in sorted(users):
+            rebuild_progress_counters(owner)
+            review_queue.invalidate(owner)
+    return counts
+
+def _progress_transfer_user_id():
+    """Target of an export/import: the current board, or every user for
+    admins passing ?scope=all. Returns (user_id, error response)."""
+    if request.args.get('scope') != 'all':
+        return progress_user_id(), None
+    if not current_user.is_authenticated or not current_user.is_admin:
+        return None, (jsonify({'success': False, 'error': 'Admin access required'}), 403)
+    return None, None
+
+def _request_lines():
+    """Decode the request body line by line without buffering all of it"""
+    while True:
+        line = request.stream.readline(MAX_IMPORT_LINE + 1)
+        if not line:
+            return
+        if len(line) > MAX_IMPORT_LINE:
+            raise ValueError(f'lines are limited to {MAX_IMPORT_LINE} bytes')
+        yield line.decode('utf-8')
+
+@app.route('/api/progress/export', methods=['GET'])
+def export_progress():
+    """Download progress as NDJSON; ?scope=all exports every user (admin only)"""
+    user_id, error = _progress_transfer_user_id()
+    if error:
+        return error
+    response = app.response_class(stream_with_context(export_progress_lines(user_id)),
+                                  mimetype='application/x-ndjson')
+    filename = f"progress-{'all' if user_id is None else user_id}-{datetime.now():%Y%m%d-%H%M%S}.ndjson"
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+@app.route('/api/progress/import', methods=['POST'])
+def import_progress():
+    """Restore an NDJSON export into the current board.
+
+    With ?scope=all (admin only) rows keep the user_id they were exported
+    with, e.g. when moving a whole database from SQLite to Postgres.
+    """
+    user_id, error = _progress_transfer_user_id()
+    if error:
+        return error
+    try:
+        counts = import_progress_lines(_request_lines(), user_id)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except IntegrityError:
+        return jsonify({'success': False, 'error': 'Rows conflict with existing data'}), 400
+    return jsonify({'success': True, 'imported': counts})
+
 # Playground route
 @app.route('/playground')
 def playground():
@@ -352,25 +1130,70 @@ def playground():
     return render_template('playground.html')
 
 # Lessons routes
+def lesson_not_modified(etag, last_modified):
+    """True if the request's validators show the client copy is current"""
+    if request.if_none_match:
+        # If-None-Match takes precedence over If-Modified-Since
+        return request.if_none_match.contains(etag)
+    if request.if_modified_since:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+def lesson_validated_response(response, etag, last_modified):
+    """Attach ETag/Last-Modified so clients revalidate with a cheap 304"""
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+def lesson_conditional(lesson_path, etag_suffix='', not_before=None):
+    """Return (etag, last_modified, not_modified) for a lesson file.
+
+    Uses the render cache's recorded content hash so an unchanged file is
+    only stat()ed, never read or rendered. not_before (Unix seconds) raises
+    Last-Modified for responses that also depend on something else.
+    """
+    digest, mtime = lesson_cache.validators(lesson_path)
+    etag = digest + etag_suffix
+    last_modified = datetime.fromtimestamp(max(mtime, not_before or 0), tz=timezone.utc)
+    return etag, last_modified, lesson_not_modified(etag, last_modified)
+
+
+MAX_SEARCH_RESULTS = 50
+
+# Full-text index of the plan's lessons, built once per worker process
+lesson_search = LessonSearchIndex()
+for lesson in PLAN.lessons:
+    try:
+        lesson_search.add_lesson(lesson.file, lesson.title, Path(__file__).parent / 'lessons' / lesson.file)
+    except OSError:
+        pass
+
 @app.route('/lessons')
 def lessons_index():
     """Display all available lessons"""
-    lessons_dir = Path(__file__).parent / 'lessons'
-
-    lessons_list = [
-        {'file': 'README.md', 'title': 'Lessons Overview', 'week': 0},
-        {'file': 'CHEAT_SHEET.md', 'title': 'Pattern Cheat Sheet', 'week': 0},
-        {'file': 'week1-foundations.md', 'title': 'Week 1: Foundations', 'week': 1},
-        {'file': 'week2-counting-prefix-hashmaps.md', 'title': 'Week 2: Counting & Prefix Sums', 'week': 2},
-        {'file': 'week3-sorting-greedy-math.md', 'title': 'Week 3: Sorting & Greedy', 'week': 3},
-        {'file': 'week4-stacks-queues-leaders.md', 'title': 'Week 4: Stacks & Leaders', 'week': 4},
-        {'file': 'week5-slices-dp.md', 'title': 'Week 5: Maximum Slices & DP', 'week': 5},
-        {'file': 'week6-binary-search-peaks-sieve.md', 'title': 'Week 6: Binary Search & Sieve', 'week': 6},
-        {'file': 'week7-review-practice.md', 'title': 'Week 7: Review & Practice', 'week': 7},
-        {'file': 'week8-final-mocks.md', 'title': 'Week 8: Final Mock Tests', 'week': 8},
-    ]
-
-    return render_template('lessons.html', lessons=lessons_list)
+    return render_template('lessons.html', lessons=PLAN.lessons)
+
+# Rendered in place of the lesson body, which is then added as bytes
+LESSON_BODY_SLOT = '<!--lesson-body-->'
+
+def lesson_page_response(lesson_file, html, before, after):
+    """The page shell around a lesson body, gzipped when the client accepts it.
+
+    The body's deflate segment comes from the ahead-of-time build, so only
+    the shell is compressed per request.
+    """
+    body = html.encode('utf-8')
+    before, after = before.encode('utf-8'), after.encode('utf-8')
+    if choose_encoding(request.accept_encodings, ['gzip']):
+        segment = load_segment(lesson_manifest['lessons'].get(lesson_file), body, LESSON_BUILD_DIR)
+        response = app.response_class(splice_gzip([(before, None), (body, segment), (after, None)]),
+                                      mimetype='text/html')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = app.response_class(before + body + after, mimetype='text/html')
+    response.vary.add('Accept-Encoding')
+    return response
 
 @app.route('/lessons/<lesson_file>')
 def view_lesson(lesson_file):
@@ -383,46 +1206,38 @@ def view_lesson(lesson_file):
         return "Lesson not found", 404
 
     try:
-        with open(lesson_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        # Convert markdown to HTML with extensions
-        md = markdown.Markdown(extensions=['extra', 'codehilite', 'toc', 'fenced_code'])
-        html_content = md.convert(content)
-
-        # Extract title from first heading
-        title = lesson_file.replace('.md', '').replace('-', ' ').title()
-        if content.startswith('#'):
-            title = content.split('\n')[0].replace('#', '').strip()
-
-        # Get all lessons for navigation
-        lessons_list = [
-            {'file': 'README.md', 'title': 'Lessons Overview', 'week': 0},
-            {'file': 'CHEAT_SHEET.md', 'title': 'Pattern Cheat Sheet', 'week': 0},
-            {'file': 'week1-foundations.md', 'title': 'Week 1: Foundations', 'week': 1},
-            {'file': 'week2-counting-prefix-hashmaps.md', 'title': 'Week 2: Counting & Prefix Sums', 'week': 2},
-            {'file': 'week3-sorting-greedy-math.md', 'title': 'Week 3: Sorting & Greedy', 'week': 3},
-            {'file': 'week4-stacks-queues-leaders.md', 'title': 'Week 4: Stacks & Leaders', 'week': 4},
-            {'file': 'week5-slices-dp.md', 'title': 'Week 5: Maximum Slices & DP', 'week': 5},
-            {'file': 'week6-binary-search-peaks-sieve.md', 'title': 'Week 6: Binary Search & Sieve', 'week': 6},
-            {'file': 'week7-review-practice.md', 'title': 'Week 7: Review & Practice', 'week': 7},
-            {'file': 'week8-final-mocks.md', 'title': 'Week 8: Final Mock Tests', 'week': 8},
-        ]
-
-        # Find current lesson index
-        current_index = next((i for i, l in enumerate(lessons_list) if l['file'] == lesson_file), None)
-
-        # Get prev/next lessons
-        prev_lesson = lessons_list[current_index - 1] if current_index and current_index > 0 else None
-        next_lesson = lessons_list[current_index + 1] if current_index is not None and current_index < len(lessons_list) - 1 else None
-
-        return render_template('lesson_view.html',
+        # The page embeds the nav for the current user and the asset URLs
+        # of this build, so the validators do too; otherwise a redeploy
+        # would revalidate pages linking stylesheets that no longer exist
+        etag, last_modified, not_modified = lesson_conditional(
+            lesson_path, f"-{current_user.get_id() or 'anon'}-{asset_build_id}", asset_build_modified)
+        if not_modified:
+            response = app.response_class(status=304)
+            response.vary.add('Cookie')
+            return lesson_validated_response(response, etag, last_modified)
+
+        # Rendered HTML is cached by content hash and revalidated by mtime
+        lesson = lesson_cache.get(lesson_path)
+        content = lesson.source
+        html_content = lesson.html
+
+        # Title from first heading, falling back to the file name
+        title = lesson.title or lesson_file.replace('.md', '').replace('-', ' ').title()
+
+        prev_lesson, next_lesson = PLAN.lesson_neighbours(lesson_file)
+
+        page = render_template('lesson_view.html',
                              title=title,
-                             content=html_content,
+                             content=LESSON_BODY_SLOT,
                              markdown_content=content,
+                             content_etag=lesson.content_hash,
                              lesson_file=lesson_file,
                              prev_lesson=prev_lesson,
                              next_lesson=next_lesson)
+        before, _, after = page.partition(LESSON_BODY_SLOT)
+        response = lesson_page_response(lesson_file, html_content, before, after)
+        response.vary.add('Cookie')
+        return lesson_validated_response(response, etag, last_modified)
     except Exception as e:
         return f"Error loading lesson: {str(e)}", 500
 
@@ -448,6 +1263,72 @@ def login():
 
     return render_template('login.html')
 
+def token_response(user, session_id, refresh_token=None):
+    body = {
+        'success': True,
+        'access_token': token_signer.access_token(session_id, user.id, user.username, user.is_admin),
+        'token_type': 'Bearer',
+        'expires_in': token_signer.access_ttl,
+        'user': {'id': user.id, 'username': user.username, 'isAdmin': bool(user.is_admin)},
+    }
+    if refresh_token:
+        body['refresh_token'] = refresh_token
+        body['refresh_expires_in'] = token_signer.refresh_ttl
+    return jsonify(body)
+
+@app.route('/api/auth/token', methods=['POST'])
+def issue_token():
+    """Log in for the API: {"username": ..., "password": ...} -> access and refresh tokens"""
+    data = request.json or {}
+    username = data.get('username')
+    password = data.get('password')
+    if not isinstance(username, str) or not isinstance(password, str):
+        return jsonify({'success': False, 'error': "'username' and 'password' are required"}), 400
+
+    user = User.query.filter_by(username=username).first()
+    if not user or not user.check_password(password):
+        return jsonify({'success': False, 'error': 'Invalid username or password'}), 401
+
+    session_id = token_signer.new_session_id()
+    return token_response(user, session_id, token_signer.refresh_token(session_id, user.id, user.password_hash))
+
+@app.route('/api/auth/refresh', methods=['POST'])
+def refresh_access_token():
+    """Trade {"refresh_token": ...} for a new access token with current claims"""
+    try:
+        claims = token_signer.verify_refresh((request.json or {}).get('refresh_token') or '')
+    except TokenError as e:
+        return jsonify({'success': False, 'error': str(e)}), 401
+    if revoked_sessions.is_revoked(claims['sid']):
+        return jsonify({'success': False, 'error': 'Token revoked'}), 401
+
+    # The refresh is where is_admin changes and deleted users catch up
+    user = load_user(claims['uid'])
+    if user is None:
+        return jsonify({'success': False, 'error': 'Invalid token'}), 401
+    # Issued before the password was last changed or reset
+    if claims.get('cred') != credential_tag(user.password_hash):
+        return jsonify({'success': False, 'error': 'Token revoked'}), 401
+    return token_response(user, claims['sid'])
+
+@app.route('/api/auth/revoke', methods=['POST'])
+@serialized_write
+def revoke_token():
+    """End an API login session, given its refresh token or a bearer access token"""
+    refresh = (request.json or {}).get('refresh_token') if request.is_json else None
+    try:
+        claims = token_signer.verify_refresh(refresh) if refresh else token_signer.verify_access(bearer_token() or '')
+    except TokenError as e:
+        return jsonify({'success': False, 'error': str(e)}), 401
+
+    now = datetime.utcnow()
+    RevokedToken.query.filter(RevokedToken.expires_at <= now).delete(synchronize_session=False)
+    db.session.merge(RevokedToken(session_id=claims['sid'], user_id=claims['uid'],
+                                  expires_at=now + timedelta(seconds=token_signer.refresh_ttl)))
+    db.session.commit()
+    revoked_sessions.changed()
+    return jsonify({'success': True})
+
 @app.route('/logout')
 @login_required
 def logout():
@@ -456,6 +1337,15 @@ def logout():
     flash('Logged out successfully!', 'success')
     return redirect(url_for('index'))
 
+def lesson_precondition_failed(current_etag):
+    """412 response for a save whose If-Match no longer matches the file"""
+    response = jsonify({'success': False,
+                        'error': 'Lesson was changed by someone else. Reload before saving.',
+                        'etag': current_etag})
+    if current_etag:
+        response.set_etag(current_etag)
+    return response, 412
+
 @app.route('/api/save_lesson', methods=['POST'])
 @admin_required
 def save_lesson():
@@ -471,10 +1361,30 @@ def save_lesson():
     if '..' in lesson_file or not lesson_file.endswith('.md'):
         return jsonify({'success': False, 'error': 'Invalid lesson file'}), 400
 
+    if request.if_match and not lesson_path.is_file():
+        return lesson_precondition_failed(None)
+
     try:
-        with open(lesson_path, 'w', encoding='utf-8') as f:
+        # Open without truncating so If-Match is checked against the file
+        # contents under an exclusive lock held until the write completes
+        with open(lesson_path, 'a+', encoding='utf-8') as f:
+            if fcntl:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(0)
+            current_etag = content_hash(f.read())
+            if request.if_match and not request.if_match.contains(current_etag):
+                return lesson_precondition_failed(current_etag)
+
+            f.seek(0)
+            f.truncate()
             f.write(content)
-        return jsonify({'success': True})
+
+        lesson = lesson_cache.put(lesson_path, content)
+        if lesson_file in PLAN.lesson_by_file:
+            lesson_search.update(lesson_file, content)
+        response = jsonify({'success': True, 'etag': lesson.content_hash})
+        response.set_etag(lesson.content_hash)
+        return response
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
@@ -490,25 +1400,125 @@ def get_lesson_content():
         return jsonify({'success': False, 'error': 'Invalid lesson file'}), 400
 
     try:
+        etag, last_modified, not_modified = lesson_conditional(lesson_path)
+        if not_modified:
+            return lesson_validated_response(app.response_class(status=304), etag, last_modified)
+
         with open(lesson_path, 'r', encoding='utf-8') as f:
             content = f.read()
-        return jsonify({'success': True, 'content': content})
+        return lesson_validated_response(jsonify({'success': True, 'content': content}), content_hash(content), last_modified)
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/search', methods=['GET'])
+def search_lessons():
+    """Ranked full-text search over the lessons, e.g. /api/search?q=prefix+sums"""
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'success': False, 'error': "'q' is required"}), 400
+    limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_SEARCH_RESULTS)
+
+    results = lesson_search.query(q, limit)
+    for result in results:
+        result['url'] = url_for('view_lesson', lesson_file=result['lesson'])
+        if result['anchor']:
+            result['url'] += '#' + result['anchor']
+    return jsonify({'success': True, 'query': q, 'results': results})
+
+@app.route('/api/lesson_cache_stats', methods=['GET'])
+@admin_required
+def lesson_cache_stats():
+    """Rendered-lesson cache hit/miss counters - Admin only"""
+    return jsonify({'success': True, 'stats': lesson_cache.stats()})
+
+@app.route('/api/user_cache_stats', methods=['GET'])
+@admin_required
+def user_cache_stats():
+    """Session user cache hit/miss counters - Admin only"""
+    return jsonify({'success': True, 'stats': user_cache.stats()})
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Request and SQL metrics of all workers in the Prometheus text format.
+
+    Requires "Authorization: Bearer <METRICS_TOKEN>" when METRICS_TOKEN is set.
+    """
+    token = os.environ.get('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return "Unauthorized", 401
+    return app.response_class(metrics_registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 @app.route('/robots.txt')
 def robots_txt():
     """Serve robots.txt for better web categorization"""
     return send_from_directory(app.static_folder, 'robots.txt')
 
+def cache_forever(response):
+    """Mark a response whose URL changes whenever its content does"""
+    response.cache_control.no_cache = None
+    response.cache_control.public = True
+    response.cache_control.max_age = IMMUTABLE_MAX_AGE
+    response.cache_control.immutable = True
+    return response
+
+@app.template_global()
+def asset_url(filename):
+    """URL of a static file, fingerprinted when the asset build has it"""
+    entry = static_assets.get(filename)
+    if entry is None:
+        return url_for('static', filename=filename)
+    return url_for('static_asset', filename=entry['path'])
+
+@app.route('/assets/<path:filename>')
+def static_asset(filename):
+    """Fingerprinted static file, precompressed when the client accepts it"""
+    entry = fingerprinted_assets.get(filename)
+    if entry is None:
+        return "Asset not found", 404
+
+    asset_path = ASSET_BUILD_DIR / entry['path']
+    mimetype = mimetypes.guess_type(filename)[0]
+    encoding = choose_encoding(request.accept_encodings, entry['encodings'])
+    if encoding:
+        response = send_file(str(asset_path) + ENCODING_SUFFIXES[encoding], mimetype=mimetype)
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = send_file(asset_path, mimetype=mimetype)
+
+    response.vary.add('Accept-Encoding')
+    return cache_forever(response)
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+class UploadRequest(Request):
+    """Spools image uploads through HashingUpload instead of werkzeug's temp files"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint == 'upload_image':
+            return HashingUpload(app.config['UPLOAD_FOLDER'])
+        return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+
+app.request_class = UploadRequest
+
+@app.after_request
+def cache_stored_images(response):
+    """Uploaded images are named by their content hash, so they never change"""
+    if request.endpoint == 'static' and response.status_code == 200:
+        directory, _, name = (request.view_args or {}).get('filename', '').rpartition('/')
+        if directory == 'uploads' and STORED_NAME_RE.match(name):
+            cache_forever(response)
+    return response
+
 @app.route('/api/upload_image', methods=['POST'])
 @admin_required
 def upload_image():
-    """Upload an image file - Admin only"""
+    """Upload an image file - Admin only.
+
+    The file is stored under the SHA-256 of its content, so uploading the
+    same image again returns the existing URL.
+    """
     if 'image' not in request.files:
         return jsonify({'success': False, 'error': 'No image file provided'}), 400
 
@@ -520,24 +1530,19 @@ def upload_image():
     if not allowed_file(file.filename):
         return jsonify({'success': False, 'error': 'Invalid file type. Allowed: ' + ', '.join(ALLOWED_EXTENSIONS)}), 400
 
-    try:
-        # Create upload folder if it doesn't exist
-        os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-
-        # Generate unique filename
-        ext = file.filename.rsplit('.', 1)[1].lower()
-        filename = f"{uuid.uuid4().hex}.{ext}"
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
+    upload = file.stream
+    if upload.image_type is None:
+        return jsonify({'success': False, 'error': 'File is not a PNG, JPEG, GIF, WebP or SVG image'}), 400
 
-        # Save file
-        file.save(filepath)
+    try:
+        filename, duplicate = upload.commit(app.config['UPLOAD_FOLDER'])
+    except OSError as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
 
-        # Return URL relative to static folder
-        image_url = f"/static/uploads/{filename}"
+    # Return URL relative to static folder
+    image_url = f"/static/uploads/{filename}"
 
-        return jsonify({'success': True, 'url': image_url})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)}), 500
+    return jsonify({'success': True, 'url': image_url, 'duplicate': duplicate})
 
 if __name__ == '__main__':
     with app.app_context():
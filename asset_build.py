@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Fingerprinted static assets for Codility Training Tracker
+
+Copies every stylesheet and script under static/ into the build directory
+with its content hash in the file name (css/style.css becomes
+css/style.<hash>.css), writes gzip/brotli variants next to each copy and
+records the mapping in manifest.json. Templates link assets through
+asset_url(), which emits the fingerprinted URL, so the files can be cached
+forever: any change produces a new URL.
+
+Usage:
+    python asset_build.py [static_dir] [build_dir]
+
+gunicorn.conf.py runs this automatically when the master process starts.
+"""
+
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+from precompress import write_atomic, write_precompressed
+
+BASE_DIR = Path(__file__).parent
+STATIC_DIR = BASE_DIR / 'static'
+BUILD_DIR = Path(os.environ.get('ASSET_BUILD_DIR', BASE_DIR / 'build' / 'static'))
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 1
+# Uploads are already named by content hash (see image_store.py)
+ASSET_PATTERNS = ('css/**/*.css', 'js/**/*.js')
+
+def load_manifest(build_dir=BUILD_DIR):
+    """Return the asset manifest, or None if there is no usable build"""
+    try:
+        with open(Path(build_dir) / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def fingerprinted_name(name, digest):
+    """css/style.css -> css/style.<digest[:16]>.css"""
+    stem, dot, suffix = name.rpartition('.')
+    return f'{stem}.{digest[:16]}.{suffix}' if dot else f'{name}.{digest[:16]}'
+
+def build_assets(static_dir=STATIC_DIR, build_dir=BUILD_DIR):
+    """Fingerprint and precompress all assets into build_dir and write the manifest.
+
+    Assets whose hash matches the previous manifest are not rewritten.
+    Returns the new manifest.
+    """
+    static_dir = Path(static_dir)
+    build_dir = Path(build_dir)
+    build_dir.mkdir(parents=True, exist_ok=True)
+
+    previous = (load_manifest(build_dir) or {}).get('assets', {})
+    assets = {}
+
+    for pattern in ASSET_PATTERNS:
+        for source_path in sorted(static_dir.glob(pattern)):
+            name = source_path.relative_to(static_dir).as_posix()
+            data = source_path.read_bytes()
+            st = source_path.stat()
+            digest = hashlib.sha256(data).hexdigest()
+            path = fingerprinted_name(name, digest)
+
+            old = previous.get(name)
+            if old and old['hash'] == digest and (build_dir / path).is_file():
+                entry = dict(old)
+            else:
+                (build_dir / path).parent.mkdir(parents=True, exist_ok=True)
+                entry = {
+                    'hash': digest,
+                    'path': path,
+                    'encodings': write_precompressed(str(build_dir / path), data),
+                }
+
+            entry['mtime_ns'] = st.st_mtime_ns
+            entry['size'] = st.st_size
+            assets[name] = entry
+
+    manifest = {'version': MANIFEST_VERSION, 'assets': assets}
+    write_atomic(str(build_dir / MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+
+    # Drop fingerprinted copies that no longer belong to any asset
+    keep = {entry['path'] for entry in assets.values()}
+    for path in build_dir.rglob('*'):
+        name = path.relative_to(build_dir).as_posix()
+        if path.is_file() and name != MANIFEST_NAME and name.removesuffix('.gz').removesuffix('.br') not in keep:
+            path.unlink()
+
+    return manifest
+
+def build_validators(assets):
+    """Return (build id, newest source mtime in seconds) for built assets.
+
+    The id is a short hash of the fingerprinted paths, so it changes
+    whenever any asset URL does. Pages embedding asset_url() links carry
+    both in their validators; ('', None) when nothing is built.
+    """
+    if not assets:
+        return '', None
+    paths = '\n'.join(sorted(entry['path'] for entry in assets.values()))
+    newest = max(entry['mtime_ns'] for entry in assets.values())
+    return hashlib.sha256(paths.encode('utf-8')).hexdigest()[:12], newest / 1e9
+
+def current_assets(manifest, static_dir=STATIC_DIR):
+    """Manifest entries whose source file on disk still matches the build.
+
+    Assets edited after the build are left out, so they are linked
+    unfingerprinted until the next build instead of serving stale content.
+    """
+    static_dir = Path(static_dir)
+    assets = {}
+    for name, entry in manifest.get('assets', {}).items():
+        try:
+            st = (static_dir / name).stat()
+        except OSError:
+            continue
+        if (st.st_mtime_ns, st.st_size) == (entry['mtime_ns'], entry['size']):
+            assets[name] = entry
+    return assets
+
+if __name__ == '__main__':
+    static_dir = sys.argv[1] if len(sys.argv) > 1 else STATIC_DIR
+    build_dir = sys.argv[2] if len(sys.argv) > 2 else BUILD_DIR
+    manifest = build_assets(static_dir, build_dir)
+    print(f"✓ Fingerprinted {len(manifest['assets'])} assets into {build_dir}")
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+HTTP load benchmark for the hot routes
+
+Seeds benchmark users with realistic progress, then drives the dashboard,
+week view, a lesson page and the toggle/score APIs, first through Flask's
+test client and then (with --gunicorn) through a local gunicorn server
+with concurrent keep-alive clients. Reports throughput and p50/p95/p99
+latency per route for every database given, compares them with the last
+run recorded in http_history.json and flags regressions. The first run
+on an empty history is recorded as the baseline.
+
+Every database runs in its own process, because the app binds
+DATABASE_URL at import. The default database is a throwaway SQLite file;
+benchmark users on other databases are deleted afterwards.
+
+Usage:
+    python benchmarks/http_load.py                                  # test client on SQLite
+    python benchmarks/http_load.py --gunicorn                       # also through gunicorn
+    python benchmarks/http_load.py --database sqlite --database postgresql://user:pw@localhost/codility_bench
+    python benchmarks/http_load.py --gunicorn --save v1.5.0         # record the run as a baseline
+"""
+
+import http.client
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import urlencode
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BASE_DIR))
+
+from plan_registry import TRAINING_PLAN  # noqa: E402
+
+HISTORY_PATH = Path(__file__).parent / 'http_history.json'
+USERS = 20
+PASSWORD = 'benchmark'
+USER_PREFIX = '_bench_'
+REQUESTS = 300
+WARMUP = 20
+CONCURRENCY = 8
+GUNICORN_WORKERS = 2
+SEED = 1234
+# Changes larger than this versus the last recorded run are flagged
+REGRESSION_THRESHOLD = 0.2
+
+def scenarios(rng, plan):
+    """(name, method, path, json body) request factories for each hot route"""
+    days = [(week, day, list(day_data['tasks'])) for week, data in plan.items()
+            for day, day_data in data['days'].items() if day_data['tasks']]
+
+    def task_body():
+        week, day, tasks = rng.choice(days)
+        return {'week': week, 'day': day, 'task_name': rng.choice(tasks)}
+
+    return [
+        ('index', lambda: ('GET', '/', None)),
+        ('week_view', lambda: ('GET', f'/week/{rng.choice(list(plan))}', None)),
+        ('view_lesson', lambda: ('GET', '/lessons/week1-foundations.md', None)),
+        ('toggle_task', lambda: ('POST', '/api/toggle_task', task_body())),
+        ('update_task_score', lambda: ('POST', '/api/update_task_score',
+                                       dict(task_body(), score=rng.randrange(0, 101)))),
+    ]
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+def summarize(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': 1000 * percentile(latencies, 0.50),
+        'p95_ms': 1000 * percentile(latencies, 0.95),
+        'p99_ms': 1000 * percentile(latencies, 0.99),
+    }
+
+def progress_lines(user_id, plan, rng):
+    """NDJSON progress export for one benchmark user (see export_progress_lines)"""
+    for week, data in plan.items():
+        for day, day_data in data['days'].items():
+            done = rng.random() < 0.6
+            yield json.dumps({'type': 'day', 'user_id': user_id, 'week': week, 'day': day, 'completed': done,
+                              'completed_date': datetime.now().isoformat() if done else None,
+                              'notes': 'Practised prefix sums and two pointers. ' * rng.randrange(0, 4)})
+            for task_name in day_data['tasks']:
+                yield json.dumps({'type': 'task', 'user_id': user_id, 'week': week, 'day': day,
+                                  'task_name': task_name, 'completed': rng.random() < 0.5,
+                                  'score': rng.choice([None, 50, 80, 100])})
+
+def seed(app_module, rng):
+    """Create USERS benchmark users with progress on every day; return their names"""
+    app, db, User = app_module.app, app_module.db, app_module.User
+    with app.app_context():
+        db.create_all()
+        cleanup(app_module)
+        names = [f'{USER_PREFIX}{i}' for i in range(USERS)]
+        users = []
+        for name in names:
+            user = User(username=name)
+            user.set_password(PASSWORD)
+            db.session.add(user)
+            users.append(user)
+        db.session.commit()
+        lines = (line for user in users for line in progress_lines(user.id, TRAINING_PLAN, rng))
+        app_module.import_progress_lines(lines)
+    return names
+
+def cleanup(app_module):
+    db, User = app_module.db, app_module.User
+    ids = [user.id for user in User.query.filter(User.username.startswith(USER_PREFIX))]
+    for model in (app_module.DayProgress, app_module.TaskProgress, app_module.ProgressCounter):
+        model.query.filter(model.user_id.in_(ids)).delete(synchronize_session=False)
+    User.query.filter(User.id.in_(ids)).delete(synchronize_session=False)
+    db.session.commit()
+
+def run_test_client(app_module, names, rng):
+    """Drive each scenario sequentially through the Flask test client"""
+    results = {}
+    clients = []
+    for name in names:
+        client = app_module.app.test_client()
+        client.post('/login', data={'username': name, 'password': PASSWORD})
+        clients.append(client)
+
+    for scenario, make_request in scenarios(rng, TRAINING_PLAN):
+        latencies = []
+        started = time.perf_counter()
+        for i in range(WARMUP + REQUESTS):
+            method, path, body = make_request()
+            client = clients[i % len(clients)]
+            request_started = time.perf_counter()
+            response = client.open(path, method=method, json=body)
+            elapsed = time.perf_counter() - request_started
+            if response.status_code != 200:
+                raise RuntimeError(f'{method} {path} returned {response.status_code}')
+            if i == WARMUP - 1:
+                started = time.perf_counter()
+            elif i >= WARMUP:
+                latencies.append(elapsed)
+        results[scenario] = summarize(latencies, time.perf_counter() - started)
+    return results
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+class HttpClient:
+    """Keep-alive HTTP client holding one benchmark user's session cookie"""
+
+    def __init__(self, port, username):
+        self.connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        self.cookies = {}
+        self.request('POST', '/login', form={'username': username, 'password': PASSWORD})
+
+    def request(self, method, path, body=None, form=None):
+        headers = {}
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        payload = None
+        if body is not None:
+            payload = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        elif form is not None:
+            payload = urlencode(form)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        self.connection.request(method, path, body=payload, headers=headers)
+        response = self.connection.getresponse()
+        response.read()
+        for cookie in response.msg.get_all('Set-Cookie') or []:
+            key, _, value = cookie.split(';', 1)[0].partition('=')
+            self.cookies[key] = value
+        return response.status
+
+def start_gunicorn(database_url):
+    port = free_port()
+    env = dict(os.environ, DATABASE_URL=database_url, METRICS_DIR=tempfile.mkdtemp(prefix='bench-metrics-'))
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', '--workers', str(GUNICORN_WORKERS),
+         '--bind', f'127.0.0.1:{port}', '--log-level', 'warning', 'app:app'],
+        cwd=BASE_DIR, env=env)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('gunicorn exited during startup')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return process, port
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError('gunicorn did not start within 60s')
+
+def run_gunicorn(app_module, names, rng, database_url):
+    """Drive each scenario through gunicorn with CONCURRENCY keep-alive clients"""
+    process, port = start_gunicorn(database_url)
+    try:
+        clients = [HttpClient(port, names[i % len(names)]) for i in range(CONCURRENCY)]
+        results = {}
+        for scenario, make_request in scenarios(rng, TRAINING_PLAN):
+            # Build every request up front so the clients share no random state
+            requests = [make_request() for _ in range(WARMUP + REQUESTS)]
+            for method, path, body in requests[:WARMUP]:
+                clients[0].request(method, path, body)
+
+            queue = list(reversed(requests[WARMUP:]))
+            latencies = []
+            errors = []
+            lock = threading.Lock()
+
+            def worker(client):
+                while True:
+                    with lock:
+                        if not queue:
+                            return
+                        method, path, body = queue.pop()
+                    started = time.perf_counter()
+                    status = client.request(method, path, body)
+                    elapsed = time.perf_counter() - started
+                    with lock:
+                        latencies.append(elapsed)
+                        if status != 200:
+                            errors.append(f'{method} {path} returned {status}')
+
+            threads = [threading.Thread(target=worker, args=(client,)) for client in clients]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            if errors:
+                raise RuntimeError(errors[0])
+            results[scenario] = summarize(latencies, time.perf_counter() - started)
+        return results
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+def run_database(database, use_gunicorn):
+    """Benchmark one database in this process; return {backend/database/scenario: result}"""
+    workdir = None
+    if database == 'sqlite':
+        workdir = tempfile.mkdtemp(prefix='bench-')
+        database_url = f"sqlite:///{Path(workdir) / 'bench.db'}"
+    else:
+        database_url = database
+    os.environ['DATABASE_URL'] = database_url
+
+    import app as app_module
+
+    label = app_module.db.engine.dialect.name if database != 'sqlite' else 'sqlite'
+    rng = random.Random(SEED)
+    names = seed(app_module, rng)
+    results = {}
+    try:
+        backends = [('test_client', lambda: run_test_client(app_module, names, rng))]
+        if use_gunicorn:
+            backends.append(('gunicorn', lambda: run_gunicorn(app_module, names, rng, database_url)))
+        for backend, run in backends:
+            for scenario, result in run().items():
+                results[f'{backend}/{label}/{scenario}'] = result
+    finally:
+        if workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+        else:
+            with app_module.app.app_context():
+                cleanup(app_module)
+    return results
+
+def load_history():
+    if HISTORY_PATH.exists():
+        return json.loads(HISTORY_PATH.read_text())
+    return {'runs': []}
+
+def compare(results, previous):
+    """Print the routes whose throughput fell or p95 latency rose against the previous run"""
+    regressions = 0
+    for key, result in results.items():
+        before = previous['results'].get(key)
+        if not before:
+            continue
+        if result['throughput'] < before['throughput'] * (1 - REGRESSION_THRESHOLD):
+            change = 100 * (result['throughput'] / before['throughput'] - 1)
+            print(f"⚠️  {key}: throughput {change:+.0f}% vs {previous['label']}")
+            regressions += 1
+        if result['p95_ms'] > before['p95_ms'] * (1 + REGRESSION_THRESHOLD):
+            change = 100 * (result['p95_ms'] / before['p95_ms'] - 1)
+            print(f"⚠️  {key}: p95 latency {change:+.0f}% vs {previous['label']}")
+            regressions += 1
+    return regressions
+
+def print_results(results):
+    print(f"  {'route':42} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for key, result in results.items():
+        print(f"  {key:42} {result['throughput']:8.0f} {result['p50_ms']:8.2f} "
+              f"{result['p95_ms']:8.2f} {result['p99_ms']:8.2f}")
+
+def main(argv):
+    if argv[:1] == ['--run']:
+        # Child process: benchmark one database and print the results as JSON
+        print(json.dumps(run_database(argv[1], '--gunicorn' in argv)))
+        return
+
+    label = None
+    if '--save' in argv:
+        index = argv.index('--save')
+        if index + 1 >= len(argv):
+            print("❌ --save needs a release label")
+            sys.exit(1)
+        label = argv[index + 1]
+        argv = argv[:index] + argv[index + 2:]
+
+    use_gunicorn = '--gunicorn' in argv
+    if use_gunicorn:
+        try:
+            import gunicorn  # noqa: F401
+        except ImportError:
+            print("⚠️  gunicorn is not installed; only the test client is benchmarked")
+            use_gunicorn = False
+
+    databases = [argv[i + 1] for i, arg in enumerate(argv[:-1]) if arg == '--database'] or ['sqlite']
+    results = {}
+    for database in databases:
+        print(f"→ Benchmarking {database.split('@')[-1]}{' (test client + gunicorn)' if use_gunicorn else ''}")
+        child = subprocess.run([sys.executable, __file__, '--run', database] + (['--gunicorn'] if use_gunicorn else []),
+                               cwd=BASE_DIR, stdout=subprocess.PIPE, text=True)
+        if child.returncode != 0:
+            print(f"❌ Benchmark failed for {database.split('@')[-1]}")
+            sys.exit(1)
+        database_results = json.loads(child.stdout.strip().splitlines()[-1])
+        print_results(database_results)
+        results.update(database_results)
+
+    history = load_history()
+    if history['runs']:
+        regressions = compare(results, history['runs'][-1])
+        if not regressions:
+            print(f"✓ No regressions vs {history['runs'][-1]['label']}")
+    elif label is None:
+        # With no history there is nothing to compare against; keep this run
+        # as the baseline so the next one is checked
+        label = 'baseline'
+
+    if label:
+        history['runs'].append({
+            'label': label,
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python_version': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+            'results': results,
+        })
+        HISTORY_PATH.write_text(json.dumps(history, indent=2) + '\n')
+        print(f"✅ Recorded run {label} in {HISTORY_PATH.name}")
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
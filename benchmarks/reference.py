@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the reference solutions
+
+Times the pure-Python and NumPy reference solutions on every generated
+performance case and reports elements per second. Each run is compared
+with the last one recorded in reference_history.json. Tag a run with a
+release label to add it to the history; the first run on an empty history
+is recorded as the baseline.
+
+Usage:
+    python benchmarks/reference.py                  # run and compare with the last recorded run
+    python benchmarks/reference.py --save v1.4.0    # run and record it under a release label
+    python benchmarks/reference.py Peaks Flags      # only these tasks
+"""
+
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import generators
+import grader
+import reference_solutions as ref
+
+HISTORY_PATH = Path(__file__).parent / 'reference_history.json'
+REPEAT = 3
+# Throughput drops larger than this versus the last recorded run are flagged
+REGRESSION_THRESHOLD = 0.2
+
+def elements(dataset):
+    """Input size of a dataset: total array length, or 1 for scalar-only inputs"""
+    return sum(spec.get('length', 0) for spec in dataset.meta['args']) or 1
+
+def best_time(function, args_factory):
+    best = None
+    for _ in range(REPEAT):
+        args = args_factory()
+        started = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return max(best, 1e-9)
+
+def run(tasks):
+    """Benchmark every performance case of tasks; return {task/case: result}"""
+    results = {}
+    for name in tasks:
+        task = grader.TASKS[name]
+        fast = ref.vectorized(task.reference)
+        for case in generators.case_names(name):
+            dataset = generators.load(name, case)
+            args = dataset.args()
+            size = elements(dataset)
+            result = {'elements': size,
+                      'python': size / best_time(task.reference, lambda: grader._copy_args(args))}
+            if fast is not None:
+                result['numpy'] = size / best_time(fast, lambda: dataset.buffers)
+            results[f'{name}/{case}'] = result
+            speedup = f"  numpy x{result['numpy'] / result['python']:.1f}" if 'numpy' in result else ''
+            print(f"  {name}/{case}: {result['python'] / 1e6:.2f} M elements/s{speedup}")
+    return results
+
+def load_history():
+    if HISTORY_PATH.exists():
+        return json.loads(HISTORY_PATH.read_text())
+    return {'runs': []}
+
+def compare(results, previous):
+    """Print the cases whose throughput fell against the previous run"""
+    regressions = 0
+    for key, result in results.items():
+        before = previous['results'].get(key)
+        if not before:
+            continue
+        for kind in ('python', 'numpy'):
+            if kind in result and kind in before and result[kind] < before[kind] * (1 - REGRESSION_THRESHOLD):
+                change = 100 * (result[kind] / before[kind] - 1)
+                print(f"⚠️  {key} ({kind}): {change:+.0f}% vs {previous['label']}")
+                regressions += 1
+    return regressions
+
+def main(argv):
+    label = None
+    if '--save' in argv:
+        index = argv.index('--save')
+        if index + 1 >= len(argv):
+            print("❌ --save needs a release label")
+            sys.exit(1)
+        label = argv[index + 1]
+        argv = argv[:index] + argv[index + 2:]
+
+    tasks = argv or [name for name, task in grader.TASKS.items() if task.performance]
+    unknown = [name for name in tasks if name not in grader.TASKS]
+    if unknown:
+        print(f"❌ Unknown task(s): {', '.join(unknown)}")
+        sys.exit(1)
+
+    print(f"→ Benchmarking reference solutions (numpy: {'yes' if ref.np is not None else 'no'})")
+    results = run(tasks)
+
+    history = load_history()
+    if history['runs']:
+        regressions = compare(results, history['runs'][-1])
+        if not regressions:
+            print(f"✓ No regressions vs {history['runs'][-1]['label']}")
+    elif label is None:
+        # With no history there is nothing to compare against; keep this run
+        # as the baseline so the next one is checked
+        label = 'baseline'
+
+    if label:
+        history['runs'].append({
+            'label': label,
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python_version': platform.python_version(),
+            'numpy_version': ref.np.__version__ if ref.np is not None else None,
+            'results': results,
+        })
+        HISTORY_PATH.write_text(json.dumps(history, indent=2) + '\n')
+        print(f"✅ Recorded run {label} in {HISTORY_PATH.name}")
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,353 @@
+"""Empirical time-complexity estimator for submitted Python solutions.
+
+The solution runs on geometrically growing inputs (doubling n) in a single
+subprocess with a CPU budget. Each size is timed and written back as soon
+as it is measured, and the run stops early when the next size would not
+fit in the remaining budget. The timings are then fitted against the
+usual complexity classes and the best fit is reported with a confidence.
+
+Like the grader, this bounds resource use but is not a security sandbox.
+"""
+
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import namedtuple
+
+import grader
+from generators import dense_peaks, nested_brackets
+from grader import _copy_args, _ints, _odd_occurrences, _permutation
+
+DEFAULT_BUDGET = float(os.environ.get('COMPLEXITY_BUDGET', 10))
+MAX_BUDGET = 20.0
+# Wall clock allowed for the measuring process: the CPU budget plus slack
+# for process start-up and input generation. /api/complexity waits for it
+# inside a request, so gunicorn.conf.py keeps the worker timeout above this
+MAX_WALL_SECONDS = MAX_BUDGET * 1.5 + 10
+MIN_POINTS = 4
+# Calls faster than this are repeated in batches to beat timer noise
+MIN_BATCH_SECONDS = 0.02
+MAX_BATCH_CALLS = 100000
+BATCHES = 3
+# Relative timing noise assumed when the repeat spread was not measured,
+# so a handful of lucky points cannot produce certainty
+NOISE_FLOOR = 0.01
+# Smallest noise variance taken from measured spreads
+MIN_NOISE = 0.0001
+# Expected range of BATCHES normal samples, in standard deviations
+BATCH_RANGE_SIGMAS = 1.69
+# Adjacent classes are told apart only when the slower growing one's
+# error exceeds the best fit's by more than SEPARATION times the sum of
+# its error on a noiseless curve of the best fitting class, the best
+# fit's own error and BATCHES times the noise variance. Tuned so that linear
+# references with cache drift and sort-based references both land on the
+# right side.
+SEPARATION = 0.5
+# Growth models explaining less than this share of the largest timing
+# are treated as constant time
+MIN_GROWTH_SHARE = 0.1
+
+# (name, f(n)) in order of growth. O(sqrt n) is included for the prime and
+# divisor lessons, where it is the expected answer.
+MODELS = [
+    ('O(1)', lambda n: 1.0),
+    ('O(log n)', lambda n: math.log2(n)),
+    ('O(sqrt n)', lambda n: math.sqrt(n)),
+    ('O(n)', lambda n: float(n)),
+    ('O(n log n)', lambda n: n * math.log2(n)),
+    ('O(n^2)', lambda n: float(n) * n),
+]
+
+Scaling = namedtuple('Scaling', ['build', 'start', 'stop'])
+
+def _dominated(rng, n):
+    return [5] * (n // 2 + 1) + _ints(rng, n - n // 2 - 1, 0, 4)
+
+def _queries(rng, n, count):
+    return tuple(list(x) for x in zip(*[sorted((rng.randrange(n), rng.randrange(n))) for _ in range(count)]))
+
+# build(rng, n) returns the arguments for a problem of size n. For tasks
+# taking a single number, n is that number. Tasks whose running time does
+# not grow smoothly with any one input (MinPerimeterRectangle,
+# ChocolatesByNumbers) have no entry.
+SCALING = {
+    'BinaryGap': Scaling(lambda rng, n: (n - 1,), 16, 2 ** 31),
+    'OddOccurrencesInArray': Scaling(lambda rng, n: (_odd_occurrences(rng, n),), 256, 2 ** 17),
+    'CyclicRotation': Scaling(lambda rng, n: (_ints(rng, n, -1000, 1000), n // 3), 256, 2 ** 17),
+    'TapeEquilibrium': Scaling(lambda rng, n: (_ints(rng, n, -1000, 1000),), 256, 2 ** 17),
+    'PermMissingElem': Scaling(lambda rng, n: (_permutation(rng, n + 1)[:-1],), 256, 2 ** 17),
+    'PermCheck': Scaling(lambda rng, n: (_permutation(rng, n),), 256, 2 ** 17),
+    'FrogJmp': Scaling(lambda rng, n: (1, n, 3), 16, 2 ** 30),
+    'MissingInteger': Scaling(lambda rng, n: (_permutation(rng, n),), 256, 2 ** 17),
+    'FrogRiverOne': Scaling(lambda rng, n: (n, _permutation(rng, n)), 256, 2 ** 17),
+    'GenomicRangeQuery': Scaling(lambda rng, n: (''.join(rng.choice('ACGT') for _ in range(n)),)
+                                 + _queries(rng, n, n // 2), 256, 2 ** 17),
+    'Distinct': Scaling(lambda rng, n: (_ints(rng, n, -1000000, 1000000),), 256, 2 ** 17),
+    'MaxProductOfThree': Scaling(lambda rng, n: (_ints(rng, n, -1000, 1000),), 256, 2 ** 17),
+    'Triangle': Scaling(lambda rng, n: (_ints(rng, n, -2147483648, 2147483647),), 256, 2 ** 17),
+    'TieRopes': Scaling(lambda rng, n: (1000, _ints(rng, n, 1, 1000000000)), 256, 2 ** 17),
+    'CountDiv': Scaling(lambda rng, n: (0, n, 7), 16, 2 ** 30),
+    # Past ~2**15 random cars exceed 1e9 passing pairs and the answer is -1
+    'PassingCars': Scaling(lambda rng, n: (_ints(rng, n, 0, 1),), 256, 2 ** 15),
+    'Brackets': Scaling(lambda rng, n: (''.join(nested_brackets(rng, n // 2)),), 256, 2 ** 17),
+    'Fish': Scaling(lambda rng, n: (_permutation(rng, n), _ints(rng, n, 0, 1)), 256, 2 ** 17),
+    'StoneWall': Scaling(lambda rng, n: (_ints(rng, n, 1, 1000000000),), 256, 2 ** 17),
+    'Dominator': Scaling(lambda rng, n: (_dominated(rng, n),), 256, 2 ** 17),
+    'EquiLeader': Scaling(lambda rng, n: (_dominated(rng, n),), 256, 2 ** 17),
+    'MaxSliceSum': Scaling(lambda rng, n: (_ints(rng, n, -1000000, 1000000),), 256, 2 ** 17),
+    'MaxProfit': Scaling(lambda rng, n: (_ints(rng, n, 0, 200000),), 256, 2 ** 17),
+    'MaxDoubleSliceSum': Scaling(lambda rng, n: (_ints(rng, n, -10000, 10000),), 256, 2 ** 17),
+    'NumberSolitaire': Scaling(lambda rng, n: (_ints(rng, n, -10000, 10000),), 256, 2 ** 17),
+    'MinMaxDivision': Scaling(lambda rng, n: (n // 100 + 1, 10000, _ints(rng, n, 0, 10000)), 256, 2 ** 17),
+    'CountFactors': Scaling(lambda rng, n: (math.isqrt(n) ** 2,), 256, 2 ** 31),
+    'CountSemiprimes': Scaling(lambda rng, n: (n,) + tuple([q + 1 for q in x] for x in _queries(rng, n, n // 2)),
+                               256, 2 ** 17),
+    'Peaks': Scaling(lambda rng, n: (list(dense_peaks(rng, n)),), 256, 2 ** 17),
+    'Flags': Scaling(lambda rng, n: (list(dense_peaks(rng, n)),), 256, 2 ** 17),
+}
+
+def _time_batch(solution, args, calls):
+    # Fresh copies in case the solution mutates its input lists
+    if any(isinstance(a, list) for a in args):
+        copies = [_copy_args(args) for _ in range(calls)]
+    else:
+        copies = [args] * calls
+    started = time.process_time()
+    for copy in copies:
+        solution(*copy)
+    return time.process_time() - started
+
+def time_call(solution, args, calls=1):
+    """Return (CPU seconds per call of solution(*args), calls per batch, spread).
+
+    Fast calls are repeated in batches. Pass the previous batch size back
+    in so that the loop overhead stays the same from one size to the next.
+    The call is timed BATCHES times when that is cheap, and spread is the
+    relative range of those timings, (slowest - fastest) / fastest; it is
+    None for calls too slow to repeat.
+    """
+    while True:
+        elapsed = _time_batch(solution, args, calls)
+        if elapsed < MIN_BATCH_SECONDS and calls < MAX_BATCH_CALLS:
+            calls *= 10 if elapsed < MIN_BATCH_SECONDS / 10 else 2
+        elif elapsed > 10 * MIN_BATCH_SECONDS and calls > 1:
+            calls = max(1, calls // 10)
+        else:
+            break
+    if calls == 1 and elapsed > 10 * MIN_BATCH_SECONDS:
+        return elapsed, calls, None
+    timings = [elapsed] + [_time_batch(solution, args, calls) for _ in range(BATCHES - 1)]
+    best = max(min(timings), 1e-9)
+    return best / calls, calls, (max(timings) - best) / best
+
+def measure(spec, emit):
+    """Time the solution on doubling sizes, calling emit() for each result.
+
+    Runs inside the measuring subprocess; see estimate.
+    """
+    scaling = SCALING[spec['task']]
+    budget = spec['budget']
+    grader._limit_resources(budget, spec['memory_mb'])
+    started = time.process_time()
+
+    try:
+        solution = grader.load_solution(spec['code'])
+    except Exception as e:
+        emit({'stopped': 'error', 'message': f'{type(e).__name__}: {e}'})
+        return
+
+    rng = random.Random(f"{spec['task']}:complexity")
+    n = scaling.start
+    previous = None
+    calls = 1
+    while n <= scaling.stop:
+        step_started = time.process_time()
+        args = scaling.build(rng, n)
+        try:
+            seconds, calls, spread = time_call(solution, args, calls)
+        except grader.CpuLimitExceeded:
+            emit({'stopped': 'budget'})
+            return
+        except MemoryError:
+            emit({'stopped': 'memory_error'})
+            return
+        except Exception as e:
+            emit({'stopped': 'error', 'message': f'{type(e).__name__}: {e}'})
+            return
+        emit({'n': n, 'seconds': seconds, 'spread': spread})
+
+        # The next size costs at least twice as much, more if the solution
+        # is growing faster than linearly
+        now = time.process_time()
+        growth = max(2.0, seconds / previous) if previous else 2.0
+        if now - started + (now - step_started) * growth > budget:
+            emit({'stopped': 'budget'})
+            return
+        previous = max(seconds, 1e-9)
+        n *= 2
+    emit({'stopped': 'max_size'})
+
+def _fit_model(points, f):
+    """Fit seconds ~ a + c*f(n) with a, c >= 0, minimising relative error.
+
+    Returns (mean squared relative error, share of the largest measured
+    time explained by the growth term c*f(n)).
+    """
+    rows = [(1.0 / t, f(n) / t) for n, t in points]
+    candidates = []
+
+    # Unconstrained least squares on the relative residuals
+    s11 = sum(x * x for x, _ in rows)
+    s12 = sum(x * y for x, y in rows)
+    s22 = sum(y * y for _, y in rows)
+    b1 = sum(x for x, _ in rows)
+    b2 = sum(y for _, y in rows)
+    det = s11 * s22 - s12 * s12
+    if det > 0:
+        a = (b1 * s22 - b2 * s12) / det
+        c = (b2 * s11 - b1 * s12) / det
+        if a >= 0 and c >= 0:
+            candidates.append((a, c))
+    # Boundary fits with only the constant or only the growth term
+    candidates.append((b1 / s11, 0.0))
+    candidates.append((0.0, b2 / s22))
+
+    error, a, c = min((sum((a * x + c * y - 1) ** 2 for x, y in rows) / len(rows), a, c) for a, c in candidates)
+    n, t = max(points)
+    return error, c * f(n) / t
+
+def noise_variance(measurements):
+    """Relative timing noise variance estimated from the repeat spreads.
+
+    Falls back to NOISE_FLOOR when no measurement was repeated.
+    """
+    spreads = [m['spread'] for m in measurements if m.get('spread') is not None]
+    if not spreads:
+        return NOISE_FLOOR
+    return max(sum((spread / BATCH_RANGE_SIGMAS) ** 2 for spread in spreads) / len(spreads), MIN_NOISE)
+
+def _shape_error(points, lower, higher):
+    """Error of model lower on a noiseless curve of model higher"""
+    return _fit_model([(n, higher(n)) for n, _ in points], lower)[0]
+
+def fit(measurements):
+    """Pick the complexity class that best explains (n, seconds) measurements.
+
+    Returns (name, confidence, {name: error}, alternative) where
+    confidence in [0, 1] is the model's share of the likelihood under
+    Gaussian relative noise. name is None if there are too few
+    measurements.
+
+    The noise is the variance measured across repeated batches, or the
+    best fit's own error when no model explains the timings that well.
+    Misfit beyond the measured noise is systematic, so it counts as
+    evidence only once rather than once per point.
+
+    O(n) and O(n log n) differ by only a small factor over the measured
+    sizes, and cache misses on large inputs make linear solutions that
+    jump around memory drift towards O(n log n). The next slower growing
+    class is only ruled out when it misfits by clearly more than the best
+    fit (see SEPARATION); otherwise the slower class is reported, the
+    best fit becomes the alternative and confidence is capped at one half.
+    """
+    points = [(m['n'], max(m['seconds'], 1e-9)) for m in measurements]
+    if len(points) < MIN_POINTS:
+        return None, 0.0, {}, None
+
+    errors = {}
+    for name, f in MODELS:
+        error, growth_share = _fit_model(points, f)
+        # A fit whose growth term barely contributes is O(1) in disguise
+        if name == 'O(1)' or growth_share >= MIN_GROWTH_SHARE:
+            errors[name] = error
+    best = min(errors, key=errors.get)
+    variance = noise_variance(measurements)
+    noise = max(errors[best], variance)
+    independent = len(points) * min(1.0, variance / max(errors[best], 1e-12))
+    weights = {name: math.exp(-max(independent, 1.0) * (error - errors[best]) / (2 * noise))
+               for name, error in errors.items()}
+    total = sum(weights.values())
+    rounded = {name: round(error, 6) for name, error in errors.items()}
+
+    functions = dict(MODELS)
+    names = [name for name, _ in MODELS]
+    index = names.index(best)
+    lower = names[index - 1] if index else None
+    if lower in errors:
+        shape = _shape_error(points, functions[lower], functions[best])
+        allowance = SEPARATION * (shape + errors[best] + BATCHES * variance)
+        if errors[lower] - errors[best] <= allowance:
+            confidence = min((weights[lower] + weights[best]) / total, 1.0) / 2
+            return lower, round(confidence, 3), rounded, best
+    return best, round(weights[best] / total, 3), rounded, None
+
+def estimate(task_name, code, budget=DEFAULT_BUDGET, memory_mb=grader.MEMORY_LIMIT_MB):
+    """Measure code on growing inputs for task_name and fit its complexity.
+
+    Returns a report with the detected complexity, its confidence, the
+    class it could not be told apart from (alternative, or None), the
+    raw measurements and why measuring stopped ('max_size', 'budget',
+    'timeout', 'memory_error' or 'error').
+    """
+    report = {'task': task_name, 'complexity': None, 'confidence': 0.0, 'measurements': [], 'stopped': None}
+    if task_name not in SCALING:
+        report['error'] = f'No scaling inputs for {task_name}'
+        return report
+    error = grader.check_code(code)
+    if error:
+        report['error'] = error
+        return report
+
+    budget = min(max(float(budget), 0.5), MAX_BUDGET)
+    spec = {'task': task_name, 'code': code, 'budget': budget, 'memory_mb': memory_mb}
+    try:
+        completed = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--measure'],
+            input=json.dumps(spec), capture_output=True, text=True, timeout=budget * 1.5 + 10,
+        )
+        output = completed.stdout
+    except subprocess.TimeoutExpired as e:
+        output = e.stdout or ''
+        if isinstance(output, bytes):
+            output = output.decode()
+        report['stopped'] = 'timeout'
+
+    # Whatever was measured before the process stopped still counts
+    for line in output.splitlines():
+        try:
+            item = json.loads(line)
+        except ValueError:
+            continue
+        if 'n' in item:
+            report['measurements'].append(item)
+        elif 'stopped' in item:
+            report['stopped'] = item['stopped']
+            if 'message' in item:
+                report['error'] = item['message']
+    if report['stopped'] is None:
+        # Killed by the hard CPU or memory limit mid-measurement
+        report['stopped'] = 'budget'
+
+    complexity, confidence, errors, alternative = fit(report['measurements'])
+    report.update(complexity=complexity, confidence=confidence, fit_errors=errors, alternative=alternative)
+    return report
+
+def _main():
+    """Subprocess entry point: read a spec on stdin, print one JSON line per result"""
+    spec = json.loads(sys.stdin.read())
+    out = sys.stdout
+    # Keep prints in the submission from corrupting the result lines
+    sys.stdout = open(os.devnull, 'w')
+
+    def emit(item):
+        out.write(json.dumps(item) + '\n')
+        out.flush()
+
+    measure(spec, emit)
+
+if __name__ == '__main__' and sys.argv[1:] == ['--measure']:
+    _main()
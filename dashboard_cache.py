@@ -0,0 +1,60 @@
+"""Per-user cache of serialized /api/dashboard snapshots.
+
+A snapshot is the JSON body of one user's dashboard together with its
+ETag, stored under the user's progress revision: a counter every progress
+write bumps in the same transaction, shared by all workers through the
+database. A snapshot is served only while the revision it was built at
+is still current, so checking it costs one primary-key read and a write
+in any worker retires every worker's copy.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+
+Snapshot = namedtuple('Snapshot', ['revision', 'etag', 'body'])
+
+def snapshot_etag(body):
+    return hashlib.sha256(body).hexdigest()[:32]
+
+class DashboardSnapshotCache:
+    """LRU map of user id -> Snapshot"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, user_id, revision):
+        """The user's snapshot if it was built at revision, else None"""
+        with self._lock:
+            snapshot = self._entries.get(user_id)
+            if snapshot is None or snapshot.revision != revision:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return snapshot
+
+    def put(self, user_id, revision, body):
+        """Store body (bytes) as the snapshot for revision and return it"""
+        snapshot = Snapshot(revision, snapshot_etag(body), body)
+        with self._lock:
+            self._entries[user_id] = snapshot
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return snapshot
+
+    def invalidate(self, user_id=None):
+        with self._lock:
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Large-input generators for the Codility tasks in the training plan
+
+Every task has named worst-case, random and adversarial cases sized at
+Codility's own limits (N = 100,000 to 1,000,000). Cases are deterministic
+from (task, case, n, seed). Array arguments are produced as lazy streams
+and written in chunks to compact binary files under the cache directory,
+so no case ever exists as a Python list until a solution needs one.
+Later runs memory-map the cached files instead of regenerating them.
+
+Usage:
+    python generators.py [task ...]   # pre-generate every case (or just these tasks)
+"""
+
+import json
+import mmap
+import os
+import random
+import shutil
+import sys
+from array import array
+from collections import namedtuple
+from itertools import chain, islice, repeat
+from pathlib import Path
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BASE_DIR = Path(__file__).parent
+CACHE_DIR = Path(os.environ.get('GENERATOR_CACHE_DIR', BASE_DIR / 'build' / 'generated'))
+# Bump when a generator changes so stale cached datasets are not reused
+GENERATOR_VERSION = 1
+CHUNK = 65536
+
+# A lazily generated array argument. typecode is an array module typecode;
+# text columns hold ASCII codes and are passed to solutions as a str.
+Column = namedtuple('Column', ['typecode', 'values', 'text'])
+Case = namedtuple('Case', ['name', 'n', 'build'])
+
+def column(values, typecode='i'):
+    return Column(typecode, values, False)
+
+def text(chars):
+    return Column('B', (ord(c) for c in chars), True)
+
+# Lazy value streams. Each takes the case's random.Random first.
+
+def uniform(rng, n, low, high):
+    span = high - low + 1
+    return (low + rng.randrange(span) for _ in range(n))
+
+def permutation(rng, n, start=1):
+    """1..n (or start..start+n-1) in random order, shuffled in a compact array"""
+    values = array('i', range(start, start + n))
+    rng.shuffle(values)
+    return values
+
+def alternating(n, first=0, second=1):
+    return islice(chain.from_iterable(repeat((first, second))), n)
+
+def increasing(n, start=1):
+    return iter(range(start, start + n))
+
+def decreasing(n, start=None):
+    start = n if start is None else start
+    return iter(range(start, start - n, -1))
+
+def dense_peaks(rng, n):
+    """A peak at every odd index: the worst case for Peaks and Flags"""
+    return (rng.randrange(1000000, 1000000001) if i % 2 else rng.randrange(4) for i in range(n))
+
+def sparse_peaks(rng, n, gap=1000):
+    return (1000000000 if i % gap == gap // 2 else rng.randrange(1000) for i in range(n))
+
+def shuffled(rng, values):
+    values = array('i', values)
+    rng.shuffle(values)
+    return values
+
+def odd_occurrences(rng, n):
+    """n values (n odd) where every value but one appears an even number of times"""
+    pairs = array('i', uniform(rng, n // 2, 1, 1000000000))
+    return shuffled(rng, chain(pairs, pairs, [rng.randrange(1, 1000000001)]))
+
+def dominated(rng, n, value=7, share=0.5):
+    """n values where value fills just over share of the positions"""
+    count = int(n * share) + 1
+    return shuffled(rng, chain(repeat(value, count), uniform(rng, n - count, 0, 6)))
+
+def nested_brackets(rng, depth):
+    closing = {'(': ')', '[': ']', '{': '}'}
+    opening = [rng.choice('([{') for _ in range(depth)]
+    return chain(opening, (closing[c] for c in reversed(opening)))
+
+def range_queries(rng, n, m):
+    """(P, Q) columns of m random ranges 0 <= P[k] <= Q[k] < n"""
+    bounds = [sorted((rng.randrange(n), rng.randrange(n))) for _ in range(m)]
+    return column(p for p, _ in bounds), column(q for _, q in bounds)
+
+def _cases(*cases):
+    return {case.name: case for case in cases}
+
+# task -> {case name: Case}. build(rng, n) returns the argument tuple, with
+# ints passed through and array arguments as Columns. n is the case's main
+# size; for tasks taking only numbers it is the largest value involved.
+CASES = {
+    'BinaryGap': _cases(
+        Case('max_int', 2147483647, lambda rng, n: (n,)),
+        Case('one_long_gap', 2 ** 30 + 1, lambda rng, n: (n,)),
+        Case('alternating_bits', 0b1010101010101010101010101010101, lambda rng, n: (n,)),
+    ),
+    'OddOccurrencesInArray': _cases(
+        Case('random', 999999, lambda rng, n: (column(odd_occurrences(rng, n)),)),
+        Case('one_value', 999999, lambda rng, n: (column(repeat(42, n)),)),
+    ),
+    'CyclicRotation': _cases(
+        Case('random', 100000, lambda rng, n: (column(uniform(rng, n, -1000, 1000)), rng.randrange(n + 1))),
+        Case('full_rotation', 100000, lambda rng, n: (column(uniform(rng, n, -1000, 1000)), n)),
+    ),
+    'TapeEquilibrium': _cases(
+        Case('random', 100000, lambda rng, n: (column(uniform(rng, n, -1000, 1000)),)),
+        Case('all_ones', 100000, lambda rng, n: (column(repeat(1, n)),)),
+        Case('negative_then_positive', 100000,
+             lambda rng, n: (column(chain(repeat(-1000, n // 2), repeat(1000, n - n // 2))),)),
+    ),
+    'PermMissingElem': _cases(
+        Case('random', 100000, lambda rng, n: (column(islice(permutation(rng, n + 1), n)),)),
+        Case('missing_last', 100000, lambda rng, n: (column(increasing(n)),)),
+        Case('missing_first', 100000, lambda rng, n: (column(decreasing(n, n + 1)),)),
+    ),
+    'PermCheck': _cases(
+        Case('permutation', 100000, lambda rng, n: (column(permutation(rng, n)),)),
+        Case('duplicate_at_end', 100000, lambda rng, n: (column(chain(permutation(rng, n - 1), [1])),)),
+        Case('big_values', 100000, lambda rng, n: (column(uniform(rng, n, 1, 1000000000)),)),
+    ),
+    'FrogJmp': _cases(
+        Case('big_distance_small_jump', 1000000000, lambda rng, n: (1, n, 1)),
+        Case('exact_multiple', 1000000000, lambda rng, n: (10, n, 10)),
+    ),
+    'MissingInteger': _cases(
+        Case('permutation', 100000, lambda rng, n: (column(permutation(rng, n)),)),
+        Case('random', 100000, lambda rng, n: (column(uniform(rng, n, -1000000, 1000000)),)),
+        Case('all_negative', 100000, lambda rng, n: (column(uniform(rng, n, -1000000, -1)),)),
+    ),
+    'FrogRiverOne': _cases(
+        Case('permutation', 100000, lambda rng, n: (n, column(permutation(rng, n)))),
+        Case('last_leaf_at_end', 100000,
+             lambda rng, n: (n, column(chain(uniform(rng, n - 1, 1, n - 1), [n])))),
+        Case('never_covered', 100000, lambda rng, n: (n, column(uniform(rng, n, 1, n - 1)))),
+    ),
+    'GenomicRangeQuery': _cases(
+        Case('random', 100000, lambda rng, n: (text(rng.choice('ACGT') for _ in range(n)),)
+             + range_queries(rng, n, 50000)),
+        Case('all_t_full_ranges', 100000,
+             lambda rng, n: (text(repeat('T', n)), column(repeat(0, 50000)), column(repeat(n - 1, 50000)))),
+    ),
+    'Distinct': _cases(
+        Case('random', 100000, lambda rng, n: (column(uniform(rng, n, -1000000, 1000000)),)),
+        Case('all_distinct', 100000, lambda rng, n: (column(permutation(rng, n, -n // 2)),)),
+        Case('all_equal', 100000, lambda rng, n: (column(repeat(-1000000, n)),)),
+    ),
+    'MaxProductOfThree': _cases(
+        Case('random', 100000, lambda rng, n: (column(uniform(rng, n, -1000, 1000)),)),
+        Case('two_big_negatives', 100000,
+             lambda rng, n: (column(chain([-1000, -1000], uniform(rng, n - 2, -10, 10))),)),
+    ),
+    'Triangle': _cases(
+        Case('random', 100000, lambda rng, n: (column(uniform(rng, n, -2147483648, 2147483647)),)),
+        Case('max_values', 100000, lambda rng, n: (column(repeat(2147483647, n)),)),
+        # Fibonacci-like lengths never form a triangle
+        Case('no_triangle', 100000,
+             lambda rng, n: (column(chain([1, 1, 2, 3, 5, 8, 13, 21, 34, 55], repeat(-1, n - 10))),)),
+    ),
+    'TieRopes': _cases(
+        Case('random', 100000, lambda rng, n: (1000, column(uniform(rng, n, 1, 1000000000)))),
+        Case('many_small_ropes', 100000, lambda rng, n: (1000000000, column(repeat(1, n)))),
+    ),
+    'CountDiv': _cases(
+        Case('full_range', 2000000000, lambda rng, n: (0, n, 1)),
+        Case('big_k', 2000000000, lambda rng, n: (101, n, 2000000000)),
+    ),
+    'PassingCars': _cases(
+        Case('alternating', 100000, lambda rng, n: (column(alternating(n), 'b'),)),
+        Case('random', 100000, lambda rng, n: (column(uniform(rng, n, 0, 1), 'b'),)),
+        Case('east_then_west', 100000, lambda rng, n: (column(chain(repeat(0, n // 2), repeat(1, n - n // 2)), 'b'),)),
+    ),
+    'Brackets': _cases(
+        Case('deep_nesting', 200000, lambda rng, n: (text(nested_brackets(rng, n // 2)),)),
+        Case('open_only', 200000, lambda rng, n: (text(repeat('(', n)),)),
+        Case('unbalanced_at_end', 200000, lambda rng, n: (text(chain(nested_brackets(rng, n // 2 - 1), ')(')),)),
+    ),
+    'Fish': _cases(
+        Case('random', 100000,
+             lambda rng, n: (column(permutation(rng, n)), column(uniform(rng, n, 0, 1), 'b'))),
+        Case('downstream_then_big_upstream', 100000,
+             lambda rng, n: (column(increasing(n)), column(chain(repeat(1, n - 1), [0]), 'b'))),
+        Case('alternating', 100000,
+             lambda rng, n: (column(permutation(rng, n)), column(alternating(n, 1, 0), 'b'))),
+    ),
+    'StoneWall': _cases(
+        Case('monotone_increasing', 100000, lambda rng, n: (column(increasing(n)),)),
+        Case('monotone_decreasing', 100000, lambda rng, n: (column(decreasing(n)),)),
+        Case('pyramid', 100000, lambda rng, n: (column(chain(increasing(n // 2), decreasing(n - n // 2))),)),
+        Case('random', 100000, lambda rng, n: (column(uniform(rng, n, 1, 100000000)),)),
+    ),
+    'Dominator': _cases(
+        Case('dominated', 100000, lambda rng, n: (column(dominated(rng, n)),)),
+        Case('almost_dominated', 100000, lambda rng, n: (column(shuffled(rng, chain(repeat(7, n // 2), uniform(rng, n - n // 2, 0, 6)))),)),
+        Case('random', 100000, lambda rng, n: (column(uniform(rng, n, -2147483648, 2147483647)),)),
+    ),
+    'EquiLeader': _cases(
+        Case('strong_leader', 100000, lambda rng, n: (column(dominated(rng, n, share=0.6)),)),
+        Case('random_bits', 100000, lambda rng, n: (column(uniform(rng, n, 0, 1)),)),
+    ),
+    'MaxSliceSum': _cases(
+        Case('random', 1000000, lambda rng, n: (column(uniform(rng, n, -1000000, 1000000)),)),
+        Case('all_negative', 1000000, lambda rng, n: (column(uniform(rng, n, -1000000, -1)),)),
+    ),
+    'MaxProfit': _cases(
+        Case('random', 400000, lambda rng, n: (column(uniform(rng, n, 0, 200000)),)),
+        Case('decreasing', 400000, lambda rng, n: (column(decreasing(n, 200000 + n)),)),
+    ),
+    'MaxDoubleSliceSum': _cases(
+        Case('random', 100000, lambda rng, n: (column(uniform(rng, n, -10000, 10000)),)),
+        Case('all_negative', 100000, lambda rng, n: (column(uniform(rng, n, -10000, -1)),)),
+    ),
+    'NumberSolitaire': _cases(
+        Case('random', 100000, lambda rng, n: (column(uniform(rng, n, -10000, 10000)),)),
+        Case('all_negative', 100000, lambda rng, n: (column(uniform(rng, n, -10000, -1)),)),
+    ),
+    'MinMaxDivision': _cases(
+        Case('random', 100000, lambda rng, n: (rng.randrange(1, n + 1), 10000, column(uniform(rng, n, 0, 10000)))),
+        Case('one_block_all_max', 100000, lambda rng, n: (1, 10000, column(repeat(10000, n)))),
+    ),
+    'CountFactors': _cases(
+        Case('large_square', 46340 ** 2, lambda rng, n: (n,)),
+        Case('max_int', 2147483647, lambda rng, n: (n,)),
+    ),
+    'CountSemiprimes': _cases(
+        Case('random_queries', 50000, lambda rng, n: (n,) + tuple(
+            column(v + 1 for v in c.values) for c in range_queries(rng, n, 30000))),
+        Case('full_range_queries', 50000,
+             lambda rng, n: (n, column(repeat(1, 30000)), column(repeat(n, 30000)))),
+    ),
+    'Peaks': _cases(
+        Case('dense_peaks', 100000, lambda rng, n: (column(dense_peaks(rng, n)),)),
+        Case('random', 100000, lambda rng, n: (column(uniform(rng, n, 0, 1000000000)),)),
+        Case('prime_length_one_peak', 99991, lambda rng, n: (column(chain([0, 1], repeat(0, n - 2))),)),
+    ),
+    'Flags': _cases(
+        Case('dense_peaks', 400000, lambda rng, n: (column(dense_peaks(rng, n)),)),
+        Case('sparse_peaks', 400000, lambda rng, n: (column(sparse_peaks(rng, n)),)),
+        Case('random', 400000, lambda rng, n: (column(uniform(rng, n, 0, 1000000000)),)),
+    ),
+    'MinPerimeterRectangle': _cases(
+        Case('large_prime', 982451653, lambda rng, n: (n,)),
+        Case('large_square', 31622 ** 2, lambda rng, n: (n,)),
+    ),
+    'ChocolatesByNumbers': _cases(
+        Case('large_coprime', 1000000000, lambda rng, n: (n, n - 1)),
+        Case('large_equal', 1000000000, lambda rng, n: (n, n)),
+    ),
+}
+
+class Dataset:
+    """A generated case loaded from the disk cache.
+
+    buffers holds ints and read-only memory-mapped arrays (numpy.memmap
+    when NumPy is installed, otherwise memoryviews).
+    """
+
+    def __init__(self, path, meta, buffers):
+        self.path = path
+        self.meta = meta
+        self.buffers = buffers
+
+    def args(self):
+        """The arguments as the ints, lists and strs a solution expects"""
+        args = []
+        for spec, buffer in zip(self.meta['args'], self.buffers):
+            if spec['kind'] == 'int':
+                args.append(buffer)
+            elif spec['text']:
+                args.append(bytes(buffer).decode('ascii'))
+            else:
+                args.append(buffer.tolist())
+        return tuple(args)
+
+def dataset_path(task, case, n, seed, cache_dir=CACHE_DIR):
+    return Path(cache_dir) / task / f'{case}-n{n}-s{seed}-v{GENERATOR_VERSION}'
+
+def _write_column(path, col):
+    """Stream a Column to path in CHUNK-sized pieces. Returns its length."""
+    length = 0
+    with open(path, 'wb') as f:
+        values = iter(col.values)
+        while True:
+            chunk = array(col.typecode, islice(values, CHUNK))
+            if not chunk:
+                break
+            chunk.tofile(f)
+            length += len(chunk)
+    return length
+
+def generate(task, case, n=None, seed=1, cache_dir=CACHE_DIR):
+    """Generate a case into the cache (if missing) and return its directory"""
+    spec = CASES[task][case]
+    n = spec.n if n is None else n
+    path = dataset_path(task, case, n, seed, cache_dir)
+    if (path / 'meta.json').exists():
+        return path
+
+    rng = random.Random(f'{task}:{case}:{n}:{seed}')
+    tmp_path = path.with_name(f'{path.name}.tmp{os.getpid()}')
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    tmp_path.mkdir(parents=True)
+
+    args = []
+    for i, arg in enumerate(spec.build(rng, n)):
+        if isinstance(arg, Column):
+            length = _write_column(tmp_path / f'arg{i}.bin', arg)
+            args.append({'kind': 'array', 'typecode': arg.typecode, 'text': arg.text, 'length': length})
+        else:
+            args.append({'kind': 'int', 'value': arg})
+    meta = {'task': task, 'case': case, 'n': n, 'seed': seed, 'version': GENERATOR_VERSION, 'args': args}
+    (tmp_path / 'meta.json').write_text(json.dumps(meta))
+
+    try:
+        os.rename(tmp_path, path)
+    except OSError:
+        # Another process generated the same case first
+        shutil.rmtree(tmp_path, ignore_errors=True)
+    return path
+
+def _map_array(path, spec):
+    if spec['length'] == 0:
+        return array(spec['typecode'])
+    if numpy is not None:
+        return numpy.memmap(path, dtype=numpy.dtype(spec['typecode']), mode='r')
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mapped).cast(spec['typecode'])
+
+def load(task, case, n=None, seed=1, cache_dir=CACHE_DIR):
+    """Return the Dataset for a case, generating and caching it on first use"""
+    path = generate(task, case, n, seed, cache_dir)
+    meta = json.loads((path / 'meta.json').read_text())
+    buffers = []
+    for i, spec in enumerate(meta['args']):
+        if spec['kind'] == 'int':
+            buffers.append(spec['value'])
+        else:
+            buffers.append(_map_array(path / f'arg{i}.bin', spec))
+    return Dataset(path, meta, buffers)
+
+def case_names(task):
+    return tuple(CASES[task])
+
+def main(tasks):
+    unknown = [task for task in tasks if task not in CASES]
+    if unknown:
+        print(f"❌ Unknown task(s): {', '.join(unknown)}")
+        sys.exit(1)
+
+    for task in tasks or CASES:
+        for case in CASES[task]:
+            path = generate(task, case)
+            size = sum(f.stat().st_size for f in path.iterdir())
+            print(f"  ✓ {task}/{case} ({size / 1024 / 1024:.1f} MiB)")
+    print(f"✅ Datasets cached in {CACHE_DIR}")
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,40 @@
+"""Gunicorn settings for Codility Training Tracker"""
+
+import os
+from pathlib import Path
+
+# /api/grade and /api/complexity run submissions inside the request, so the
+# default 30s would kill workers mid-measurement and answer with a 502
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+def on_starting(server):
+    """Compile lessons and static assets once in the master before any worker is forked"""
+    # Toggles pending in one worker's write-behind journal are invisible to
+    # the others, which would then toggle from stale state
+    if os.environ.get('WRITE_BEHIND_DIR') and server.cfg.workers > 1:
+        raise RuntimeError(f'WRITE_BEHIND_DIR needs --workers 1 (got {server.cfg.workers})')
+
+    from complexity import MAX_WALL_SECONDS
+    if server.cfg.timeout and server.cfg.timeout <= MAX_WALL_SECONDS:
+        raise RuntimeError(f'--timeout {server.cfg.timeout} is too short for complexity runs (need > {MAX_WALL_SECONDS:g}s)')
+
+    from asset_build import BUILD_DIR as ASSET_BUILD_DIR, build_assets
+    from lesson_build import BUILD_DIR, compile_lessons
+
+    manifest = compile_lessons()
+    server.log.info("Compiled %d lessons into %s", len(manifest['lessons']), BUILD_DIR)
+    manifest = build_assets()
+    server.log.info("Fingerprinted %d assets into %s", len(manifest['assets']), ASSET_BUILD_DIR)
+
+    # Workers share request metrics through snapshot files; start from zero
+    metrics_dir = Path(os.environ.setdefault('METRICS_DIR', str(Path(__file__).parent / 'build' / 'metrics')))
+    metrics_dir.mkdir(parents=True, exist_ok=True)
+    for snapshot in metrics_dir.glob('metrics-*.json*'):
+        snapshot.unlink()
+
+def worker_exit(server, worker):
+    """Commit the exiting worker's pending toggles and write its last metrics"""
+    from app import flush_write_behind, metrics_registry
+
+    flush_write_behind()
+    metrics_registry.flush(force=True)
@@ -0,0 +1,108 @@
+"""Content-addressed storage for uploaded lesson images.
+
+Uploads are spooled straight to a temporary file in the upload folder
+while werkzeug parses the multipart body. The same pass hashes the bytes
+and sniffs the image type from the leading magic bytes, so the request is
+never held in memory and the file is never read twice. A valid upload is
+then renamed to ``<sha256>.<type>``: the same image uploaded again maps to
+the file already on disk, and its URL never changes content.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+
+SNIFF_BYTES = 512
+
+# (prefix, type) pairs checked against the start of the file
+IMAGE_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+]
+SVG_PREFIXES = (b'<?xml', b'<svg', b'<!--', b'<!doctype svg')
+
+# Names given to stored images; their content never changes
+STORED_NAME_RE = re.compile(r'^[0-9a-f]{64}\.(png|jpg|gif|webp|svg)$')
+
+def sniff_image_type(head):
+    """Image type of a file from its first bytes, or None if it is not an image"""
+    for prefix, image_type in IMAGE_SIGNATURES:
+        if head.startswith(prefix):
+            return image_type
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return 'webp'
+    text = head.lstrip(b'\xef\xbb\xbf \t\r\n').lower()
+    if text.startswith(SVG_PREFIXES) and b'<svg' in text:
+        return 'svg'
+    return None
+
+class HashingUpload:
+    """Writable upload stream that hashes and sniffs data as it is spooled to disk.
+
+    Used as werkzeug's file stream, so it also reads and seeks like the
+    temporary file behind it. Once the first SNIFF_BYTES show the data is
+    not an image, the rest of the body is discarded instead of written.
+    Unless commit() is called the temporary file is removed on close().
+    """
+
+    def __init__(self, folder):
+        os.makedirs(folder, exist_ok=True)
+        self._file = tempfile.NamedTemporaryFile(dir=folder, prefix='.upload-', suffix='.tmp', delete=False)
+        self.path = self._file.name
+        self._hash = hashlib.sha256()
+        self._head = b''
+        self.size = 0
+        self.rejected = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.rejected:
+            return len(data)
+        if len(self._head) < SNIFF_BYTES:
+            self._head += bytes(data[:SNIFF_BYTES - len(self._head)])
+            if len(self._head) == SNIFF_BYTES and sniff_image_type(self._head) is None:
+                self.rejected = True
+                return len(data)
+        self._hash.update(data)
+        return self._file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self._file, name)
+
+    @property
+    def image_type(self):
+        return None if self.rejected else sniff_image_type(self._head)
+
+    @property
+    def digest(self):
+        return self._hash.hexdigest()
+
+    def commit(self, folder):
+        """Move the upload to its content address.
+
+        Returns (filename, duplicate); duplicate is True when the same
+        image was already stored.
+        """
+        filename = f'{self.digest}.{self.image_type}'
+        target = os.path.join(folder, filename)
+        self._file.close()
+        duplicate = os.path.exists(target)
+        if duplicate:
+            os.unlink(self.path)
+        else:
+            os.chmod(self.path, 0o644)
+            os.replace(self.path, target)
+        self.path = None
+        return filename, duplicate
+
+    def close(self):
+        self._file.close()
+        if self.path:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+            self.path = None
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Ahead-of-time lesson compilation for Codility Training Tracker
+
+Renders every markdown file in lessons/ into an HTML fragment under the
+build directory, writes a deflate segment of it next to each fragment
+and records everything in manifest.json. Workers load the manifest at
+startup so the first visitor of a lesson never pays the markdown render
+cost, and view_lesson splices the segment into gzip responses so the
+lesson body is never compressed per request (see precompress.py).
+
+Usage:
+    python lesson_build.py [lessons_dir] [build_dir]
+
+gunicorn.conf.py runs this automatically when the master process starts.
+"""
+
+import json
+import os
+import sys
+import zlib
+from pathlib import Path
+
+from lesson_cache import RenderedLesson, content_hash, extract_title, render_markdown
+from precompress import SEGMENT_SUFFIX, deflate_segment, write_atomic
+
+BASE_DIR = Path(__file__).parent
+LESSONS_DIR = BASE_DIR / 'lessons'
+BUILD_DIR = Path(os.environ.get('LESSON_BUILD_DIR', BASE_DIR / 'build' / 'lessons'))
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 2
+
+def load_manifest(build_dir=BUILD_DIR):
+    """Return the build manifest, or None if there is no usable build"""
+    try:
+        with open(Path(build_dir) / MANIFEST_NAME, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('version') != MANIFEST_VERSION:
+        return None
+    return manifest
+
+def compile_lessons(lessons_dir=LESSONS_DIR, build_dir=BUILD_DIR):
+    """Render all lessons into build_dir and write the manifest.
+
+    Lessons whose content hash matches the previous manifest are not
+    re-rendered. Returns the new manifest.
+    """
+    lessons_dir = Path(lessons_dir)
+    build_dir = Path(build_dir)
+    build_dir.mkdir(parents=True, exist_ok=True)
+
+    previous = (load_manifest(build_dir) or {}).get('lessons', {})
+    lessons = {}
+
+    for lesson_path in sorted(lessons_dir.glob('*.md')):
+        source = lesson_path.read_text(encoding='utf-8')
+        st = lesson_path.stat()
+        digest = content_hash(source)
+        fragment = f'{lesson_path.stem}.{digest[:16]}.html'
+
+        old = previous.get(lesson_path.name)
+        if old and old['hash'] == digest and (build_dir / fragment).is_file():
+            entry = dict(old)
+        else:
+            html, toc = render_markdown(source)
+            data = html.encode('utf-8')
+            write_atomic(str(build_dir / fragment), data)
+            write_atomic(str(build_dir / fragment) + SEGMENT_SUFFIX, deflate_segment(data))
+            entry = {
+                'hash': digest,
+                'title': extract_title(source),
+                'toc': toc,
+                'fragment': fragment,
+                'segment': fragment + SEGMENT_SUFFIX,
+                'crc32': zlib.crc32(data),
+            }
+
+        entry['mtime_ns'] = st.st_mtime_ns
+        entry['size'] = st.st_size
+        lessons[lesson_path.name] = entry
+
+    manifest = {'version': MANIFEST_VERSION, 'lessons': lessons}
+    write_atomic(str(build_dir / MANIFEST_NAME), json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+
+    # Drop fragments that no longer belong to any lesson
+    keep = {entry['fragment'] for entry in lessons.values()}
+    for path in build_dir.glob('*.html*'):
+        if path.name.split('.html')[0] + '.html' not in keep:
+            path.unlink()
+
+    return manifest
+
+def seed_cache(cache, manifest, lessons_dir=LESSONS_DIR, build_dir=BUILD_DIR):
+    """Preload a LessonRenderCache from a build manifest.
+
+    Only lessons whose file on disk still matches the manifest are loaded.
+    Returns the number of lessons seeded.
+    """
+    lessons_dir = Path(lessons_dir)
+    build_dir = Path(build_dir)
+    seeded = 0
+
+    for name, entry in manifest.get('lessons', {}).items():
+        lesson_path = lessons_dir / name
+        try:
+            st = lesson_path.stat()
+            if (st.st_mtime_ns, st.st_size) != (entry['mtime_ns'], entry['size']):
+                continue
+            source = lesson_path.read_text(encoding='utf-8')
+            if content_hash(source) != entry['hash']:
+                continue
+            html = (build_dir / entry['fragment']).read_text(encoding='utf-8')
+        except OSError:
+            continue
+
+        rendered = RenderedLesson(entry['hash'], html, entry['title'], entry['toc'], source)
+        cache.seed(lesson_path, (st.st_mtime_ns, st.st_size), rendered)
+        seeded += 1
+
+    return seeded
+
+def load_segment(entry, data, build_dir=BUILD_DIR):
+    """The built deflate segment of a lesson, or None if it does not hold data.
+
+    data is the fragment HTML (bytes) about to be sent; the segment is
+    only usable if it decompresses to exactly those bytes.
+    """
+    if entry is None or entry.get('crc32') != zlib.crc32(data):
+        return None
+    try:
+        return (Path(build_dir) / entry['segment']).read_bytes()
+    except OSError:
+        return None
+
+if __name__ == '__main__':
+    lessons_dir = sys.argv[1] if len(sys.argv) > 1 else LESSONS_DIR
+    build_dir = sys.argv[2] if len(sys.argv) > 2 else BUILD_DIR
+    manifest = compile_lessons(lessons_dir, build_dir)
+    print(f"✓ Compiled {len(manifest['lessons'])} lessons into {build_dir}")
@@ -0,0 +1,145 @@
+"""Process-wide cache of rendered lesson markdown.
+
+Rendered lessons are stored by content hash with LRU eviction. Each lesson
+path also remembers the (mtime, size) it was last hashed at, so a repeat view
+of an unchanged file costs one stat() and never touches the markdown engine.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import markdown
+
+MARKDOWN_EXTENSIONS = ['extra', 'codehilite', 'toc', 'fenced_code']
+
+RenderedLesson = namedtuple('RenderedLesson', ['content_hash', 'html', 'title', 'toc', 'source'])
+
+def content_hash(content):
+    """SHA-256 hex digest of lesson source text"""
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+def extract_title(content):
+    """Title from the first markdown heading, or None if the file has none"""
+    if content.startswith('#'):
+        return content.split('\n')[0].replace('#', '').strip()
+    return None
+
+def render_markdown(content):
+    """Render lesson markdown to (html, toc)"""
+    md = markdown.Markdown(extensions=MARKDOWN_EXTENSIONS)
+    html = md.convert(content)
+    return html, getattr(md, 'toc', '')
+
+class LessonRenderCache:
+    """LRU cache of RenderedLesson entries keyed by content hash"""
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._files = {}
+
+    def get(self, path):
+        """Return the RenderedLesson for the file at path, rendering on a miss"""
+        path = os.fspath(path)
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            known = self._files.get(path)
+            if known and known[0] == signature:
+                entry = self._entries.get(known[1])
+                if entry is not None:
+                    self._entries.move_to_end(known[1])
+                    self.hits += 1
+                    return entry
+
+        with open(path, 'r', encoding='utf-8') as f:
+            source = f.read()
+        return self.put(path, source, signature)
+
+    def validators(self, path):
+        """Return (content_hash, mtime) for the file at path without rendering.
+
+        The file is only read when its mtime/size changed since it was
+        last hashed, so conditional requests for unchanged lessons cost a
+        single stat().
+        """
+        path = os.fspath(path)
+        st = os.stat(path)
+        signature = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            known = self._files.get(path)
+            if known and known[0] == signature:
+                return known[1], st.st_mtime
+
+        with open(path, 'r', encoding='utf-8') as f:
+            digest = content_hash(f.read())
+        with self._lock:
+            self._files[path] = (signature, digest)
+        return digest, st.st_mtime
+
+    def put(self, path, source, signature=None):
+        """Store source for path, rendering it unless its hash is cached"""
+        path = os.fspath(path)
+        if signature is None:
+            st = os.stat(path)
+            signature = (st.st_mtime_ns, st.st_size)
+        digest = content_hash(source)
+
+        with self._lock:
+            self._files[path] = (signature, digest)
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        html, toc = render_markdown(source)
+        entry = RenderedLesson(digest, html, extract_title(source), toc, source)
+
+        with self._lock:
+            self._entries[digest] = entry
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def seed(self, path, signature, entry):
+        """Insert an already rendered entry, e.g. from the lesson build"""
+        path = os.fspath(path)
+        with self._lock:
+            self._files[path] = (signature, entry.content_hash)
+            self._entries[entry.content_hash] = entry
+            self._entries.move_to_end(entry.content_hash)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, path):
+        """Forget the hash recorded for path so the next get() re-reads it"""
+        with self._lock:
+            self._files.pop(os.fspath(path), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._files.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+            }
@@ -0,0 +1,244 @@
+"""In-memory full-text search over the lesson markdown.
+
+Each lesson is split into sections at its headings, and every section is
+indexed as a document: token -> {section: [positions]}. Token character
+offsets are kept per section so snippets are cut and highlighted without
+reading the file again. Sections are ranked with BM25, with heading
+matches counting extra, and the last query word also matches as a prefix
+so results appear while typing.
+
+Lessons are reindexed one file at a time: save_lesson pushes the new
+text, and query() stats the files so edits made through another worker
+process are picked up too.
+"""
+
+import bisect
+import html
+import math
+import os
+import re
+import threading
+from collections import namedtuple
+
+from markdown.extensions.toc import slugify, unique
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+HEADING_RE = re.compile(r'^(#{1,6})\s+(.*?)\s*#*\s*$')
+FENCE_RE = re.compile(r'^\s*(```|~~~)')
+# Inline markdown that the toc extension drops before building an anchor
+INLINE_MARKUP_RE = re.compile(r'!?\[([^\]]*)\]\([^)]*\)|[`*_]')
+
+HEADING_WEIGHT = 3
+BM25_K1 = 1.2
+BM25_B = 0.75
+SNIPPET_CHARS = 160
+# Shorter last words only match whole tokens
+MIN_PREFIX = 2
+
+Section = namedtuple('Section', ['lesson', 'heading', 'anchor', 'text', 'offsets', 'heading_tokens', 'length'])
+
+def tokenize(text):
+    """Lowercase word tokens with their (start, end) offsets in text"""
+    return [(m.group(), m.start(), m.end()) for m in TOKEN_RE.finditer(text.lower())]
+
+def split_sections(content):
+    """Split lesson markdown into (heading, anchor, body) at each heading.
+
+    Anchors match the ids the markdown toc extension gives the rendered
+    headings. Lines starting with # inside fenced code are not headings.
+    """
+    sections = []
+    used_ids = set()
+    heading, anchor, body = '', '', []
+    in_fence = False
+    for line in content.split('\n'):
+        if FENCE_RE.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else HEADING_RE.match(line)
+        if match:
+            if heading or any(part.strip() for part in body):
+                sections.append((heading, anchor, '\n'.join(body)))
+            heading = INLINE_MARKUP_RE.sub(lambda m: m.group(1) or '', match.group(2))
+            anchor = unique(slugify(html.unescape(heading), '-'), used_ids)
+            body = []
+        else:
+            body.append(line)
+    if heading or any(part.strip() for part in body):
+        sections.append((heading, anchor, '\n'.join(body)))
+    return sections
+
+class LessonSearchIndex:
+    """Inverted index of lesson sections with incremental per-lesson updates"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}      # token -> {section id: [positions]}
+        self._sections = {}      # section id -> Section
+        self._lessons = {}       # lesson file -> {'title', 'path', 'signature', 'sections': [ids]}
+        self._vocabulary = []    # sorted tokens, for prefix matches
+        self._norms = {}         # section id -> BM25 length normalisation
+        self._next_id = 0
+        self._total_length = 0
+
+    def add_lesson(self, lesson, title, path):
+        """Index (or reindex) a lesson from its file"""
+        st = os.stat(path)
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        self.update(lesson, content, title=title, path=path, signature=(st.st_mtime_ns, st.st_size))
+
+    def update(self, lesson, content, title=None, path=None, signature=None):
+        """Replace a lesson's sections with those parsed from content"""
+        with self._lock:
+            known = self._lessons.get(lesson, {})
+            title = title or known.get('title') or lesson
+            path = path or known.get('path')
+            if signature is None and path:
+                st = os.stat(path)
+                signature = (st.st_mtime_ns, st.st_size)
+
+            self._remove(lesson)
+            ids = []
+            for heading, anchor, body in split_sections(content):
+                ids.append(self._add_section(lesson, heading, anchor, body))
+            self._lessons[lesson] = {'title': title, 'path': path, 'signature': signature, 'sections': ids}
+            self._vocabulary = sorted(self._postings)
+            # BM25 length normalisation only changes when the corpus does
+            average_length = self._total_length / (len(self._sections) or 1)
+            self._norms = {section_id: BM25_K1 * (1 - BM25_B + BM25_B * section.length / average_length)
+                           for section_id, section in self._sections.items()}
+
+    def _add_section(self, lesson, heading, anchor, body):
+        section_id = self._next_id
+        self._next_id += 1
+        text = f'{heading}\n{body}' if heading else body
+        tokens = tokenize(text)
+        heading_tokens = len(tokenize(heading))
+        for position, (token, _, _) in enumerate(tokens):
+            self._postings.setdefault(token, {}).setdefault(section_id, []).append(position)
+        # The heading's tokens come first, so positions below
+        # heading_tokens are heading matches
+        self._sections[section_id] = Section(
+            lesson, heading, anchor, text, [(start, end) for _, start, end in tokens],
+            heading_tokens, len(tokens) + heading_tokens * (HEADING_WEIGHT - 1))
+        self._total_length += self._sections[section_id].length
+        return section_id
+
+    def _remove(self, lesson):
+        known = self._lessons.pop(lesson, None)
+        if not known:
+            return
+        for section_id in known['sections']:
+            section = self._sections.pop(section_id)
+            self._total_length -= section.length
+            for token, _, _ in tokenize(section.text):
+                postings = self._postings.get(token)
+                if postings is not None:
+                    postings.pop(section_id, None)
+                    if not postings:
+                        del self._postings[token]
+
+    def refresh(self):
+        """Reindex lessons whose files changed since they were indexed"""
+        for lesson, known in list(self._lessons.items()):
+            path = known['path']
+            if not path:
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if (st.st_mtime_ns, st.st_size) != known['signature']:
+                self.add_lesson(lesson, known['title'], path)
+
+    def _expand(self, term, prefix):
+        """Index tokens matching a query term"""
+        if not prefix or len(term) < MIN_PREFIX:
+            return [term] if term in self._postings else []
+        vocabulary = self._vocabulary
+        i = bisect.bisect_left(vocabulary, term)
+        matches = []
+        while i < len(vocabulary) and vocabulary[i].startswith(term):
+            matches.append(vocabulary[i])
+            i += 1
+        return matches
+
+    def query(self, q, limit=10):
+        """Return up to limit ranked results for the query string q"""
+        self.refresh()
+        terms = [token for token, _, _ in tokenize(q)]
+        if not terms:
+            return []
+
+        with self._lock:
+            sections = len(self._sections) or 1
+            norms = self._norms
+            scores = {}
+            matched = {}
+            for i, term in enumerate(terms):
+                # The last word may still be being typed
+                for token in self._expand(term, prefix=i == len(terms) - 1):
+                    postings = self._postings[token]
+                    idf = _idf(sections, len(postings))
+                    for section_id, positions in postings.items():
+                        heading_tokens = self._sections[section_id].heading_tokens
+                        tf = len(positions) + (HEADING_WEIGHT - 1) * bisect.bisect_left(positions, heading_tokens)
+                        score = idf * tf * (BM25_K1 + 1) / (tf + norms[section_id])
+                        scores[section_id] = scores.get(section_id, 0.0) + score
+                        matched.setdefault(section_id, []).extend(positions)
+
+            ranked = sorted(scores, key=lambda section_id: (-scores[section_id], section_id))[:limit]
+            results = []
+            for section_id in ranked:
+                section = self._sections[section_id]
+                results.append({
+                    'lesson': section.lesson,
+                    'title': self._lessons[section.lesson]['title'],
+                    'heading': section.heading,
+                    'anchor': section.anchor,
+                    'score': round(scores[section_id], 3),
+                    'snippet': _snippet(section, sorted(set(matched[section_id]))),
+                })
+            return results
+
+    def stats(self):
+        with self._lock:
+            return {
+                'lessons': len(self._lessons),
+                'sections': len(self._sections),
+                'tokens': len(self._postings),
+            }
+
+def _idf(documents, containing):
+    return math.log(1 + (documents - containing + 0.5) / (containing + 0.5))
+
+def _snippet(section, positions):
+    """HTML snippet around the first match with every match in it highlighted"""
+    text = section.text
+    body_start = len(section.heading) + 1 if section.heading else 0
+    body_positions = [p for p in positions if p >= section.heading_tokens]
+    # A heading-only match shows the start of the section body
+    first_start = section.offsets[body_positions[0]][0] if body_positions else body_start
+
+    start = max(body_start, first_start - SNIPPET_CHARS // 4)
+    if start > body_start:
+        # Begin on a word boundary
+        space = text.find(' ', start)
+        start = space + 1 if 0 <= space < first_start else start
+    end = min(len(text), start + SNIPPET_CHARS)
+
+    pieces = ['…' if start > body_start else '']
+    cursor = start
+    for position in body_positions:
+        token_start, token_end = section.offsets[position]
+        if token_start < cursor:
+            continue
+        if token_end > end:
+            break
+        pieces.append(html.escape(text[cursor:token_start]))
+        pieces.append(f'<mark>{html.escape(text[token_start:token_end])}</mark>')
+        cursor = token_end
+    pieces.append(html.escape(text[cursor:end]))
+    if end < len(text):
+        pieces.append('…')
+    return ' '.join(''.join(pieces).split())
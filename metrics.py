@@ -0,0 +1,207 @@
+"""Per-route request and SQL metrics in the Prometheus text format.
+
+Every request records its latency, response size, status and the number
+and duration of the SQL statements it ran, keyed by Flask endpoint. Each
+gunicorn worker keeps its own registry and periodically writes a snapshot
+to ``metrics-<pid>-<nonce>.json`` in a shared directory (METRICS_DIR);
+/metrics sums the snapshots of every worker, including ones that have
+exited so counters never go backwards. The random nonce keeps a new
+worker that reuses an old worker's pid from overwriting its snapshot. Without a directory only the serving
+process is reported.
+
+Requests slower than SLOW_REQUEST_SECONDS are logged with their queries.
+"""
+
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+QUERY_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+
+# name -> (type, help, label names, buckets)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests handled', ('endpoint', 'method', 'status'), None),
+    'http_request_duration_seconds': ('histogram', 'Request latency', ('endpoint', 'method'), LATENCY_BUCKETS),
+    'http_response_size_bytes': ('histogram', 'Response body size', ('endpoint',), SIZE_BUCKETS),
+    'sql_queries_per_request': ('histogram', 'SQL statements run by a request', ('endpoint',), QUERY_COUNT_BUCKETS),
+    'sql_query_duration_seconds': ('histogram', 'SQL statement latency', ('endpoint',), QUERY_LATENCY_BUCKETS),
+}
+
+FLUSH_INTERVAL = 5
+SLOW_QUERY_CHARS = 200
+
+class MetricsRegistry:
+    """Counters and histograms of one process, optionally shared via snapshot files"""
+
+    def __init__(self, directory=None, flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._values = {name: {} for name in METRICS}
+        self._flushed_at = 0.0
+        self._dirty = False
+        self._owner = None
+        self._owner_pid = None
+
+    def inc(self, name, labels, amount=1):
+        with self._lock:
+            values = self._values[name]
+            values[labels] = values.get(labels, 0) + amount
+            self._dirty = True
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][3]
+        with self._lock:
+            values = self._values[name]
+            # [count per bucket..., count above the last bucket, sum]
+            histogram = values.get(labels)
+            if histogram is None:
+                histogram = values[labels] = [0] * (len(buckets) + 1) + [0.0]
+            i = 0
+            while i < len(buckets) and value > buckets[i]:
+                i += 1
+            histogram[i] += 1
+            histogram[-1] += value
+            self._dirty = True
+
+    def snapshot(self):
+        with self._lock:
+            return {name: [[list(labels), value] for labels, value in values.items()]
+                    for name, values in self._values.items()}
+
+    def _snapshot_path(self):
+        # Regenerated after a fork so parent and child never share a file
+        pid = os.getpid()
+        if self._owner_pid != pid:
+            self._owner = f'{pid}-{secrets.token_hex(4)}'
+            self._owner_pid = pid
+        return os.path.join(self.directory, f'metrics-{self._owner}.json')
+
+    def flush(self, force=False):
+        """Write this process's snapshot if it changed and the interval passed"""
+        if not self.directory or not self._dirty:
+            return
+        now = time.monotonic()
+        if not force and now - self._flushed_at < self.flush_interval:
+            return
+        self._flushed_at = now
+        self._dirty = False
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._snapshot_path()
+        tmp_path = f'{path}.tmp{threading.get_ident()}'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+
+    def collect(self):
+        """Metric values summed over every process that wrote a snapshot"""
+        if not self.directory:
+            return {name: {tuple(labels): value for labels, value in entries}
+                    for name, entries in self.snapshot().items()}
+
+        self.flush(force=True)
+        merged = {name: {} for name in METRICS}
+        try:
+            names = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            names = []
+        for file_name in names:
+            if not (file_name.startswith('metrics-') and file_name.endswith('.json')):
+                continue
+            try:
+                with open(os.path.join(self.directory, file_name), 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, entries in snapshot.items():
+                if name not in merged:
+                    continue
+                values = merged[name]
+                for labels, value in entries:
+                    labels = tuple(labels)
+                    if isinstance(value, list):
+                        current = values.get(labels)
+                        values[labels] = value if current is None else [a + b for a, b in zip(current, value)]
+                    else:
+                        values[labels] = values.get(labels, 0) + value
+        return merged
+
+    def render(self):
+        """Prometheus text exposition of collect()"""
+        lines = []
+        for name, values in self.collect().items():
+            kind, help_text, label_names, buckets = METRICS[name]
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(values.items()):
+                pairs = list(zip(label_names, labels))
+                if kind == 'counter':
+                    lines.append(f'{name}{_labels(pairs)} {value}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(list(buckets) + ['+Inf'], value[:-1]):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_labels(pairs + [("le", bound)])} {cumulative}')
+                lines.append(f'{name}_sum{_labels(pairs)} {value[-1]}')
+                lines.append(f'{name}_count{_labels(pairs)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+def instrument(app, engine, registry, slow_request_seconds=None):
+    """Record metrics for every request app handles and every statement engine runs"""
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_queries = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info['metrics_query_started'] = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if has_request_context() and 'metrics_queries' in g:
+            g.metrics_queries.append((statement, time.perf_counter() - conn.info['metrics_query_started']))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        queries = g.pop('metrics_queries', [])
+        endpoint = request.endpoint or 'unmatched'
+
+        registry.inc('http_requests_total', (endpoint, request.method, str(response.status_code)))
+        registry.observe('http_request_duration_seconds', (endpoint, request.method), elapsed)
+        if response.content_length is not None:
+            registry.observe('http_response_size_bytes', (endpoint,), response.content_length)
+        registry.observe('sql_queries_per_request', (endpoint,), len(queries))
+        for _, duration in queries:
+            registry.observe('sql_query_duration_seconds', (endpoint,), duration)
+        registry.flush()
+
+        if slow_request_seconds is not None and elapsed >= slow_request_seconds:
+            logger.warning('Slow request %s %s (%s) %.3fs, %d queries%s', request.method, request.path,
+                           endpoint, elapsed, len(queries),
+                           ''.join(f'\n  {1000 * duration:7.2f} ms  {" ".join(statement.split())[:SLOW_QUERY_CHARS]}'
+                                   for statement, duration in queries))
+        return response
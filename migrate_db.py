@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Database migrations for Codility Training Tracker
+
+db.create_all() only creates missing tables; it never alters existing ones.
+This script brings a live SQLite or PostgreSQL database up to the current
+schema by applying the pending steps listed in MIGRATIONS, recording each
+one in the schema_migrations table.
+
+Usage:
+    python migrate_db.py            # apply pending migrations
+    python migrate_db.py --status   # list applied/pending migrations
+
+Every step is idempotent, so it is safe to run on each deploy.
+"""
+
+import sys
+from datetime import datetime
+
+from sqlalchemy import UniqueConstraint, inspect, text
+
+from app import app, db, DayProgress, TaskProgress, ProgressCounter, GUEST_USER_ID, rebuild_progress_counters
+
+def has_column(conn, table, column):
+    return any(c['name'] == column for c in inspect(conn).get_columns(table))
+
+def has_unique_index(conn, table, columns):
+    """True if table already has a unique constraint or index on columns"""
+    inspector = inspect(conn)
+    columns = list(columns)
+    for constraint in inspector.get_unique_constraints(table):
+        if constraint['column_names'] == columns:
+            return True
+    for index in inspector.get_indexes(table):
+        if index.get('unique') and index['column_names'] == columns:
+            return True
+    return False
+
+def merge_duplicates(conn, table, key, merge):
+    """Collapse rows sharing the same key into the newest one.
+
+    merge(rows) receives the duplicate rows ordered oldest first and returns
+    the column values for the surviving row. Returns rows deleted.
+    """
+    key_sql = ', '.join(key)
+    groups = conn.execute(text(
+        f"SELECT {key_sql} FROM {table} GROUP BY {key_sql} HAVING COUNT(*) > 1"
+    )).fetchall()
+
+    deleted = 0
+    for group in groups:
+        where = ' AND '.join(f"{column} = :{column}" for column in key)
+        params = dict(zip(key, group))
+        rows = conn.execute(text(f"SELECT * FROM {table} WHERE {where} ORDER BY id"), params).mappings().all()
+        keep = rows[-1]
+
+        values = merge(rows)
+        assignments = ', '.join(f"{column} = :{column}" for column in values)
+        conn.execute(text(f"UPDATE {table} SET {assignments} WHERE id = :id"), dict(values, id=keep['id']))
+        for row in rows[:-1]:
+            conn.execute(text(f"DELETE FROM {table} WHERE id = :id"), {'id': row['id']})
+            deleted += 1
+    return deleted
+
+def latest_notes(rows):
+    """Newest non-empty notes of a duplicate group"""
+    return next((row['notes'] for row in reversed(rows) if row['notes']), '')
+
+def merge_day_rows(rows):
+    completed_dates = [row['completed_date'] for row in rows if row['completed_date']]
+    return {
+        'completed': any(row['completed'] for row in rows),
+        'notes': latest_notes(rows),
+        'completed_date': max(completed_dates) if completed_dates else None,
+    }
+
+def merge_task_rows(rows):
+    scores = [row['score'] for row in rows if row['score'] is not None]
+    return {
+        'completed': any(row['completed'] for row in rows),
+        'score': max(scores) if scores else None,
+        'notes': latest_notes(rows),
+    }
+
+def add_progress_unique_keys(conn):
+    """Deduplicate progress rows and add unique (week, day[, task_name]) indexes"""
+    targets = [
+        ('day_progress', ['week', 'day'], merge_day_rows, 'uq_day_progress_week_day'),
+        ('task_progress', ['week', 'day', 'task_name'], merge_task_rows, 'uq_task_progress_week_day_task'),
+    ]
+    for table, key, merge, index_name in targets:
+        if has_column(conn, table, 'user_id'):
+            # Created by a newer schema that already scopes keys per user
+            continue
+        deleted = merge_duplicates(conn, table, key, merge)
+        if deleted:
+            print(f"  ✓ Merged {deleted} duplicate {table} rows")
+        if not has_unique_index(conn, table, key):
+            conn.execute(text(f"CREATE UNIQUE INDEX {index_name} ON {table} ({', '.join(key)})"))
+            print(f"  ✓ Created unique index {index_name}")
+
+def rebuild_sqlite_table(conn, table):
+    """Recreate a SQLite table from its current model definition.
+
+    SQLite cannot drop table-level constraints or add them to an existing
+    table, so the table is renamed, created afresh and its rows copied.
+    """
+    old_name = f"{table.name}_old"
+    old_columns = {c['name'] for c in inspect(conn).get_columns(table.name)}
+    conn.execute(text(f"ALTER TABLE {table.name} RENAME TO {old_name}"))
+    table.create(conn)
+    columns = ', '.join(c.name for c in table.columns if c.name in old_columns)
+    conn.execute(text(f"INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {old_name}"))
+    conn.execute(text(f"DROP TABLE {old_name}"))
+
+def add_per_user_progress(conn):
+    """Scope progress rows by user_id with (user_id, week, day)-leading unique keys.
+
+    Existing rows become the guest board (user_id 0).
+    """
+    targets = [
+        (DayProgress.__table__, ['week', 'day'], 'uq_day_progress_week_day'),
+        (TaskProgress.__table__, ['week', 'day', 'task_name'], 'uq_task_progress_week_day_task'),
+    ]
+    for table, old_key, old_index in targets:
+        if has_column(conn, table.name, 'user_id') and not has_unique_index(conn, table.name, old_key):
+            continue
+
+        if conn.dialect.name == 'sqlite':
+            rebuild_sqlite_table(conn, table)
+        else:
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS "
+                              f"user_id INTEGER NOT NULL DEFAULT {GUEST_USER_ID}"))
+            conn.execute(text(f"ALTER TABLE {table.name} DROP CONSTRAINT IF EXISTS {old_index}"))
+            conn.execute(text(f"DROP INDEX IF EXISTS {old_index}"))
+            constraint = next(c for c in table.constraints if isinstance(c, UniqueConstraint))
+            columns = ', '.join(c.name for c in constraint.columns)
+            conn.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS {constraint.name} ON {table.name} ({columns})"))
+        print(f"  ✓ Scoped {table.name} by user_id")
+
+    # Counters are derived data; recreate the table with the per-user key
+    if not has_column(conn, 'progress_counter', 'user_id'):
+        conn.execute(text("DROP TABLE progress_counter"))
+        ProgressCounter.__table__.create(conn)
+        print("  ✓ Recreated progress_counter per user")
+
+def add_task_complexity(conn):
+    """Add the complexity estimate columns to task_progress"""
+    for column, type_ in [('complexity', 'VARCHAR(20)'), ('complexity_confidence', 'FLOAT')]:
+        if not has_column(conn, 'task_progress', column):
+            conn.execute(text(f"ALTER TABLE task_progress ADD COLUMN {column} {type_}"))
+            print(f"  ✓ Added task_progress.{column}")
+
+def add_task_reviewed_at(conn):
+    """Add the review timestamp the review queue schedules from"""
+    if not has_column(conn, 'task_progress', 'reviewed_at'):
+        conn.execute(text("ALTER TABLE task_progress ADD COLUMN reviewed_at TIMESTAMP"))
+        print("  ✓ Added task_progress.reviewed_at")
+
+# (version, description, step) in the order they must be applied
+MIGRATIONS = [
+    ('0001', 'unique keys on progress tables', add_progress_unique_keys),
+    ('0002', 'per-user progress', add_per_user_progress),
+    ('0003', 'task complexity estimates', add_task_complexity),
+    ('0004', 'task review timestamps', add_task_reviewed_at),
+]
+
+def ensure_migrations_table(conn):
+    conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        "version VARCHAR(20) PRIMARY KEY, "
+        "description VARCHAR(200) NOT NULL, "
+        "applied_at TIMESTAMP NOT NULL)"
+    ))
+
+def applied_versions(conn):
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+def migrate():
+    """Create missing tables and apply every pending migration"""
+    with app.app_context():
+        db.create_all()
+
+        with db.engine.begin() as conn:
+            ensure_migrations_table(conn)
+            done = applied_versions(conn)
+
+        pending = [m for m in MIGRATIONS if m[0] not in done]
+        if not pending:
+            print("✓ Database schema is up to date")
+            return
+
+        for version, description, step in pending:
+            print(f"→ Applying {version}: {description}")
+            # Each migration runs in its own transaction
+            with db.engine.begin() as conn:
+                step(conn)
+                conn.execute(
+                    text("INSERT INTO schema_migrations (version, description, applied_at) "
+                         "VALUES (:version, :description, :applied_at)"),
+                    {'version': version, 'description': description, 'applied_at': datetime.utcnow()},
+                )
+
+        # Merged duplicates change the completion totals
+        rebuild_progress_counters()
+        print(f"✅ Applied {len(pending)} migration(s)")
+
+def status():
+    with app.app_context():
+        with db.engine.begin() as conn:
+            ensure_migrations_table(conn)
+            done = applied_versions(conn)
+    for version, description, _ in MIGRATIONS:
+        mark = '✓' if version in done else '·'
+        print(f"{mark} {version}  {description}")
+
+if __name__ == '__main__':
+    if '--status' in sys.argv[1:]:
+        status()
+    else:
+        migrate()
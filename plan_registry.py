@@ -0,0 +1,288 @@
+"""Immutable, indexed view of the 8-week training plan and its lessons.
+
+TRAINING_PLAN and LESSONS below are the source data. PLAN is built from
+them once at import: every week, day, lesson and task occurrence becomes a
+read-only ``__slots__`` record, and the lookups routes need (a day's
+week, a week's lesson, every day a task is set on, plan totals) are
+precomputed, so no request walks the nested dicts.
+
+Task labels such as 'Redo StoneWall' or 'Focus StoneWall + EquiLeader'
+are indexed under each Codility task they name, so a task's occurrences
+cover its redos and mock tests; other labels are indexed as written.
+"""
+
+from types import MappingProxyType
+
+import grader
+
+TRAINING_PLAN = {
+    1: {
+        'title': 'WEEK 1 – Foundations (TypeScript + Basic DSA)',
+        'focus': 'loops, arrays, functions, time complexity',
+        'days': {
+            1: {
+                'title': 'TypeScript Language Basics',
+                'topics': ['Functions', 'Arrays & objects', 'For / while loops'],
+                'tasks': ['10 small array manipulations']
+            },
+            2: {
+                'title': 'Big-O (Beginner Level)',
+                'topics': ['O(n), O(n²), O(log n)', 'Recognize slow vs fast solutions'],
+                'tasks': ['Binary Gap']
+            },
+            3: {
+                'title': 'Arrays I',
+                'topics': [],
+                'tasks': ['OddOccurrencesInArray', 'CyclicRotation']
+            },
+            4: {
+                'title': 'Arrays II',
+                'topics': [],
+                'tasks': ['Two Sum (LeetCode Easy)', 'Remove Duplicates (LC Easy)']
+            },
+            5: {
+                'title': 'Reading Problems + Working With Edge cases',
+                'topics': ['Practice identifying edge cases'],
+                'tasks': ['TapeEquilibrium', 'PermMissingElem']
+            },
+            6: {
+                'title': 'Review + Fix Weakness',
+                'topics': ['Focus on speed + correctness'],
+                'tasks': ['Do 3–4 easy tasks again']
+            },
+            7: {
+                'title': 'REST',
+                'topics': ['Take a break!'],
+                'tasks': []
+            }
+        }
+    },
+    2: {
+        'title': 'WEEK 2 – Counting, Prefix Sum & Hash Maps',
+        'focus': 'Codility Lesson 3–5, hash maps in TypeScript',
+        'days': {
+            8: {
+                'title': 'Counting Elements',
+                'topics': ['boolean arrays vs hash maps'],
+                'tasks': ['PermCheck', 'FrogJmp']
+            },
+            9: {
+                'title': 'Counting Practice',
+                'topics': [],
+                'tasks': ['MissingInteger', 'FrogRiverOne']
+            },
+            10: {
+                'title': 'Prefix Sums (Very Important)',
+                'topics': ['Prefix sum logic'],
+                'tasks': ['GenomicRangeQuery']
+            },
+            11: {
+                'title': 'Prefix Sums II',
+                'topics': ['Subarray sums'],
+                'tasks': ['LeetCode: Range Sum Query']
+            },
+            12: {
+                'title': 'Hash Map Practice',
+                'topics': ['Review TypeScript Map vs Object'],
+                'tasks': ['LC: Contains Duplicate', 'LC: First Unique Character']
+            },
+            13: {
+                'title': 'Mini Review',
+                'topics': ['Revisit prefix sums'],
+                'tasks': ['Redo MissingInteger fast', 'Redo FrogRiverOne']
+            },
+            14: {
+                'title': 'MOCK TEST (45 min)',
+                'topics': ['Target: 70%+'],
+                'tasks': ['OddOccurrencesInArray', 'FrogRiverOne', 'TapeEquilibrium']
+            }
+        }
+    },
+    3: {
+        'title': 'WEEK 3 – Sorting, Greedy & Basic Math',
+        'focus': 'sort, compare, greedy patterns',
+        'days': {
+            15: {'title': 'Sorting', 'topics': [], 'tasks': ['Distinct', 'MaxProductOfThree']},
+            16: {'title': 'Sorting II', 'topics': [], 'tasks': ['Triangle', 'Number of intersections (optional)']},
+            17: {'title': 'Greedy Algorithms', 'topics': [], 'tasks': ['TapeEquilibrium', 'TieRopes']},
+            18: {'title': 'Simple Math in DSA', 'topics': [], 'tasks': ['CountDiv', 'PassingCars']},
+            19: {'title': 'Extra Sorting Practice', 'topics': [], 'tasks': ['LC: Merge Sorted Array', 'LC: Sort Colors']},
+            20: {'title': 'Review', 'topics': ['Optimize speed'], 'tasks': ['Redo 3 solved tasks']},
+            21: {'title': 'MOCK TEST (60 min)', 'topics': ['Target: 75%+'], 'tasks': ['Distinct', 'MaxProductOfThree', 'FrogRiverOne']}
+        }
+    },
+    4: {
+        'title': 'WEEK 4 – Stacks, Queues, Leaders (Major Week)',
+        'focus': 'stack patterns, dominance, StoneWall',
+        'days': {
+            22: {'title': 'Stacks', 'topics': [], 'tasks': ['Brackets', 'LC: Valid Parentheses']},
+            23: {'title': 'Stack Simulation', 'topics': [], 'tasks': ['Fish', 'StoneWall (VERY common!)']},
+            24: {'title': 'Leaders & Dominator', 'topics': [], 'tasks': ['Dominator', 'EquiLeader']},
+            25: {'title': 'Stacks & Queues Review', 'topics': [], 'tasks': ['Redo Fish', 'Redo StoneWall']},
+            26: {'title': 'Hard Stack Practice', 'topics': [], 'tasks': ['LC: Daily Temperatures (optional)', 'Redo Brackets']},
+            27: {'title': 'Review', 'topics': [], 'tasks': ['Focus StoneWall + EquiLeader']},
+            28: {'title': 'MOCK TEST (70 min)', 'topics': ['Target: 80%+'], 'tasks': ['Brackets', 'StoneWall', 'Dominator']}
+        }
+    },
+    5: {
+        'title': 'WEEK 5 – Maximum Slices + DP Basics',
+        'focus': 'max subarray, max double slice, DP for Codility',
+        'days': {
+            29: {'title': 'Kadane\'s Algorithm', 'topics': [], 'tasks': ['MaxSliceSum', 'MaxProfit']},
+            30: {'title': 'Max Double Slice', 'topics': ['Handle negative cases'], 'tasks': ['MaxDoubleSliceSum']},
+            31: {'title': 'DP Basics (Beginner Friendly)', 'topics': ['What is DP', 'Subproblems, transitions, recursion → iteration'], 'tasks': []},
+            32: {'title': 'DP Practice', 'topics': [], 'tasks': ['NumberSolitaire']},
+            33: {'title': 'DP Review', 'topics': [], 'tasks': ['Redo MaxSliceSum', 'Redo MaxProfit']},
+            34: {'title': 'Review', 'topics': [], 'tasks': ['Focus MaxDoubleSliceSum']},
+            35: {'title': 'MOCK TEST (75 min)', 'topics': ['Target: 80–85%'], 'tasks': ['MaxSliceSum', 'MaxProfit', 'MaxDoubleSliceSum']}
+        }
+    },
+    6: {
+        'title': 'WEEK 6 – Binary Search, Peaks, Flags, Sieve',
+        'focus': 'harder Codility topics',
+        'days': {
+            36: {'title': 'Binary Search', 'topics': ['Apply binary search to problems'], 'tasks': ['BinaryGap review', 'MinMaxDivision (optional)']},
+            37: {'title': 'Sieve of Eratosthenes', 'topics': [], 'tasks': ['CountFactors', 'CountSemiprimes']},
+            38: {'title': 'Peaks', 'topics': ['Practice subarray decomposition'], 'tasks': ['Peaks']},
+            39: {'title': 'Flags', 'topics': ['Hard but extremely common'], 'tasks': ['Flags']},
+            40: {'title': 'Rectangle / Geometry', 'topics': [], 'tasks': ['MinPerimeterRectangle', 'ChocolatesByNumbers']},
+            41: {'title': 'Review', 'topics': [], 'tasks': ['Redo Flags', 'Redo Peaks']},
+            42: {'title': 'MOCK TEST (75–90 min)', 'topics': ['Target: 85%+'], 'tasks': ['Flags', 'CountFactors', 'MaxSliceSum']}
+        }
+    },
+    7: {
+        'title': 'WEEK 7 – Reinforcement + Mid/Hard LeetCode',
+        'focus': 'fill gaps + strengthen thinking',
+        'days': {
+            43: {'title': 'Array Medium Review', 'topics': [], 'tasks': ['LC Medium array', 'LC Medium greedy']},
+            44: {'title': 'Array Medium Review (cont.)', 'topics': [], 'tasks': ['Continue LC Medium problems']},
+            45: {'title': 'Stack & Leader Review', 'topics': [], 'tasks': ['StoneWall', 'Fish', 'EquiLeader']},
+            46: {'title': 'Binary Search Review', 'topics': [], 'tasks': ['Flags', 'Peaks']},
+            47: {'title': 'Prefix Sum Review', 'topics': [], 'tasks': ['GenomicRangeQuery', 'MissingInteger']},
+            48: {'title': 'Mini Mock Test (60 min)', 'topics': ['Target: 90% on easier ones, 75% on hard ones'], 'tasks': ['3 medium tasks mixed']},
+            49: {'title': 'Free Review Day', 'topics': ['Redo anything difficult'], 'tasks': []}
+        }
+    },
+    8: {
+        'title': 'WEEK 8 – Final Codility Simulation Week',
+        'focus': 'simulate real exam conditions',
+        'days': {
+            51: {'title': 'Full Mock Test A (90 min)', 'topics': [], 'tasks': ['StoneWall', 'MaxDoubleSliceSum', 'TapeEquilibrium']},
+            52: {'title': 'Review results', 'topics': [], 'tasks': ['Analyze Mock Test A']},
+            53: {'title': 'Full Mock Test B (90 min)', 'topics': [], 'tasks': ['Fish', 'Flags', 'PermMissingElem']},
+            54: {'title': 'Review', 'topics': [], 'tasks': ['Analyze Mock Test B']},
+            55: {'title': 'Full Mock Test C (90 min)', 'topics': [], 'tasks': ['MaxProfit', 'GenomicRangeQuery', 'Dominator']},
+            56: {'title': 'Final Self-Assessment', 'topics': ['Goal: 85–90% correctness + optimized performance'], 'tasks': []}
+        }
+    }
+}
+
+LESSONS = [
+    {'file': 'README.md', 'title': 'Lessons Overview', 'week': 0},
+    {'file': 'CHEAT_SHEET.md', 'title': 'Pattern Cheat Sheet', 'week': 0},
+    {'file': 'week1-foundations.md', 'title': 'Week 1: Foundations', 'week': 1},
+    {'file': 'week2-counting-prefix-hashmaps.md', 'title': 'Week 2: Counting & Prefix Sums', 'week': 2},
+    {'file': 'week3-sorting-greedy-math.md', 'title': 'Week 3: Sorting & Greedy', 'week': 3},
+    {'file': 'week4-stacks-queues-leaders.md', 'title': 'Week 4: Stacks & Leaders', 'week': 4},
+    {'file': 'week5-slices-dp.md', 'title': 'Week 5: Maximum Slices & DP', 'week': 5},
+    {'file': 'week6-binary-search-peaks-sieve.md', 'title': 'Week 6: Binary Search & Sieve', 'week': 6},
+    {'file': 'week7-review-practice.md', 'title': 'Week 7: Review & Practice', 'week': 7},
+    {'file': 'week8-final-mocks.md', 'title': 'Week 8: Final Mock Tests', 'week': 8},
+]
+
+class _Record:
+    """Read-only record; subclasses list their fields in __slots__"""
+    __slots__ = ()
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            object.__setattr__(self, name, fields[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{type(self).__name__} records are immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{type(self).__name__} records are immutable')
+
+    def __repr__(self):
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__ if name != 'days')
+        return f'{type(self).__name__}({fields})'
+
+class Lesson(_Record):
+    __slots__ = ('file', 'title', 'week', 'position')
+
+class Week(_Record):
+    __slots__ = ('number', 'title', 'focus', 'days', 'lesson')
+
+class Day(_Record):
+    __slots__ = ('number', 'week', 'title', 'topics', 'tasks')
+
+class TaskOccurrence(_Record):
+    """One task label on one day of the plan"""
+    __slots__ = ('task', 'label', 'week', 'day', 'day_title', 'position')
+
+def label_tasks(label):
+    """Codility tasks a plan label names, or the label itself if it names none"""
+    normalized = ''.join(ch for ch in label.lower() if ch.isalnum())
+    names = [name for name in grader.TASKS if name.lower() in normalized]
+    # 'MaxSliceSum' must not also count for a label naming a longer task containing it
+    names = [name for name in names if not any(name != other and name.lower() in other.lower() for other in names)]
+    return tuple(sorted(names, key=lambda name: normalized.index(name.lower()))) or (label,)
+
+class PlanRegistry:
+    """Weeks, days, lessons and task occurrences with precomputed indexes"""
+
+    def __init__(self, plan, lessons):
+        self.lessons = tuple(Lesson(file=lesson['file'], title=lesson['title'], week=lesson['week'], position=i)
+                             for i, lesson in enumerate(lessons))
+        self.lesson_by_file = MappingProxyType({lesson.file: lesson for lesson in self.lessons})
+        week_lessons = {lesson.week: lesson for lesson in self.lessons if lesson.week}
+
+        weeks = {}
+        days = {}
+        occurrences = {}
+        tasks_by_label = {}
+        for week_num, week in plan.items():
+            week_days = {}
+            for day_num, day in week['days'].items():
+                record = Day(number=day_num, week=week_num, title=day['title'],
+                             topics=tuple(day['topics']), tasks=tuple(day['tasks']))
+                week_days[day_num] = days[day_num] = record
+                for position, label in enumerate(record.tasks):
+                    tasks = tasks_by_label.setdefault(label, label_tasks(label))
+                    for task in tasks:
+                        occurrences.setdefault(task, []).append(TaskOccurrence(
+                            task=task, label=label, week=week_num, day=day_num, day_title=record.title,
+                            position=position))
+            weeks[week_num] = Week(number=week_num, title=week['title'], focus=week['focus'],
+                                   days=MappingProxyType(week_days), lesson=week_lessons.get(week_num))
+
+        self.weeks = MappingProxyType(weeks)
+        self.days = MappingProxyType(days)
+        self.day_week = MappingProxyType({day.number: day.week for day in days.values()})
+        self.week_lesson = MappingProxyType({week.number: week.lesson for week in weeks.values()})
+        self.occurrences = MappingProxyType({task: tuple(found) for task, found in occurrences.items()})
+        self.label_tasks = MappingProxyType(tasks_by_label)
+        self.day_tasks = frozenset((day.week, day.number, label) for day in days.values() for label in day.tasks)
+        self.total_weeks = len(weeks)
+        self.total_days = len(days)
+        self.total_tasks = sum(len(day.tasks) for day in days.values())
+
+    def day(self, week, day):
+        """The Day record for week/day, or None"""
+        record = self.days.get(day)
+        return record if record is not None and record.week == week else None
+
+    def has_task(self, week, day, label):
+        return (week, day, label) in self.day_tasks
+
+    def lesson_neighbours(self, lesson_file):
+        """(previous, next) lessons around lesson_file in reading order"""
+        lesson = self.lesson_by_file.get(lesson_file)
+        if lesson is None:
+            return None, None
+        previous = self.lessons[lesson.position - 1] if lesson.position > 0 else None
+        following = self.lessons[lesson.position + 1] if lesson.position + 1 < len(self.lessons) else None
+        return previous, following
+
+PLAN = PlanRegistry(TRAINING_PLAN, LESSONS)
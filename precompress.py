@@ -0,0 +1,103 @@
+"""Helpers for writing and serving precompressed build artifacts.
+
+Artifacts are written next to their source as ``name.gz`` and, when the
+optional ``brotli`` package is installed, ``name.br``. At request time
+``choose_encoding`` picks the best variant the client accepts.
+
+Pages that wrap a large prebuilt part in a small per-request shell use
+deflate segments instead (``name.deflate``): raw deflate data ending on a
+byte boundary with no final block, which ``splice_gzip`` joins with the
+freshly compressed shell into one gzip response without recompressing
+the prebuilt part.
+"""
+
+import gzip
+import os
+import struct
+import zlib
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+ENCODING_SUFFIXES = {'br': '.br', 'gzip': '.gz'}
+SEGMENT_SUFFIX = '.deflate'
+# The shell around a segment is small and compressed per request
+SHELL_COMPRESSLEVEL = 6
+# gzip member header: magic, deflate, no flags, mtime 0, no extra flags, unix
+GZIP_HEADER = b'\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\x03'
+
+# Preferred order when the client accepts several encodings
+ENCODING_PREFERENCE = ('br', 'gzip')
+
+def compress(data, encoding):
+    """Compress bytes with the named content-coding"""
+    if encoding == 'gzip':
+        # mtime=0 keeps the output byte-identical across builds
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    if encoding == 'br':
+        if brotli is None:
+            raise ValueError('brotli is not installed')
+        return brotli.compress(data, quality=11)
+    raise ValueError(f'Unsupported encoding: {encoding}')
+
+def available_encodings():
+    return [e for e in ENCODING_PREFERENCE if e != 'br' or brotli is not None]
+
+def write_atomic(path, data):
+    """Write bytes to path via a temp file and rename"""
+    tmp_path = f'{path}.tmp{os.getpid()}'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def write_precompressed(path, data):
+    """Write data to path plus a compressed variant per available encoding.
+
+    Returns the list of encodings written.
+    """
+    write_atomic(path, data)
+    encodings = []
+    for encoding in available_encodings():
+        write_atomic(path + ENCODING_SUFFIXES[encoding], compress(data, encoding))
+        encodings.append(encoding)
+    return encodings
+
+def deflate_segment(data, level=9):
+    """Raw deflate data for data that can be spliced between other segments.
+
+    A full flush leaves it byte-aligned and without references to earlier
+    data, and no final block is written.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FULL_FLUSH)
+
+def splice_gzip(parts):
+    """One gzip body from (data, segment) parts, in order.
+
+    segment is deflate_segment(data) prepared ahead of time, or None to
+    compress data now.
+    """
+    body = [GZIP_HEADER]
+    crc = 0
+    size = 0
+    for data, segment in parts:
+        body.append(segment if segment is not None else deflate_segment(data, SHELL_COMPRESSLEVEL))
+        crc = zlib.crc32(data, crc)
+        size += len(data)
+    # An empty final block ends the stream
+    body.append(zlib.compressobj(0, zlib.DEFLATED, -zlib.MAX_WBITS).flush(zlib.Z_FINISH))
+    body.append(struct.pack('<II', crc, size & 0xffffffff))
+    return b''.join(body)
+
+def choose_encoding(accept_encoding, encodings):
+    """Pick the preferred encoding from encodings that the client accepts.
+
+    accept_encoding is werkzeug's request.accept_encodings. Returns None
+    when the identity (uncompressed) variant should be sent.
+    """
+    for encoding in ENCODING_PREFERENCE:
+        if encoding in encodings and accept_encoding[encoding]:
+            return encoding
+    return None
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Rebuild progress counters for Codility Training Tracker
+
+The homepage reads completion totals from the progress_counter table,
+which toggle_day and toggle_task keep up to date. Run this script to
+recompute the counters from the DayProgress/TaskProgress tables, e.g.
+after editing progress rows by hand or restoring a backup:
+    python rebuild_counters.py
+"""
+
+from app import app, db, rebuild_progress_counters
+
+def main():
+    with app.app_context():
+        db.create_all()
+        values = rebuild_progress_counters()
+
+    print(f"✓ Progress counters rebuilt for {len(values)} user(s)")
+    for user_id, counters in sorted(values.items()):
+        summary = ', '.join(f"{name}={value}" for name, value in sorted(counters.items()))
+        print(f"  user {user_id}: {summary}")
+
+if __name__ == '__main__':
+    main()
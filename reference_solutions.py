@@ -0,0 +1,516 @@
+"""Reference solutions for the Codility tasks in the training plan.
+
+The plain functions are the optimal pure-Python versions. Their running
+time is the target a Python submission is measured against.
+
+Where a task vectorizes naturally, a NumPy version (same name plus _np)
+gives the same answer much faster. Those versions accept lists or NumPy
+arrays, including the memory-mapped buffers from generators. The grader
+uses them as oracles on full-size inputs. NumPy is optional, so always
+look them up with vectorized().
+"""
+
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def binary_gap(N):
+    longest = 0
+    current = None
+    while N:
+        if N & 1:
+            if current is not None:
+                longest = max(longest, current)
+            current = 0
+        elif current is not None:
+            current += 1
+        N >>= 1
+    return longest
+
+def odd_occurrences_in_array(A):
+    result = 0
+    for value in A:
+        result ^= value
+    return result
+
+def cyclic_rotation(A, K):
+    if not A:
+        return []
+    K %= len(A)
+    return list(A[-K:]) + list(A[:-K]) if K else list(A)
+
+def tape_equilibrium(A):
+    total = sum(A)
+    left = 0
+    best = None
+    for value in A[:-1]:
+        left += value
+        diff = abs(total - 2 * left)
+        if best is None or diff < best:
+            best = diff
+    return best
+
+def perm_missing_elem(A):
+    n = len(A) + 1
+    return n * (n + 1) // 2 - sum(A)
+
+def perm_check(A):
+    n = len(A)
+    seen = bytearray(n + 1)
+    for value in A:
+        if value < 1 or value > n or seen[value]:
+            return 0
+        seen[value] = 1
+    return 1
+
+def frog_jmp(X, Y, D):
+    return -(-(Y - X) // D)
+
+def missing_integer(A):
+    n = len(A)
+    seen = bytearray(n + 2)
+    for value in A:
+        if 0 < value <= n:
+            seen[value] = 1
+    for candidate in range(1, n + 2):
+        if not seen[candidate]:
+            return candidate
+
+def frog_river_one(X, A):
+    covered = bytearray(X + 1)
+    remaining = X
+    for second, position in enumerate(A):
+        if position <= X and not covered[position]:
+            covered[position] = 1
+            remaining -= 1
+            if remaining == 0:
+                return second
+    return -1
+
+def genomic_range_query(S, P, Q):
+    impact = {'A': 0, 'C': 1, 'G': 2, 'T': 3}
+    prefix = [[0] * (len(S) + 1) for _ in range(3)]
+    for i, nucleotide in enumerate(S):
+        kind = impact[nucleotide]
+        for k in range(3):
+            prefix[k][i + 1] = prefix[k][i] + (1 if kind == k else 0)
+    answers = []
+    for start, end in zip(P, Q):
+        for k in range(3):
+            if prefix[k][end + 1] - prefix[k][start] > 0:
+                answers.append(k + 1)
+                break
+        else:
+            answers.append(4)
+    return answers
+
+def distinct(A):
+    return len(set(A))
+
+def max_product_of_three(A):
+    A = sorted(A)
+    return max(A[-1] * A[-2] * A[-3], A[0] * A[1] * A[-1])
+
+def triangle(A):
+    A = sorted(A)
+    for i in range(len(A) - 2):
+        if A[i] + A[i + 1] > A[i + 2]:
+            return 1
+    return 0
+
+def tie_ropes(K, A):
+    count = 0
+    length = 0
+    for rope in A:
+        length += rope
+        if length >= K:
+            count += 1
+            length = 0
+    return count
+
+def count_div(A, B, K):
+    return B // K - (A - 1) // K if A > 0 else B // K + 1
+
+def passing_cars(A):
+    east = 0
+    passing = 0
+    for direction in A:
+        if direction == 0:
+            east += 1
+        else:
+            passing += east
+            if passing > 1000000000:
+                return -1
+    return passing
+
+def brackets(S):
+    pairs = {')': '(', ']': '[', '}': '{'}
+    stack = []
+    for char in S:
+        if char in pairs:
+            if not stack or stack.pop() != pairs[char]:
+                return 0
+        else:
+            stack.append(char)
+    return 0 if stack else 1
+
+def fish(A, B):
+    downstream = []
+    survivors = 0
+    for size, direction in zip(A, B):
+        if direction == 1:
+            downstream.append(size)
+            continue
+        while downstream and downstream[-1] < size:
+            downstream.pop()
+        if not downstream:
+            survivors += 1
+    return survivors + len(downstream)
+
+def stone_wall(H):
+    stack = []
+    blocks = 0
+    for height in H:
+        while stack and stack[-1] > height:
+            stack.pop()
+        if not stack or stack[-1] < height:
+            stack.append(height)
+            blocks += 1
+    return blocks
+
+def _leader(A):
+    """Return (value, count) of the dominator candidate, or (None, 0)"""
+    candidate, size = None, 0
+    for value in A:
+        if size == 0:
+            candidate, size = value, 1
+        elif value == candidate:
+            size += 1
+        else:
+            size -= 1
+    count = sum(1 for value in A if value == candidate) if size else 0
+    return (candidate, count) if count * 2 > len(A) else (None, 0)
+
+def dominator(A):
+    value, _ = _leader(A)
+    return A.index(value) if value is not None else -1
+
+def equi_leader(A):
+    value, total = _leader(A)
+    if value is None:
+        return 0
+    n = len(A)
+    left = 0
+    equi = 0
+    for i in range(n - 1):
+        if A[i] == value:
+            left += 1
+        if left * 2 > i + 1 and (total - left) * 2 > n - i - 1:
+            equi += 1
+    return equi
+
+def max_slice_sum(A):
+    best = current = A[0]
+    for value in A[1:]:
+        current = max(value, current + value)
+        best = max(best, current)
+    return best
+
+def max_profit(A):
+    best = 0
+    lowest = None
+    for price in A:
+        if lowest is None or price < lowest:
+            lowest = price
+        best = max(best, price - lowest)
+    return best
+
+def max_double_slice_sum(A):
+    n = len(A)
+    ending = [0] * n
+    starting = [0] * n
+    for i in range(1, n - 1):
+        ending[i] = max(0, ending[i - 1] + A[i])
+    for i in range(n - 2, 0, -1):
+        starting[i] = max(0, starting[i + 1] + A[i])
+    best = 0
+    for y in range(1, n - 1):
+        best = max(best, ending[y - 1] + starting[y + 1])
+    return best
+
+def number_solitaire(A):
+    best = [A[0]] * 6
+    for i in range(1, len(A)):
+        current = max(best) + A[i]
+        best[i % 6] = current
+    return current if len(A) > 1 else A[0]
+
+def min_max_division(K, M, A):
+    def blocks_needed(limit):
+        blocks, total = 1, 0
+        for value in A:
+            if total + value > limit:
+                blocks += 1
+                total = value
+            else:
+                total += value
+        return blocks
+
+    low, high = max(A), sum(A)
+    while low < high:
+        middle = (low + high) // 2
+        if blocks_needed(middle) <= K:
+            high = middle
+        else:
+            low = middle + 1
+    return low
+
+def count_factors(N):
+    count = 0
+    i = 1
+    while i * i < N:
+        if N % i == 0:
+            count += 2
+        i += 1
+    return count + (1 if i * i == N else 0)
+
+def count_semiprimes(N, P, Q):
+    smallest = list(range(N + 1))
+    i = 2
+    while i * i <= N:
+        if smallest[i] == i:
+            for k in range(i * i, N + 1, i):
+                if smallest[k] == k:
+                    smallest[k] = i
+        i += 1
+    prefix = [0] * (N + 1)
+    for k in range(1, N + 1):
+        p = smallest[k]
+        is_semiprime = k > 1 and p != k and smallest[k // p] == k // p
+        prefix[k] = prefix[k - 1] + (1 if is_semiprime else 0)
+    return [prefix[q] - prefix[p - 1] for p, q in zip(P, Q)]
+
+def _peak_positions(A):
+    return [i for i in range(1, len(A) - 1) if A[i - 1] < A[i] > A[i + 1]]
+
+def peaks(A):
+    n = len(A)
+    peak_positions = _peak_positions(A)
+    if not peak_positions:
+        return 0
+    for blocks in range(len(peak_positions), 0, -1):
+        if n % blocks:
+            continue
+        size = n // blocks
+        covered = 0
+        for position in peak_positions:
+            if position // size == covered:
+                covered += 1
+        if covered == blocks:
+            return blocks
+    return 0
+
+def flags(A):
+    n = len(A)
+    next_peak = [-1] * n
+    upcoming = -1
+    for i in range(n - 2, 0, -1):
+        if A[i - 1] < A[i] > A[i + 1]:
+            upcoming = i
+        next_peak[i] = upcoming
+    if n < 3 or next_peak[1] == -1:
+        return 0
+
+    best = 0
+    k = 1
+    while (k - 1) * k <= n:
+        position = next_peak[1]
+        placed = 0
+        while position != -1 and placed < k:
+            placed += 1
+            position += k
+            position = next_peak[position] if position < n - 1 else -1
+        best = max(best, placed)
+        k += 1
+    return best
+
+def min_perimeter_rectangle(N):
+    i = math.isqrt(N)
+    while N % i:
+        i -= 1
+    return 2 * (i + N // i)
+
+def chocolates_by_numbers(N, M):
+    return N // math.gcd(N, M)
+
+# NumPy-vectorized versions
+
+def _array(A):
+    return np.asarray(A, dtype=np.int64)
+
+def odd_occurrences_in_array_np(A):
+    return int(np.bitwise_xor.reduce(_array(A)))
+
+def cyclic_rotation_np(A, K):
+    return np.roll(_array(A), K).tolist() if len(A) else []
+
+def tape_equilibrium_np(A):
+    a = _array(A)
+    left = np.cumsum(a[:-1])
+    return int(np.abs(a.sum() - 2 * left).min())
+
+def perm_missing_elem_np(A):
+    n = len(A) + 1
+    return n * (n + 1) // 2 - int(_array(A).sum())
+
+def perm_check_np(A):
+    a = _array(A)
+    n = len(a)
+    if n and (a.min() < 1 or a.max() > n):
+        return 0
+    return int((np.bincount(a, minlength=n + 1)[1:] == 1).all())
+
+def missing_integer_np(A):
+    a = _array(A)
+    n = len(a)
+    seen = np.zeros(n + 2, dtype=bool)
+    seen[0] = True
+    seen[a[(a > 0) & (a <= n)]] = True
+    return int(np.argmin(seen))
+
+def frog_river_one_np(X, A):
+    values, first = np.unique(_array(A), return_index=True)
+    wanted = (values >= 1) & (values <= X)
+    if wanted.sum() < X:
+        return -1
+    return int(first[wanted].max())
+
+def genomic_range_query_np(S, P, Q):
+    if isinstance(S, str):
+        S = S.encode('ascii')
+    codes = np.frombuffer(S, dtype=np.uint8) if isinstance(S, bytes) else np.asarray(S, dtype=np.uint8)
+    impact = np.zeros(256, dtype=np.int8)
+    for nucleotide, value in zip(b'ACGT', range(1, 5)):
+        impact[nucleotide] = value
+    kinds = impact[codes]
+
+    p = _array(P)
+    q = _array(Q) + 1
+    answers = np.full(len(p), 4, dtype=np.int64)
+    # Walk from the largest impact down so the smallest one present wins
+    for value in (3, 2, 1):
+        prefix = np.concatenate(([0], np.cumsum(kinds == value)))
+        answers[prefix[q] - prefix[p] > 0] = value
+    return answers.tolist()
+
+def max_product_of_three_np(A):
+    a = np.sort(_array(A))
+    return int(max(a[-1] * a[-2] * a[-3], a[0] * a[1] * a[-1]))
+
+def triangle_np(A):
+    a = np.sort(_array(A))
+    return int(bool((a[:-2] + a[1:-1] > a[2:]).any()))
+
+def passing_cars_np(A):
+    a = _array(A)
+    east_so_far = np.cumsum(a == 0)
+    passing = int(east_so_far[a == 1].sum())
+    return -1 if passing > 1000000000 else passing
+
+def _leader_np(a):
+    """Return (value, count) of the dominator of array a, or (None, 0)"""
+    if not len(a):
+        return None, 0
+    values, counts = np.unique(a, return_counts=True)
+    best = int(np.argmax(counts))
+    if counts[best] * 2 > len(a):
+        return values[best], int(counts[best])
+    return None, 0
+
+def dominator_np(A):
+    a = _array(A)
+    value, _ = _leader_np(a)
+    return int(np.argmax(a == value)) if value is not None else -1
+
+def equi_leader_np(A):
+    a = _array(A)
+    value, total = _leader_np(a)
+    if value is None:
+        return 0
+    n = len(a)
+    left = np.cumsum(a == value)[:-1]
+    left_size = np.arange(1, n)
+    return int(((left * 2 > left_size) & ((total - left) * 2 > n - left_size)).sum())
+
+def max_slice_sum_np(A):
+    prefix = np.concatenate(([0], np.cumsum(_array(A))))
+    return int((prefix[1:] - np.minimum.accumulate(prefix[:-1])).max())
+
+def max_profit_np(A):
+    a = _array(A)
+    if not len(a):
+        return 0
+    return int((a - np.minimum.accumulate(a)).max())
+
+def _clipped_kadane(a):
+    """max(0, best sum of a slice ending at each position), starting from 0"""
+    prefix = np.concatenate(([0], np.cumsum(a)))
+    return prefix - np.minimum.accumulate(prefix)
+
+def max_double_slice_sum_np(A):
+    inner = _array(A)[1:-1]
+    ending = _clipped_kadane(inner)
+    starting = _clipped_kadane(inner[::-1])[::-1]
+    return int((ending[:-1] + starting[1:]).max())
+
+def count_semiprimes_np(N, P, Q):
+    is_prime = np.ones(N + 1, dtype=bool)
+    is_prime[:2] = False
+    for i in range(2, math.isqrt(N) + 1):
+        if is_prime[i]:
+            is_prime[i * i::i] = False
+    primes = np.nonzero(is_prime)[0]
+
+    semiprime = np.zeros(N + 1, dtype=np.int64)
+    for p in primes[primes * primes <= N]:
+        q = primes[(primes >= p) & (primes <= N // p)]
+        semiprime[p * q] = 1
+    prefix = np.cumsum(semiprime)
+    return (prefix[_array(Q)] - prefix[_array(P) - 1]).tolist()
+
+def peaks_np(A):
+    a = _array(A)
+    n = len(a)
+    positions = np.nonzero((a[1:-1] > a[:-2]) & (a[1:-1] > a[2:]))[0] + 1
+    for blocks in range(len(positions), 0, -1):
+        if n % blocks == 0 and np.unique(positions // (n // blocks)).size == blocks:
+            return blocks
+    return 0
+
+VECTORIZED = {} if np is None else {
+    odd_occurrences_in_array: odd_occurrences_in_array_np,
+    cyclic_rotation: cyclic_rotation_np,
+    tape_equilibrium: tape_equilibrium_np,
+    perm_missing_elem: perm_missing_elem_np,
+    perm_check: perm_check_np,
+    missing_integer: missing_integer_np,
+    frog_river_one: frog_river_one_np,
+    genomic_range_query: genomic_range_query_np,
+    max_product_of_three: max_product_of_three_np,
+    triangle: triangle_np,
+    passing_cars: passing_cars_np,
+    dominator: dominator_np,
+    equi_leader: equi_leader_np,
+    max_slice_sum: max_slice_sum_np,
+    max_profit: max_profit_np,
+    max_double_slice_sum: max_double_slice_sum_np,
+    count_semiprimes: count_semiprimes_np,
+    peaks: peaks_np,
+}
+
+def vectorized(solution):
+    """The NumPy version of a reference solution, or None"""
+    return VECTORIZED.get(solution)
@@ -0,0 +1,173 @@
+"""Spaced-repetition review queue over task scores.
+
+Each Codility task a user has completed or scored gets a due time from
+its latest review and an SM-2 style interval: a failing score brings it
+back the next day, otherwise the interval starts at a day and grows with
+every repetition by an ease factor between MIN_EASE and MAX_EASE that
+rises with the score. Repeats of a task across the plan ("Redo
+StoneWall", mock tests) count as repetitions of the same task.
+
+Every worker keeps a heap per user, ordered by due time and then by the
+lowest score, built from one query the first time the user asks and
+re-keyed one task at a time as progress changes. Entries that were
+re-keyed stay in the heap marked removed and are discarded when they
+reach the top, so reading the next k tasks costs O(k log n). Queues
+expire after ttl seconds, which bounds how long a change made through
+another worker can go unseen.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+PASS_SCORE = 60
+FIRST_INTERVAL_DAYS = 1
+MIN_EASE = 1.3
+MAX_EASE = 2.5
+# Completed tasks that were never scored count as a comfortable pass
+DEFAULT_SCORE = 80
+DAY_SECONDS = 24 * 3600
+
+def review_interval(score, repetitions):
+    """Days a task can rest after its latest review"""
+    if score is not None and score < PASS_SCORE:
+        return FIRST_INTERVAL_DAYS
+    ease = MIN_EASE + (MAX_EASE - MIN_EASE) * (DEFAULT_SCORE if score is None else score) / 100
+    return FIRST_INTERVAL_DAYS * ease ** max(repetitions - 1, 0)
+
+def task_state(task, rows):
+    """Fold one task's (completed, score, reviewed_at) rows into its review state.
+
+    Returns None when the task was neither completed nor scored.
+    """
+    repetitions = sum(1 for completed, _, _ in rows if completed)
+    scored = [(reviewed_at.timestamp() if reviewed_at else 0.0, score)
+              for _, score, reviewed_at in rows if score is not None]
+    if not repetitions and not scored:
+        return None
+    reviewed = [reviewed_at for _, _, reviewed_at in rows if reviewed_at is not None]
+    return {
+        'task': task,
+        'score': max(scored)[1] if scored else None,   # the latest score
+        'repetitions': repetitions,
+        'reviewed_at': max(reviewed) if reviewed else None,
+    }
+
+def due_time(state):
+    """Unix time the task is due; tasks never timestamped are due now"""
+    if state['reviewed_at'] is None:
+        return 0.0
+    return state['reviewed_at'].timestamp() + review_interval(state['score'], state['repetitions']) * DAY_SECONDS
+
+class _UserQueue:
+    __slots__ = ('heap', 'entries', 'expires', 'sequence')
+
+    def __init__(self, expires):
+        self.heap = []
+        self.entries = {}   # task -> its live heap entry
+        self.expires = expires
+        self.sequence = itertools.count()   # keeps stale duplicates from comparing states
+
+    def push(self, state):
+        old = self.entries.pop(state['task'], None)
+        if old is not None:
+            old[-1] = None   # removed; dropped when it reaches the top
+        score = DEFAULT_SCORE if state['score'] is None else state['score']
+        entry = [due_time(state), score, state['task'], next(self.sequence), state]
+        self.entries[state['task']] = entry
+        heapq.heappush(self.heap, entry)
+
+    def remove(self, task):
+        old = self.entries.pop(task, None)
+        if old is not None:
+            old[-1] = None
+
+    def peek(self, limit):
+        """The first limit live entries, leaving the heap as it was"""
+        taken = []
+        while self.heap and len(taken) < limit:
+            entry = heapq.heappop(self.heap)
+            if entry[-1] is not None:
+                taken.append(entry)
+        for entry in taken:
+            heapq.heappush(self.heap, entry)
+        return taken
+
+class ReviewScheduler:
+    """Per-user review heaps with a TTL and LRU eviction.
+
+    load(user_id) returns {task: state} for every task the user has
+    attempted; it is only called when the user has no fresh queue.
+    """
+
+    def __init__(self, load, max_users=256, ttl=60):
+        self.load = load
+        self.max_users = max_users
+        self.ttl = ttl
+        self.builds = 0
+        self.updates = 0
+        self._lock = threading.Lock()
+        self._queues = OrderedDict()
+
+    def _fresh_queue(self, user_id):
+        queue = self._queues.get(user_id)
+        if queue is not None and queue.expires < time.monotonic():
+            del self._queues[user_id]
+            return None
+        return queue
+
+    def next(self, user_id, limit, now=None):
+        """The limit tasks due soonest as (state, due, overdue) tuples"""
+        now = time.time() if now is None else now
+        with self._lock:
+            queue = self._fresh_queue(user_id)
+            if queue is not None:
+                self._queues.move_to_end(user_id)
+                return self._peek(queue, limit, now)
+
+        # Built outside the lock so one user's query never stalls another
+        queue = _UserQueue(time.monotonic() + self.ttl)
+        for state in self.load(user_id).values():
+            queue.push(state)
+        with self._lock:
+            self._queues[user_id] = queue
+            self._queues.move_to_end(user_id)
+            self.builds += 1
+            while len(self._queues) > self.max_users:
+                self._queues.popitem(last=False)
+            return self._peek(queue, limit, now)
+
+    @staticmethod
+    def _peek(queue, limit, now):
+        return [(entry[-1], entry[0], entry[0] <= now) for entry in queue.peek(limit)]
+
+    def is_loaded(self, user_id):
+        with self._lock:
+            return self._fresh_queue(user_id) is not None
+
+    def update(self, user_id, states):
+        """Re-key tasks in user_id's queue from {task: state or None}, if it is loaded"""
+        with self._lock:
+            queue = self._fresh_queue(user_id)
+            if queue is None:
+                return
+            for task, state in states.items():
+                if state is None:
+                    queue.remove(task)
+                else:
+                    queue.push(state)
+            self.updates += 1
+
+    def invalidate(self, user_id=None):
+        """Drop one user's queue (or everyone's) so it is rebuilt on next use"""
+        with self._lock:
+            if user_id is None:
+                self._queues.clear()
+            else:
+                self._queues.pop(user_id, None)
+
+    def stats(self):
+        with self._lock:
+            return {'users': len(self._queues), 'builds': self.builds, 'updates': self.updates}
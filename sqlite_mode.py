@@ -0,0 +1,131 @@
+"""SQLite settings for several gunicorn workers sharing one database file.
+
+Every connection switches the database to WAL, so readers keep going while
+a write commits, sets busy_timeout so a blocked writer waits instead of
+failing with "database is locked", and lowers synchronous to NORMAL, which
+in WAL mode can lose the last commits on power loss but never corrupts
+the file.
+
+On top of that, write views run inside a write section: an flock on a
+lock file next to the database, held for the whole read-modify-write.
+Writers from every worker queue on the lock instead of polling in SQLite's
+busy handler, two toggles of the same row can no longer both read the old
+value, and a view that still hits a lock error is rolled back and re-run.
+Other databases get a no-op section.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; writes then rely on busy_timeout
+    fcntl = None
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL').upper()
+SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+POOL_SIZE = 5
+MAX_OVERFLOW = 10
+WRITE_RETRIES = 5
+RETRY_DELAY = 0.05
+
+def is_file_database(uri):
+    """True for a SQLite URL backed by a file rather than memory"""
+    url = make_url(uri)
+    if url.get_backend_name() != 'sqlite':
+        return False
+    return bool(url.database) and url.database != ':memory:' and url.query.get('mode') != 'memory'
+
+def engine_options(uri):
+    """SQLALCHEMY_ENGINE_OPTIONS for uri; empty unless it is a SQLite file"""
+    if not is_file_database(uri):
+        return {}
+    # A small pool of long-lived connections keeps the per-connection
+    # pragmas and page cache instead of reopening the file per request
+    return {
+        'pool_size': POOL_SIZE,
+        'max_overflow': MAX_OVERFLOW,
+        'connect_args': {'timeout': BUSY_TIMEOUT_MS / 1000},
+    }
+
+def _set_pragmas(dbapi_connection, connection_record):
+    if SYNCHRONOUS not in SYNCHRONOUS_LEVELS:
+        raise ValueError(f'SQLITE_SYNCHRONOUS must be one of {", ".join(SYNCHRONOUS_LEVELS)}')
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+    cursor.execute(f'PRAGMA synchronous={SYNCHRONOUS}')
+    cursor.close()
+
+def is_lock_error(error):
+    orig = getattr(error, 'orig', None)
+    return isinstance(orig, sqlite3.OperationalError) and ('locked' in str(orig) or 'busy' in str(orig))
+
+class WriteSerializer:
+    """Cross-process write section for one SQLite file (a no-op when lock_path is None)"""
+
+    def __init__(self, lock_path=None):
+        self.lock_path = lock_path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._fd = None
+        self.retries = 0
+
+    @contextmanager
+    def section(self):
+        if self.lock_path is None:
+            yield
+            return
+        # flock is per open file, so threads of one worker take turns on
+        # the thread lock and share the worker's descriptor; nested
+        # sections only lock once
+        with self._thread_lock:
+            outermost = self._depth == 0 and fcntl is not None
+            if outermost:
+                if self._fd is None:
+                    self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            self._depth += 1
+            try:
+                yield
+            finally:
+                self._depth -= 1
+                if outermost:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def retrying(self, session):
+        """Decorator running a view in the write section, re-running it on lock errors"""
+        def decorator(f):
+            if self.lock_path is None:
+                return f
+
+            @wraps(f)
+            def decorated_function(*args, **kwargs):
+                for attempt in range(WRITE_RETRIES):
+                    try:
+                        with self.section():
+                            return f(*args, **kwargs)
+                    except OperationalError as e:
+                        session.rollback()
+                        if not is_lock_error(e) or attempt == WRITE_RETRIES - 1:
+                            raise
+                        self.retries += 1
+                    time.sleep(RETRY_DELAY * 2 ** attempt)
+            return decorated_function
+        return decorator
+
+def setup(engine):
+    """Apply the SQLite settings to engine; return its WriteSerializer"""
+    if not is_file_database(engine.url):
+        return WriteSerializer()
+    event.listen(engine, 'connect', _set_pragmas)
+    return WriteSerializer(f'{engine.url.database}.write-lock')
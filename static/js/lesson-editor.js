@@ -102,11 +102,17 @@ saveBtn?.addEventListener('click', async () => {
     saveStatus.className = 'save-status saving';
 
     try {
+        const headers = {
+            'Content-Type': 'application/json'
+        };
+        // Refuse to overwrite edits saved by someone else since page load
+        if (lessonEditor.dataset.etag) {
+            headers['If-Match'] = '"' + lessonEditor.dataset.etag + '"';
+        }
+
         const response = await fetch('/api/save_lesson', {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
+            headers: headers,
             body: JSON.stringify({
                 lesson_file: lessonFile,
                 content: content
@@ -1,9 +1,40 @@
 #!/usr/bin/env python
 """Test script to verify the application setup"""
 
+import json
+import os
+import re
 import sys
+from pathlib import Path
+from contextlib import contextmanager
+from sqlalchemy import event
 from app import app, db
 
+@contextmanager
+def count_queries():
+    """Collect the SQL statements executed on db.engine inside the block"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+def run_check(check):
+    """Run an assert-based check and report it like the other tests"""
+    try:
+        check()
+        return True
+    except AssertionError as e:
+        print(f"\n❌ {check.__name__} failed: {e}")
+        return False
+
 def test_database():
     """Test database creation and basic operations"""
     print("Testing database setup...")
@@ -19,13 +50,14 @@ def test_database():
             print("✓ Models imported successfully")
 
             # Test adding a record
-            test_day = DayProgress(week=1, day=1, completed=False)
+            # Week 0 is outside the plan, so this never collides with real progress
+            test_day = DayProgress(week=0, day=0, completed=False)
             db.session.add(test_day)
             db.session.commit()
             print("✓ Test record added successfully")
 
             # Test querying
-            result = DayProgress.query.filter_by(week=1, day=1).first()
+            result = DayProgress.query.filter_by(week=0, day=0).first()
             if result:
                 print("✓ Test record retrieved successfully")
 
@@ -70,6 +102,1036 @@ def test_routes():
             print(f"\n❌ Route test failed: {e}")
             return False
 
+def test_week_view_query_count():
+    """Week pages load all progress in a fixed number of queries"""
+    print("\nTesting week view query count...")
+
+    with app.app_context():
+        db.create_all()
+
+    with app.test_client() as client:
+        for week_num in (1, 8):
+            with count_queries() as statements:
+                response = client.get(f'/week/{week_num}')
+            assert response.status_code == 200, f"/week/{week_num} returned {response.status_code}"
+            assert len(statements) <= 2, f"/week/{week_num} ran {len(statements)} queries"
+            print(f"✓ /week/{week_num} ran {len(statements)} queries")
+
+def test_lesson_render_cache():
+    """Repeat lesson views are served from the render cache"""
+    print("\nTesting lesson render cache...")
+    from app import lesson_cache
+
+    lesson_cache.clear()
+    with app.test_client() as client:
+        first = client.get('/lessons/week1-foundations.md')
+        second = client.get('/lessons/week1-foundations.md')
+
+    assert first.status_code == 200 and second.status_code == 200, "lesson view failed"
+    assert first.data == second.data, "cached render differs from first render"
+    stats = lesson_cache.stats()
+    assert stats['misses'] == 1 and stats['hits'] == 1, f"unexpected cache stats {stats}"
+    print("✓ Second lesson view was a cache hit")
+
+def test_lesson_build():
+    """Lessons are served from the ahead-of-time build, gzipped around the prebuilt segment"""
+    print("\nTesting lesson build...")
+    import gzip
+    import tempfile
+    import app as app_module
+    from lesson_build import compile_lessons, seed_cache
+
+    lessons_dir = Path(app.root_path) / 'lessons'
+    saved = app_module.lesson_manifest, app_module.LESSON_BUILD_DIR
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = compile_lessons(lessons_dir, tmp)
+        entry = manifest['lessons']['week1-foundations.md']
+        segment = Path(tmp, entry['segment']).read_bytes()
+        assert compile_lessons(lessons_dir, tmp) == manifest, "unchanged lessons were rebuilt differently"
+
+        app_module.lesson_cache.clear()
+        assert seed_cache(app_module.lesson_cache, manifest, lessons_dir, tmp) == len(manifest['lessons'])
+        try:
+            app_module.lesson_manifest, app_module.LESSON_BUILD_DIR = manifest, Path(tmp)
+            client = app.test_client()
+            identity = client.get('/lessons/week1-foundations.md')
+            assert identity.status_code == 200 and 'Content-Encoding' not in identity.headers
+            assert app_module.lesson_cache.stats()['misses'] == 0, "seeded lesson was rendered again"
+            print("✓ Compiled lessons are seeded into the render cache")
+
+            for accept, expected in [('gzip', 'gzip'), ('br, gzip', 'gzip'), ('br', None),
+                                     ('gzip;q=0, br', None), ('identity', None)]:
+                response = client.get('/lessons/week1-foundations.md', headers={'Accept-Encoding': accept})
+                assert response.headers.get('Content-Encoding') == expected, \
+                    f"Accept-Encoding {accept!r} got {response.headers.get('Content-Encoding')}"
+                assert 'Accept-Encoding' in response.headers['Vary'], "Vary misses Accept-Encoding"
+                data = gzip.decompress(response.data) if expected else response.data
+                assert data == identity.data, f"{accept!r} body differs from the identity page"
+                if expected:
+                    assert segment in response.data, "prebuilt segment was not spliced in"
+            print("✓ Lesson pages are gzipped from the prebuilt segment only when accepted")
+
+            response = client.get('/lessons/week1-foundations.md',
+                                  headers={'Accept-Encoding': 'gzip', 'If-None-Match': identity.headers['ETag']})
+            assert response.status_code == 304 and not response.data, "current page was not revalidated"
+            print("✓ Revalidating a compiled lesson returns 304")
+        finally:
+            app_module.lesson_manifest, app_module.LESSON_BUILD_DIR = saved
+            app_module.lesson_cache.clear()
+
+def test_lesson_conditional_requests():
+    """Lesson endpoints answer 304 for current copies and 412 for stale saves"""
+    print("\nTesting lesson conditional requests...")
+    import time
+    from pathlib import Path
+    from app import User
+
+    lesson_path = Path(app.root_path) / 'lessons' / '_conditional_test.md'
+    lesson_path.write_text('# Conditional\n\nfirst\n', encoding='utf-8')
+
+    with app.app_context():
+        db.create_all()
+        admin = User(username='_conditional_admin', is_admin=True)
+        admin.set_password('secret')
+        db.session.add(admin)
+        db.session.commit()
+
+    try:
+        with app.test_client() as client:
+            response = client.get('/api/get_lesson_content?lesson_file=_conditional_test.md')
+            etag = response.headers['ETag']
+            response = client.get('/api/get_lesson_content?lesson_file=_conditional_test.md',
+                                  headers={'If-None-Match': etag})
+            assert response.status_code == 304, f"expected 304, got {response.status_code}"
+            print("✓ Unchanged lesson content returns 304")
+
+            import app as app_module
+            page = client.get('/lessons/_conditional_test.md')
+            validators = {'If-None-Match': page.headers['ETag']}
+            assert client.get('/lessons/_conditional_test.md', headers=validators).status_code == 304, \
+                "unchanged lesson page was not revalidated"
+            saved = app_module.asset_build_id, app_module.asset_build_modified
+            try:
+                # A redeploy with new asset fingerprints must not 304 the old page
+                app_module.asset_build_id, app_module.asset_build_modified = 'newbuild', time.time() + 60
+                assert client.get('/lessons/_conditional_test.md', headers=validators).status_code == 200, \
+                    "lesson page linking the previous build's assets was revalidated"
+                since = {'If-Modified-Since': page.headers['Last-Modified']}
+                assert client.get('/lessons/_conditional_test.md', headers=since).status_code == 200, \
+                    "If-Modified-Since ignored the asset build"
+            finally:
+                app_module.asset_build_id, app_module.asset_build_modified = saved
+            print("✓ Lesson page validators change with the asset build")
+
+            client.post('/login', data={'username': '_conditional_admin', 'password': 'secret'})
+            payload = {'lesson_file': '_conditional_test.md', 'content': '# Conditional\n\nsecond\n'}
+            response = client.post('/api/save_lesson', json=payload, headers={'If-Match': etag})
+            assert response.status_code == 200, f"save with current ETag failed: {response.status_code}"
+
+            payload['content'] = '# Conditional\n\nthird\n'
+            response = client.post('/api/save_lesson', json=payload, headers={'If-Match': etag})
+            assert response.status_code == 412, f"stale save returned {response.status_code}"
+            assert 'second' in lesson_path.read_text(encoding='utf-8'), "stale save overwrote the lesson"
+            print("✓ Save with a stale If-Match returns 412")
+    finally:
+        lesson_path.unlink()
+        with app.app_context():
+            User.query.filter_by(username='_conditional_admin').delete()
+            db.session.commit()
+
+def test_progress_counters():
+    """Toggles keep the homepage counters in step with the raw tables"""
+    print("\nTesting progress counters...")
+    from app import DayProgress, TaskProgress, GUEST_USER_ID, get_overall_stats, rebuild_progress_counters
+
+    with app.app_context():
+        db.create_all()
+        rebuild_progress_counters()
+        before = get_overall_stats(GUEST_USER_ID)
+
+    with app.test_client() as client:
+        client.post('/api/toggle_day', json={'week': 1, 'day': 3})
+        client.post('/api/toggle_task', json={'week': 1, 'day': 3, 'task_name': 'CyclicRotation'})
+
+        with app.app_context():
+            toggled = get_overall_stats(GUEST_USER_ID)
+            expected_days = DayProgress.query.filter_by(user_id=GUEST_USER_ID, completed=True).count()
+            expected_tasks = TaskProgress.query.filter_by(user_id=GUEST_USER_ID, completed=True).count()
+        assert toggled['completed_days'] == expected_days, "day counter out of step"
+        assert toggled['completed_tasks'] == expected_tasks, "task counter out of step"
+
+        with count_queries() as statements:
+            with app.app_context():
+                get_overall_stats(GUEST_USER_ID)
+        assert len(statements) == 1, f"stats read ran {len(statements)} queries"
+        print("✓ Counters track toggles and are read in one query")
+
+        # Toggle back to leave the database as it was
+        client.post('/api/toggle_day', json={'week': 1, 'day': 3})
+        client.post('/api/toggle_task', json={'week': 1, 'day': 3, 'task_name': 'CyclicRotation'})
+
+    with app.app_context():
+        assert get_overall_stats(GUEST_USER_ID) == before, "counters did not return to their starting values"
+
+def test_progress_batch():
+    """Batch mutations apply in one request and keep counters in step"""
+    print("\nTesting batch progress endpoint...")
+    from app import PLAN, DayProgress, GUEST_USER_ID, get_overall_stats
+
+    with app.app_context():
+        db.create_all()
+        before = get_overall_stats(GUEST_USER_ID)
+
+    week_days = list(PLAN.weeks[2].days)
+    with app.test_client() as client:
+        mark_done = [{'op': 'set_day', 'week': 2, 'day': day, 'completed': True} for day in week_days]
+        response = client.post('/api/progress/batch', json={'mutations': mark_done + mark_done})
+        assert response.status_code == 200, f"batch failed with {response.status_code}"
+
+        with app.app_context():
+            done = DayProgress.query.filter_by(user_id=GUEST_USER_ID, week=2, completed=True).count()
+            stats = get_overall_stats(GUEST_USER_ID)
+        assert done == len(week_days), f"expected {len(week_days)} completed days, found {done}"
+        assert stats['completed_days'] == before['completed_days'] + len(week_days), "day counter out of step"
+        print("✓ Whole week marked done in one batch")
+
+        response = client.post('/api/progress/batch', json={'mutations': [
+            {'op': 'toggle_task', 'week': 2, 'day': week_days[0], 'task_name': 'PermCheck'},
+            {'op': 'unknown', 'week': 2, 'day': week_days[0]},
+        ]})
+        assert response.status_code == 400, "invalid batch was accepted"
+        for body in ([mark_done[0]], 'mutations', 3):
+            response = client.post('/api/progress/batch', json=body)
+            assert response.status_code == 400, f"non-object body {body!r} returned {response.status_code}"
+        print("✓ Invalid batch is rejected as a whole")
+
+        mark_undone = [dict(m, completed=False) for m in mark_done]
+        client.post('/api/progress/batch', json={'mutations': mark_undone})
+
+    with app.app_context():
+        assert get_overall_stats(GUEST_USER_ID) == before, "batch cleanup did not restore counters"
+
+def test_per_user_progress():
+    """Logged-in users each see only their own progress"""
+    print("\nTesting per-user progress...")
+    from app import User, DayProgress, TaskProgress, ProgressCounter, get_overall_stats
+
+    with app.app_context():
+        db.create_all()
+        users = []
+        for username in ('_progress_alice', '_progress_bob'):
+            user = User(username=username)
+            user.set_password('secret')
+            db.session.add(user)
+            users.append(user)
+        db.session.commit()
+        alice_id, bob_id = [user.id for user in users]
+
+    try:
+        alice = app.test_client()
+        alice.post('/login', data={'username': '_progress_alice', 'password': 'secret'})
+        alice.post('/api/toggle_day', json={'week': 1, 'day': 5})
+        alice.post('/api/toggle_task', json={'week': 1, 'day': 5, 'task_name': 'TapeEquilibrium'})
+
+        bob = app.test_client()
+        bob.post('/login', data={'username': '_progress_bob', 'password': 'secret'})
+        assert 'checked' not in bob.get('/week/1').get_data(as_text=True).split('Day 5:')[1].split('Day 6:')[0], \
+            "bob sees alice's progress"
+
+        with app.app_context():
+            assert get_overall_stats(alice_id)['completed_days'] == 1, "alice's day was not counted"
+            assert get_overall_stats(bob_id)['completed_days'] == 0, "bob's stats include alice's day"
+        print("✓ Progress and stats are scoped to the logged-in user")
+    finally:
+        with app.app_context():
+            for model in (DayProgress, TaskProgress, ProgressCounter):
+                model.query.filter(model.user_id.in_([alice_id, bob_id])).delete()
+            User.query.filter(User.id.in_([alice_id, bob_id])).delete()
+            db.session.commit()
+
+def test_cached_user_loader():
+    """Authenticated requests reuse the cached user until it changes"""
+    print("\nTesting cached user loader...")
+    from app import User, user_cache
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='_cached_user')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    try:
+        with app.test_client() as client:
+            client.post('/login', data={'username': '_cached_user', 'password': 'secret'})
+            client.get('/week/1')
+
+            with count_queries() as statements:
+                response = client.get('/week/1')
+            assert response.status_code == 200, f"/week/1 returned {response.status_code}"
+            assert not any('FROM user' in s for s in statements), "user was loaded from the database"
+            assert '_cached_user' in response.get_data(as_text=True), "cached user missing from page"
+            print("✓ Authenticated page view needed no user query")
+
+            with app.app_context():
+                db.session.get(User, user_id).is_admin = True
+                db.session.flush()
+                assert user_cache.get(user_id) is not None, "cache was invalidated before the commit"
+                db.session.rollback()
+            assert user_cache.get(user_id) is not None, "rolled back change invalidated the cache"
+
+            with app.app_context():
+                db.session.get(User, user_id).is_admin = True
+                db.session.commit()
+            assert user_cache.get(user_id) is None, "is_admin change did not invalidate the cache"
+
+            with count_queries() as statements:
+                client.get('/week/1')
+            assert any('FROM user' in s for s in statements), "user was not reloaded after invalidation"
+            print("✓ Changing the user invalidates the cache")
+
+        import tempfile
+        from user_cache import UserIdentityCache
+        with tempfile.TemporaryDirectory() as tmp:
+            stamp = os.path.join(tmp, 'user_cache.stamp')
+            worker, script = UserIdentityCache(stamp), UserIdentityCache(stamp)
+            worker.put(1, {'password_hash': 'old'})
+            script.invalidate(1)   # e.g. reset_password.py
+            worker.invalidate(2)   # before worker next reads user 1
+            assert worker.get(1) is None, "another process's invalidation was swallowed"
+        print("✓ Local invalidations keep earlier cross-process ones")
+    finally:
+        with app.app_context():
+            User.query.filter_by(id=user_id).delete()
+            db.session.commit()
+
+def test_progress_export_import():
+    """Exported progress can be imported back, and re-importing is idempotent"""
+    print("\nTesting progress export/import...")
+    from app import User, DayProgress, TaskProgress, ProgressCounter, get_overall_stats
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='_export_user')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    try:
+        with app.test_client() as client:
+            client.post('/login', data={'username': '_export_user', 'password': 'secret'})
+            client.post('/api/toggle_day', json={'week': 1, 'day': 2})
+            client.post('/api/update_notes', json={'week': 1, 'day': 2, 'notes': 'two pointers'})
+            client.post('/api/update_task_score', json={'week': 1, 'day': 2, 'task_name': 'OddOccurrencesInArray', 'score': 80})
+
+            response = client.get('/api/progress/export')
+            assert response.mimetype == 'application/x-ndjson', f"export returned {response.mimetype}"
+            lines = response.get_data(as_text=True).splitlines()
+            assert json.loads(lines[0])['type'] == 'header', "export has no header line"
+            assert len(lines) == 3 and all('user_id' not in json.loads(line) for line in lines), \
+                f"unexpected export lines: {lines}"
+            assert client.get('/api/progress/export?scope=all').status_code == 403, "non-admin exported all users"
+
+            with app.app_context():
+                DayProgress.query.filter_by(user_id=user_id).delete()
+                TaskProgress.query.filter_by(user_id=user_id).delete()
+                db.session.commit()
+
+            body = '\n'.join(lines + lines) + '\n'
+            result = client.post('/api/progress/import', data=body, content_type='application/x-ndjson').get_json()
+            assert result['success'] and result['imported'] == {'day': 1, 'task': 1}, f"import returned {result}"
+            assert client.get('/api/progress/export').get_data(as_text=True).splitlines()[1:] == lines[1:], \
+                "round trip changed the rows"
+
+            # A complexity imported without its confidence still renders
+            task_line = dict(json.loads(lines[2]), task_name='Binary Gap', complexity='O(n)', complexity_confidence=None)
+            client.post('/api/progress/import', data=json.dumps(task_line) + '\n', content_type='application/x-ndjson')
+            week = client.get('/week/1')
+            assert week.status_code == 200 and b'complexity-badge' in week.data, "week view failed without confidence"
+
+            bad =client.post('/api/progress/import', data='{"type": "day", "week": "x"}\n')
+            assert bad.status_code == 400 and 'line 1' in bad.get_json()['error'], "bad line was accepted"
+
+        with app.app_context():
+            assert get_overall_stats(user_id)['completed_days'] == 1, "counters were not rebuilt"
+        print("✓ NDJSON export round-trips through import")
+    finally:
+        with app.app_context():
+            for model in (DayProgress, TaskProgress, ProgressCounter):
+                model.query.filter(model.user_id == user_id).delete()
+            User.query.filter_by(id=user_id).delete()
+            db.session.commit()
+
+def test_migrations():
+    """migrate_db upgrades a baseline database, merging duplicates, and is idempotent"""
+    print("\nTesting database migrations...")
+    import sqlite3
+    import subprocess
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'baseline.db')
+        # The schema before any migration: no user_id, no unique keys
+        conn = sqlite3.connect(path)
+        conn.executescript("""
+            CREATE TABLE day_progress (id INTEGER PRIMARY KEY, week INTEGER NOT NULL, day INTEGER NOT NULL,
+                                       completed BOOLEAN, notes TEXT, completed_date DATETIME);
+            CREATE TABLE task_progress (id INTEGER PRIMARY KEY, week INTEGER NOT NULL, day INTEGER NOT NULL,
+                                        task_name VARCHAR(200) NOT NULL, completed BOOLEAN, score INTEGER, notes TEXT);
+            INSERT INTO day_progress (week, day, completed, notes, completed_date)
+                VALUES (1, 1, 1, 'first', '2024-01-01 00:00:00'), (1, 1, 0, '', NULL), (1, 2, 1, '', NULL);
+            INSERT INTO task_progress (week, day, task_name, completed, score, notes)
+                VALUES (1, 1, 'BinaryGap', 0, 80, 'older'), (1, 1, 'BinaryGap', 1, 50, 'newer'),
+                       (1, 1, 'BinaryGap', 0, NULL, '');
+        """)
+        conn.close()
+
+        env = dict(os.environ, DATABASE_URL=f'sqlite:///{path}')
+        env.pop('WRITE_BEHIND_DIR', None)
+        script = ('import migrate_db; migrate_db.migrate(); migrate_db.migrate(); '
+                  'from sqlalchemy import text\n'
+                  'with migrate_db.app.app_context(), migrate_db.db.engine.begin() as conn:\n'
+                  '    conn.execute(text("DELETE FROM schema_migrations"))\n'
+                  'migrate_db.migrate()')
+        result = subprocess.run([sys.executable, '-c', script], cwd=app.root_path, env=env,
+                                capture_output=True, text=True, timeout=120)
+        assert result.returncode == 0, result.stderr
+        runs = result.stdout.split('✅ Applied')
+        assert len(runs) == 3 and 'Database schema is up to date' in runs[1], result.stdout
+        assert 'Merged' not in runs[2] and 'Scoped' not in runs[2] and 'Added' not in runs[2], \
+            f"re-applied steps changed the database again: {runs[2]}"
+
+        conn = sqlite3.connect(path)
+        try:
+            days = conn.execute("SELECT user_id, week, day, completed, notes, completed_date "
+                                "FROM day_progress ORDER BY day").fetchall()
+            tasks = conn.execute("SELECT user_id, completed, score, notes, complexity, complexity_confidence, "
+                                 "reviewed_at FROM task_progress").fetchall()
+            unique = {tuple(row[2] for row in conn.execute(f"PRAGMA index_info('{name}')"))
+                      for _, name, is_unique, *_ in conn.execute("PRAGMA index_list('task_progress')") if is_unique}
+            versions = [row[0] for row in conn.execute("SELECT version FROM schema_migrations ORDER BY version")]
+        finally:
+            conn.close()
+
+    assert days == [(0, 1, 1, 1, 'first', '2024-01-01 00:00:00'), (0, 1, 2, 1, '', None)], days
+    assert tasks == [(0, 1, 80, 'newer', None, None, None)], tasks
+    print("✓ Duplicate rows are merged into the guest board")
+    assert ('user_id', 'week', 'day', 'task_name') in unique, f"unique key missing: {unique}"
+    assert versions == ['0001', '0002', '0003', '0004'], versions
+    print("✓ Unique keys and new columns are in place and re-running changes nothing")
+
+def test_image_upload_dedup():
+    """Uploads are stored under their content hash and sniffed for image data"""
+    print("\nTesting content-addressed image uploads...")
+    import io
+    import tempfile
+    from app import User
+
+    with app.app_context():
+        db.create_all()
+        admin = User(username='_upload_admin', is_admin=True)
+        admin.set_password('secret')
+        db.session.add(admin)
+        db.session.commit()
+
+    upload_folder = app.config['UPLOAD_FOLDER']
+    png = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 4096
+    try:
+        with tempfile.TemporaryDirectory() as tmp, app.test_client() as client:
+            app.config['UPLOAD_FOLDER'] = tmp
+            client.post('/login', data={'username': '_upload_admin', 'password': 'secret'})
+
+            def upload(data, name):
+                return client.post('/api/upload_image', data={'image': (io.BytesIO(data), name)},
+                                   content_type='multipart/form-data')
+
+            first = upload(png, 'diagram.png').get_json()
+            second = upload(png, 'copy.png').get_json()
+            assert first['success'] and not first['duplicate'], f"upload failed: {first}"
+            assert second['url'] == first['url'] and second['duplicate'], "same image was stored twice"
+            assert os.listdir(tmp) == [first['url'].rsplit('/', 1)[1]], f"unexpected files: {os.listdir(tmp)}"
+
+            rejected = upload(b'MZ' + bytes(4096), 'setup.png')
+            assert rejected.status_code == 400, "non-image was accepted"
+            assert len(os.listdir(tmp)) == 1, "rejected upload left a file behind"
+        print("✓ Duplicate uploads share one file and non-images are rejected")
+    finally:
+        app.config['UPLOAD_FOLDER'] = upload_folder
+        with app.app_context():
+            User.query.filter_by(username='_upload_admin').delete()
+            db.session.commit()
+
+def test_fingerprinted_assets():
+    """Built assets are linked by content hash and served precompressed forever"""
+    print("\nTesting fingerprinted static assets...")
+    import tempfile
+    import app as app_module
+    from asset_build import build_assets, build_validators, current_assets
+
+    saved = (app_module.static_assets, app_module.fingerprinted_assets, app_module.ASSET_BUILD_DIR,
+             app_module.asset_build_id, app_module.asset_build_modified)
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = build_assets(app.static_folder, tmp)
+        assert 'css/style.css' in manifest['assets'], "stylesheet was not built"
+        try:
+            app_module.ASSET_BUILD_DIR = Path(tmp)
+            app_module.static_assets = current_assets(manifest, app.static_folder)
+            app_module.fingerprinted_assets = {e['path']: e for e in app_module.static_assets.values()}
+            app_module.asset_build_id, app_module.asset_build_modified = \
+                build_validators(app_module.static_assets)
+
+            client = app.test_client()
+            page = client.get('/playground').get_data(as_text=True)
+            url = re.search(r'href="(/assets/css/style\.[0-9a-f]{16}\.css)"', page)
+            assert url, "page does not link the fingerprinted stylesheet"
+
+            response = client.get(url.group(1), headers={'Accept-Encoding': 'gzip'})
+            assert response.headers.get('Content-Encoding') == 'gzip', "gzip variant not served"
+            assert 'immutable' in response.headers['Cache-Control'], response.headers['Cache-Control']
+            assert client.get(url.group(1)).data == Path(app.static_folder, 'css/style.css').read_bytes(), \
+                "identity response differs from the source"
+            assert client.get('/assets/css/style.0000000000000000.css').status_code == 404, "unknown asset served"
+        finally:
+            (app_module.static_assets, app_module.fingerprinted_assets, app_module.ASSET_BUILD_DIR,
+             app_module.asset_build_id, app_module.asset_build_modified) = saved
+    print("✓ Assets are fingerprinted, precompressed and cached as immutable")
+
+def test_metrics():
+    """/metrics reports per-endpoint requests and SQL counts, summed across workers"""
+    print("\nTesting request metrics...")
+    import tempfile
+    from metrics import MetricsRegistry
+
+    client = app.test_client()
+    client.get('/week/1')
+    body = client.get('/metrics').get_data(as_text=True)
+    assert re.search(r'^http_requests_total\{endpoint="week_view",method="GET",status="200"\} \d+$', body, re.M), \
+        "week_view requests not counted"
+    assert 'sql_queries_per_request_bucket{endpoint="week_view",le="+Inf"}' in body, "SQL counts missing"
+    print("✓ Requests and queries are recorded per endpoint")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = MetricsRegistry(tmp)
+        registry.inc('http_requests_total', ('index', 'GET', '200'))
+        registry.observe('http_request_duration_seconds', ('index', 'GET'), 0.02)
+        # Snapshot left by another worker
+        with open(os.path.join(tmp, 'metrics-1.json'), 'w') as f:
+            json.dump({'http_requests_total': [[['index', 'GET', '200'], 2]],
+                       'http_request_duration_seconds': [[['index', 'GET'], [0, 0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0.04]]]}, f)
+        body = registry.render()
+
+        # A later worker that reuses this pid keeps its own snapshot
+        successor = MetricsRegistry(tmp)
+        successor.inc('http_requests_total', ('index', 'GET', '200'))
+        successor.flush(force=True)
+        reused = successor.render()
+        assert len(os.listdir(tmp)) == 3, f"snapshots overwritten: {os.listdir(tmp)}"
+    assert 'http_requests_total{endpoint="index",method="GET",status="200"} 3' in body, "workers not summed"
+    assert 'http_request_duration_seconds_count{endpoint="index",method="GET"} 2' in body, "histograms not summed"
+    assert 'http_requests_total{endpoint="index",method="GET",status="200"} 4' in reused, "counter went backwards"
+    print("✓ Worker snapshots are aggregated")
+
+def test_sqlite_concurrent_writes():
+    """SQLite runs in WAL mode and concurrent toggles of one row are not lost"""
+    print("\nTesting SQLite concurrency mode...")
+    import threading
+    from sqlalchemy import text
+    from app import TaskProgress, GUEST_USER_ID, rebuild_progress_counters, write_serializer
+
+    with app.app_context():
+        db.create_all()
+        if db.engine.dialect.name != 'sqlite':
+            print("✓ Skipped: not running on SQLite")
+            return
+        assert db.session.execute(text('PRAGMA journal_mode')).scalar() == 'wal', "WAL not enabled"
+        assert db.session.execute(text('PRAGMA busy_timeout')).scalar() > 0, "busy_timeout not set"
+        assert write_serializer.lock_path, "write section is disabled"
+
+    body = {'week': 1, 'day': 6, 'task_name': '_concurrent_task'}
+    errors = []
+
+    def toggle_many():
+        client = app.test_client()
+        for _ in range(10):
+            response = client.post('/api/toggle_task', json=body)
+            if response.status_code != 200:
+                errors.append(response.status_code)
+
+    try:
+        threads = [threading.Thread(target=toggle_many) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, f"toggles failed: {errors}"
+        with app.app_context():
+            row = TaskProgress.query.filter_by(user_id=GUEST_USER_ID, task_name='_concurrent_task').one()
+            # 40 toggles end where they started
+            assert row.completed is False, "a concurrent toggle was lost"
+        print("✓ 40 concurrent toggles applied without lock errors or lost updates")
+    finally:
+        with app.app_context():
+            TaskProgress.query.filter_by(user_id=GUEST_USER_ID, task_name='_concurrent_task').delete()
+            db.session.commit()
+            rebuild_progress_counters(GUEST_USER_ID)
+
+def test_write_behind_toggles():
+    """Write-behind toggles answer with the new state, coalesce and survive a crash"""
+    print("\nTesting write-behind toggles...")
+    import subprocess
+    import tempfile
+    import app as app_module
+    from app import TaskProgress, GUEST_USER_ID, apply_journal_entries, rebuild_progress_counters
+    from write_behind import WriteBehindJournal
+
+    body = {'week': 1, 'day': 6, 'task_name': '_journal_task'}
+
+    def stored():
+        with app.app_context():
+            return db.session.query(TaskProgress.completed).filter_by(
+                user_id=GUEST_USER_ID, task_name='_journal_task').scalar()
+
+    saved = app_module.write_behind
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            journal = WriteBehindJournal(tmp, apply_journal_entries, interval=3600)
+            app_module.write_behind = journal
+            client = app.test_client()
+            states = [client.post('/api/toggle_task', json=body).get_json()['completed'] for _ in range(3)]
+            assert states == [True, False, True], f"toggle states were {states}"
+            assert stored() is None, "toggle was committed immediately"
+            assert journal.stats()['coalesced'] == 2, journal.stats()
+            assert journal.flush() == 1 and stored() is True, "coalesced toggle not flushed"
+            print("✓ Three clicks became one write")
+
+            # A journal left behind by a process that died before flushing
+            dead = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'],
+                                  capture_output=True, text=True)
+            with open(os.path.join(tmp, f'journal-{dead.stdout.strip()}.ndjson'), 'w') as f:
+                f.write(json.dumps(dict(body, op='set_task', completed=False, user_id=GUEST_USER_ID)) + '\n')
+                f.write('{"op": "set_task", "wee')
+            assert journal.recover() == 1 and stored() is False, "journal was not replayed"
+            assert not os.listdir(tmp), "replayed journal was not removed"
+            print("✓ Journals of dead workers are replayed")
+
+            # A worker that crashed, then a new worker given the same pid
+            crashed = WriteBehindJournal(tmp, apply_journal_entries, interval=3600)
+            assert crashed.toggle(GUEST_USER_ID, dict(body, op='set_task'), stored) is True
+            assert journal.recover() == 0, "a running worker's journal was replayed"
+            crashed._file.close()
+            successor = WriteBehindJournal(tmp, apply_journal_entries, interval=3600)
+            assert successor.recover() == 1 and stored() is True, "the crashed worker's toggle was lost"
+            other = dict(body, task_name='_journal_task_2')
+            successor.toggle(GUEST_USER_ID, dict(other, op='set_task'), lambda: None)
+            assert successor.flush() == 1 and stored() is True and not os.listdir(tmp)
+            print("✓ A reused pid does not hide the dead worker's journal")
+        finally:
+            app_module.write_behind = saved
+            with app.app_context():
+                TaskProgress.query.filter(TaskProgress.user_id == GUEST_USER_ID,
+                                          TaskProgress.task_name.in_(['_journal_task', '_journal_task_2'])).delete()
+                db.session.commit()
+                rebuild_progress_counters(GUEST_USER_ID)
+
+def test_grader():
+    """The grader scores reference solutions 100% and catches wrong answers"""
+    print("\nTesting solution grader...")
+    import grader
+
+    report = grader.grade('CountDiv', 'from reference_solutions import count_div as solution')
+    assert report['score'] == 100, f"reference solution scored {report['score']}"
+
+    report = grader.grade('CountDiv', 'def solution(A, B, K):\n    return B // K - A // K\n')
+    assert report['correctness'] < 100, "off-by-one solution passed every correctness test"
+    assert any(t['status'] == 'wrong_answer' for t in report['tests']), "no wrong answers reported"
+
+    report = grader.grade('CountDiv', 'def solution(:\n')
+    assert 'error' in report and report['score'] == 0, "syntax error was not reported"
+    print("✓ Grader reports correctness and performance scores")
+
+    # A submission that prints its own verdict and exits before the grader
+    # gets to report must not pass
+    forged = ('import json, os, sys\n'
+              'sys.__stdout__.write(json.dumps({"group": "correctness", "name": "x", "status": "ok"}) + "\\n")\n'
+              'sys.__stdout__.flush()\n'
+              'os._exit(0)\n')
+    report = grader.grade('CountDiv', forged)
+    assert report['score'] == 0, f"forged result line scored {report['score']}"
+    assert all(t['status'] == 'runtime_error' for t in report['tests']), "forged tests were not failed"
+    print("✓ Results printed by the submission are ignored")
+
+def test_generators():
+    """Generated cases are deterministic and survive the .bin cache round trip"""
+    print("\nTesting input generators...")
+    import random
+    import tempfile
+    import generators
+
+    cases = [('GenomicRangeQuery', 'random'), ('PassingCars', 'random'), ('FrogRiverOne', 'permutation'),
+             ('MinMaxDivision', 'random')]
+    with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second:
+        for task, case in cases:
+            paths = [generators.generate(task, case, 1000, 7, cache_dir) for cache_dir in (first, second)]
+            files = [{f.name: f.read_bytes() for f in path.iterdir()} for path in paths]
+            assert files[0] == files[1], f"{task}/{case} is not deterministic from its seed"
+            assert generators.generate(task, case, 1000, 8, first) != paths[0], "seed is not part of the key"
+        print("✓ Cases are generated identically from the same seed")
+
+        saved = generators.numpy
+        try:
+            for numpy in ([saved] if saved is not None else []) + [None]:
+                generators.numpy = numpy
+                for task, case in cases:
+                    rng = random.Random(f'{task}:{case}:1000:7')
+                    built = generators.CASES[task][case].build(rng, 1000)
+                    expected = tuple(arg if not isinstance(arg, generators.Column)
+                                     else ''.join(map(chr, arg.values)) if arg.text else list(arg.values)
+                                     for arg in built)
+                    dataset = generators.load(task, case, 1000, 7, first)
+                    assert dataset.args() == expected, f"{task}/{case} changed in the cache round trip"
+                    for spec, buffer in zip(dataset.meta['args'], dataset.buffers):
+                        if spec['kind'] == 'array':
+                            mapped = generators.numpy.memmap if numpy is not None else memoryview
+                            assert isinstance(buffer, mapped), f"{task}/{case} loaded as {type(buffer)}"
+        finally:
+            generators.numpy = saved
+
+        spec = generators.load('PassingCars', 'random', 1000, 7, first).meta['args'][0]
+        assert spec['typecode'] == 'b' and not spec['text'], spec
+        spec = generators.load('GenomicRangeQuery', 'random', 1000, 7, first).meta['args'][0]
+        assert spec['typecode'] == 'B' and spec['text'], spec
+    print("✓ Cached columns load back as memmaps or mmap views with their typecodes")
+
+def test_complexity_fit():
+    """The complexity fit recognises synthetic timings of each class"""
+    print("\nTesting complexity estimator fit...")
+    import math
+    import complexity
+
+    sizes = [2 ** k for k in range(8, 18)]
+    shapes = {
+        'O(1)': lambda n: 1.0,
+        'O(log n)': lambda n: math.log2(n),
+        'O(n)': lambda n: n,
+        'O(n log n)': lambda n: n * math.log2(n),
+        'O(n^2)': lambda n: n * n,
+    }
+    for expected, shape in shapes.items():
+        # 2us call overhead, growing to ~50ms at the largest size as in real
+        # runs, +-5% noise
+        scale = 50e-3 / shape(sizes[-1])
+        measurements = [{'n': n, 'seconds': (2e-6 + scale * shape(n)) * (1.05 if i % 2 else 0.95)}
+                        for i, n in enumerate(sizes)]
+        name, confidence, _, alternative = complexity.fit(measurements)
+        assert name == expected, f"{expected} timings were fitted as {name}"
+        assert confidence > 0.5 and alternative is None, f"{expected} fitted with confidence {confidence}"
+
+    name, confidence, _, _ = complexity.fit(measurements[:2])
+    assert name is None and confidence == 0.0, "two measurements produced an estimate"
+
+    # The linear FrogRiverOne reference as measured on a noisy machine:
+    # (microseconds per call, repeat spread) for n = 256 .. 131072. Cache
+    # misses make it fit n log n better, but not separably so.
+    recorded = [(34.8, 0.22), (76.0, 0.2), (163.7, 0.01), (376.2, 0.03), (698.0, 0.13),
+                (1567.2, 0.01), (2973.2, 0.17), (7094.9, 0.3), (19891.8, 0.2), (52147.2, 0.05)]
+    measurements = [{'n': n, 'seconds': micros * 1e-6, 'spread': spread}
+                    for n, (micros, spread) in zip(sizes, recorded)]
+    name, confidence, errors, alternative = complexity.fit(measurements)
+    assert errors['O(n log n)'] < errors['O(n)'], "recorded timings no longer favour n log n"
+    assert (name, alternative) == ('O(n)', 'O(n log n)'), f"linear FrogRiverOne fitted as {name}"
+    assert confidence <= 0.5, f"ambiguous fit reported confidence {confidence}"
+    print("✓ Complexity classes are recognised from timings")
+
+    # /api/complexity measures inside the request; a run at the largest
+    # budget has to finish before gunicorn kills the worker
+    import runpy
+    settings = runpy.run_path(str(Path(__file__).parent / 'gunicorn.conf.py'))
+    assert complexity.MAX_WALL_SECONDS < settings['timeout'], "complexity runs outlive the worker timeout"
+    print("✓ Complexity runs finish inside the worker timeout")
+
+def test_vectorized_references():
+    """NumPy reference solutions agree with the pure-Python ones"""
+    print("\nTesting vectorized reference solutions...")
+    import random
+    import grader
+    import reference_solutions as ref
+
+    if ref.np is None:
+        print("✓ NumPy not installed, skipped")
+        return
+
+    for name, task in grader.TASKS.items():
+        fast = ref.vectorized(task.reference)
+        if fast is None:
+            continue
+        inputs = list(task.examples) + [task.small(random.Random(f'{name}:{i}')) for i in range(50)]
+        for args in inputs:
+            expected = task.reference(*grader._copy_args(args))
+            answer = fast(*grader._copy_args(args))
+            assert task.check(answer, expected, args), f"{name}{args}: numpy gave {answer}, expected {expected}"
+    print(f"✓ {len(ref.VECTORIZED)} vectorized references match")
+
+def test_lesson_search():
+    """Lesson search ranks sections, highlights matches and follows edits"""
+    print("\nTesting lesson search...")
+    import os
+    import tempfile
+    from lesson_search import LessonSearchIndex
+
+    with app.test_client() as client:
+        response = client.get('/api/search?q=prefix+sums')
+        results = response.get_json()['results']
+        assert response.status_code == 200 and results, "no results for 'prefix sums'"
+        assert results[0]['lesson'] == 'week2-counting-prefix-hashmaps.md', f"top hit was {results[0]['lesson']}"
+        assert '#' in results[0]['url'], "result URL has no heading anchor"
+        assert client.get('/api/search?q=').status_code == 400, "empty query was accepted"
+    print("✓ /api/search returns ranked results with anchors")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'lesson.md')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('# Stacks\n\nPush and pop.\n\n## Queues\n\nFirst in, first out.\n')
+        index = LessonSearchIndex()
+        index.add_lesson('lesson.md', 'Test lesson', path)
+
+        results = index.query('queu')
+        assert [r['anchor'] for r in results] == ['queues'], f"prefix query returned {results}"
+        assert '<mark>first</mark>' in index.query('first')[0]['snippet'], "match not highlighted"
+
+        index.update('lesson.md', '# Stacks\n\nPush and pop.\n\n## Deques\n\nBoth ends.\n')
+        assert not index.query('queues') and index.query('deques'), "update did not replace the old sections"
+
+        # A write from another process is picked up on the next query
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('# Heaps\n\nPriority queues.\n')
+        os.utime(path, ns=(1, 1))
+        assert index.query('heaps') and not index.query('deques'), "changed file was not reindexed"
+    print("✓ Index updates incrementally")
+
+def test_plan_registry():
+    """The plan registry indexes task repeats and is read-only"""
+    print("\nTesting plan registry...")
+    from app import TaskProgress, GUEST_USER_ID
+    from plan_registry import PLAN
+
+    stone_wall = [(o.week, o.day, o.label) for o in PLAN.occurrences['StoneWall']]
+    assert (4, 25, 'Redo StoneWall') in stone_wall, f"StoneWall occurrences were {stone_wall}"
+    assert PLAN.label_tasks['Focus StoneWall + EquiLeader'] == ('StoneWall', 'EquiLeader')
+    assert PLAN.has_task(4, 25, 'Redo StoneWall') and not PLAN.has_task(4, 24, 'Redo StoneWall')
+    assert PLAN.day(4, 25).title == PLAN.weeks[4].days[25].title and PLAN.day(3, 25) is None
+    assert PLAN.total_days == sum(len(week.days) for week in PLAN.weeks.values())
+    assert len(PLAN.lessons) == len(PLAN.lesson_by_file), "duplicate lesson files"
+    for mutate in (lambda: setattr(PLAN.days[25], 'title', 'x'), lambda: PLAN.weeks.pop(4)):
+        try:
+            mutate()
+        except (AttributeError, TypeError):
+            pass
+        else:
+            raise AssertionError("plan records are mutable")
+    print("✓ Occurrence, day and lesson indexes are built once and immutable")
+
+    with app.app_context():
+        db.session.add(TaskProgress(user_id=GUEST_USER_ID, week=4, day=25, task_name='Redo StoneWall',
+                                    completed=True, score=87))
+        db.session.commit()
+    try:
+        with app.test_client() as client:
+            response = client.get('/tasks/StoneWall')
+            page = response.get_data(as_text=True)
+            assert response.status_code == 200, f"history page returned {response.status_code}"
+            assert 'Redo StoneWall' in page and '87%' in page, "history page is missing the attempt"
+            assert client.get('/tasks/NoSuchTask').status_code == 302, "unknown task was not redirected"
+            assert "/tasks/StoneWall" in client.get('/week/4').get_data(as_text=True), "week view has no history link"
+    finally:
+        with app.app_context():
+            TaskProgress.query.filter_by(user_id=GUEST_USER_ID, week=4, day=25, task_name='Redo StoneWall').delete()
+            db.session.commit()
+    print("✓ Task history page lists every attempt")
+
+def test_review_queue():
+    """The review queue orders attempted tasks by due time and re-keys them on updates"""
+    print("\nTesting review queue...")
+    from app import User, TaskProgress, ProgressCounter, review_queue
+    from review_scheduler import review_interval
+
+    assert review_interval(40, 5) == 1, "a failing score must come back the next day"
+    assert review_interval(100, 3) > review_interval(70, 3) > review_interval(70, 1), "intervals do not grow"
+
+    with app.app_context():
+        user = User(username='_review_user')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    try:
+        client = app.test_client()
+        client.post('/login', data={'username': '_review_user', 'password': 'secret'})
+        assert client.get('/api/review_queue').get_json()['tasks'] == [], "queue of a new user is not empty"
+
+        client.post('/api/toggle_task', json={'week': 2, 'day': 9, 'task_name': 'FrogRiverOne'})
+        client.post('/api/update_task_score', json={'week': 2, 'day': 13, 'task_name': 'Redo FrogRiverOne', 'score': 40})
+        for day, label in ((23, 'StoneWall (VERY common!)'), (28, 'StoneWall')):
+            client.post('/api/toggle_task', json={'week': 4, 'day': day, 'task_name': label})
+        client.post('/api/update_task_score', json={'week': 4, 'day': 28, 'task_name': 'StoneWall', 'score': 95})
+
+        # The queue was built before these writes, so they were applied incrementally
+        builds = review_queue.stats()['builds']
+        tasks = client.get('/api/review_queue').get_json()['tasks']
+        assert [t['task'] for t in tasks] == ['FrogRiverOne', 'StoneWall'], f"queue was {tasks}"
+        assert tasks[0]['score'] == 40 and tasks[1]['repetitions'] == 2, f"queue was {tasks}"
+        assert tasks[1]['url'] == '/tasks/StoneWall'
+
+        client.post('/api/toggle_task', json={'week': 2, 'day': 13, 'task_name': 'Redo FrogRiverOne'})
+        client.post('/api/update_task_score', json={'week': 2, 'day': 13, 'task_name': 'Redo FrogRiverOne', 'score': 100})
+        tasks = client.get('/api/review_queue?limit=1').get_json()['tasks']
+        assert [t['task'] for t in tasks] == ['StoneWall'], f"passing FrogRiverOne did not move it back: {tasks}"
+        assert review_queue.stats()['builds'] == builds, "queue was rebuilt instead of updated"
+        print("✓ Failing scores come first and updates re-key the heap in place")
+
+        assert client.get('/api/review_queue?limit=0').status_code == 400, "limit=0 was accepted"
+        client.post('/api/progress/batch', json={'mutations': [
+            {'op': 'update_task_score', 'week': 4, 'day': 28, 'task_name': 'StoneWall', 'score': 10}]})
+        tasks = client.get('/api/review_queue').get_json()['tasks']
+        assert tasks[0]['task'] == 'StoneWall' and tasks[0]['score'] == 10, f"batch update not seen: {tasks}"
+        print("✓ Batch writes refresh the queue")
+    finally:
+        with app.app_context():
+            for model in (TaskProgress, ProgressCounter):
+                model.query.filter_by(user_id=user_id).delete()
+            User.query.filter_by(id=user_id).delete()
+            db.session.commit()
+        review_queue.invalidate(user_id)
+
+def test_dashboard_snapshot():
+    """/api/dashboard is one query to build, cached per user and revalidated by ETag"""
+    print("\nTesting dashboard snapshot...")
+    from app import User, DayProgress, TaskProgress, ProgressCounter, PLAN, dashboard_snapshots
+
+    with app.app_context():
+        user = User(username='_dashboard_user')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+    dashboard_snapshots.invalidate(user_id)
+
+    try:
+        client = app.test_client()
+        client.post('/login', data={'username': '_dashboard_user', 'password': 'secret'})
+        client.get('/api/dashboard')   # load the user into the identity cache
+
+        dashboard_snapshots.invalidate(user_id)
+        with count_queries() as statements:
+            first = client.get('/api/dashboard')
+        data = first.get_json()
+        assert first.status_code == 200 and first.headers.get('ETag'), "dashboard has no ETag"
+        assert len(data['weeks']) == len(PLAN.weeks), f"dashboard has {len(data['weeks'])} weeks"
+        assert data['stats']['total_tasks'] == PLAN.total_tasks
+        assert len(statements) <= 2, f"building the dashboard ran {len(statements)} queries"
+        built_queries = len(statements)
+
+        with count_queries() as statements:
+            second = client.get('/api/dashboard')
+        assert second.data == first.data and len(statements) <= 1, f"cached dashboard ran {len(statements)} queries"
+        assert client.get('/api/dashboard', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+        print(f"✓ Built in {built_queries} queries, then served from the snapshot in {len(statements)}")
+
+        client.post('/api/toggle_task', json={'week': 1, 'day': 2, 'task_name': 'Binary Gap'})
+        changed = client.get('/api/dashboard', headers={'If-None-Match': first.headers['ETag']})
+        assert changed.status_code == 200, "a stale snapshot was revalidated after a toggle"
+        day = changed.get_json()['weeks'][0]['days'][1]
+        assert day['tasks'][0] == {'name': 'Binary Gap', 'completed': True, 'score': None, 'complexity': None}
+        assert changed.get_json()['stats']['completed_tasks'] == 1
+
+        # A write that only reaches the database (as from another worker)
+        # still retires the snapshot through the revision counter
+        with app.app_context():
+            from app import mark_progress_changed
+            db.session.add(DayProgress(user_id=user_id, week=1, day=2, completed=True))
+            mark_progress_changed(user_id)
+            db.session.commit()
+        assert client.get('/api/dashboard').get_json()['weeks'][0]['days'][1]['completed'], "snapshot went stale"
+        print("✓ Progress writes retire the snapshot")
+    finally:
+        with app.app_context():
+            for model in (DayProgress, TaskProgress, ProgressCounter):
+                model.query.filter_by(user_id=user_id).delete()
+            User.query.filter_by(id=user_id).delete()
+            db.session.commit()
+        dashboard_snapshots.invalidate(user_id)
+
+def test_api_tokens():
+    """Bearer tokens authenticate API requests without a session or user query"""
+    print("\nTesting API tokens...")
+    from app import User, TaskProgress, ProgressCounter, RevokedToken
+    from api_tokens import TokenError, TokenSigner
+
+    expired = TokenSigner('key', access_ttl=-1)
+    try:
+        expired.verify_access(expired.access_token('sid', 1, 'x', False))
+    except TokenError:
+        pass
+    else:
+        raise AssertionError("expired access token was accepted")
+
+    with app.app_context():
+        db.create_all()
+        user = User(username='_token_user')
+        user.set_password('secret')
+        db.session.add(user)
+        db.session.commit()
+        user_id = user.id
+
+    try:
+        client = app.test_client()
+        assert client.post('/api/auth/token', json={'username': '_token_user', 'password': 'nope'}).status_code == 401
+        issued = client.post('/api/auth/token', json={'username': '_token_user', 'password': 'secret'}).get_json()
+        assert issued['user'] == {'id': user_id, 'username': '_token_user', 'isAdmin': False}, issued
+        auth = {'Authorization': f"Bearer {issued['access_token']}"}
+
+        assert client.post('/api/grade', json={}).status_code == 401, "grade accepted an anonymous request"
+        with count_queries() as statements:
+            response = client.post('/api/grade', json={}, headers=auth)
+        assert response.status_code == 400, f"token was not accepted ({response.status_code})"
+        assert not any('FROM user' in statement for statement in statements), "token auth loaded the user"
+        assert 'Set-Cookie' not in response.headers, "token request started a session"
+        assert client.post('/api/grade', json={}, headers={'Authorization': 'Bearer forged'}).status_code == 401
+
+        client.post('/api/toggle_task', json={'week': 1, 'day': 2, 'task_name': 'Binary Gap'}, headers=auth)
+        with app.app_context():
+            assert TaskProgress.query.filter_by(user_id=user_id, task_name='Binary Gap').count() == 1, \
+                "toggle was not recorded for the token's user"
+        print("✓ Access tokens authenticate without touching the session or user table")
+
+        refreshed = client.post('/api/auth/refresh', json={'refresh_token': issued['refresh_token']}).get_json()
+        assert refreshed['success'] and refreshed['access_token'], refreshed
+        assert client.post('/api/auth/refresh', json={'refresh_token': issued['access_token']}).status_code == 401, \
+            "an access token was accepted as a refresh token"
+
+        assert client.post('/api/auth/revoke', json={'refresh_token': issued['refresh_token']}).status_code == 200
+        assert client.post('/api/grade', json={}, headers=auth).status_code == 401, "revoked token still works"
+        assert client.post('/api/auth/refresh', json={'refresh_token': issued['refresh_token']}).status_code == 401
+        print("✓ Refresh issues new access tokens and revocation ends the session")
+
+        issued = client.post('/api/auth/token', json={'username': '_token_user', 'password': 'secret'}).get_json()
+        with app.app_context():
+            db.session.get(User, user_id).set_password('changed')
+            db.session.commit()
+        assert client.post('/api/auth/refresh', json={'refresh_token': issued['refresh_token']}).status_code == 401, \
+            "refresh token outlived a password change"
+        issued = client.post('/api/auth/token', json={'username': '_token_user', 'password': 'changed'}).get_json()
+        assert client.post('/api/auth/refresh', json={'refresh_token': issued['refresh_token']}).status_code == 200
+        print("✓ Changing the password ends existing refresh tokens")
+    finally:
+        with app.app_context():
+            for model in (TaskProgress, ProgressCounter, RevokedToken):
+                model.query.filter_by(user_id=user_id).delete()
+            User.query.filter_by(id=user_id).delete()
+            db.session.commit()
+
 if __name__ == '__main__':
     print("=" * 50)
     print("Codility Training Tracker - Test Suite")
@@ -77,8 +1139,36 @@ if __name__ == '__main__':
 
     db_test = test_database()
     route_test = test_routes()
+    query_test = run_check(test_week_view_query_count)
+    cache_test = run_check(test_lesson_render_cache)
+    build_test = run_check(test_lesson_build)
+    conditional_test = run_check(test_lesson_conditional_requests)
+    counter_test = run_check(test_progress_counters)
+    batch_test = run_check(test_progress_batch)
+    per_user_test = run_check(test_per_user_progress)
+    user_cache_test = run_check(test_cached_user_loader)
+    export_test = run_check(test_progress_export_import)
+    migration_test = run_check(test_migrations)
+    upload_test = run_check(test_image_upload_dedup)
+    asset_test = run_check(test_fingerprinted_assets)
+    metrics_test = run_check(test_metrics)
+    sqlite_test = run_check(test_sqlite_concurrent_writes)
+    write_behind_test = run_check(test_write_behind_toggles)
+    grader_test = run_check(test_grader)
+    generators_test = run_check(test_generators)
+    complexity_test = run_check(test_complexity_fit)
+    vectorized_test = run_check(test_vectorized_references)
+    search_test = run_check(test_lesson_search)
+    plan_test = run_check(test_plan_registry)
+    review_test = run_check(test_review_queue)
+    dashboard_test = run_check(test_dashboard_snapshot)
+    token_test = run_check(test_api_tokens)
 
-    if db_test and route_test:
+    checks = [db_test, route_test, query_test, cache_test, build_test, conditional_test, counter_test,
+              batch_test, per_user_test, user_cache_test, export_test, migration_test, upload_test, asset_test,
+              metrics_test, sqlite_test, write_behind_test, grader_test, generators_test, complexity_test,
+              vectorized_test, search_test, plan_test, review_test, dashboard_test, token_test]
+    if all(checks):
         print("\n" + "=" * 50)
         print("✅ ALL TESTS PASSED!")
         print("=" * 50)
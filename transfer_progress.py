@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Export or import every user's progress as NDJSON
+
+Streams rows in both directions, so large histories move between
+databases without loading them into memory. Point DATABASE_URL at the
+source for the export and at the target for the import, e.g. to move
+from SQLite to Postgres:
+    python transfer_progress.py export progress.ndjson
+    DATABASE_URL=postgresql://... python transfer_progress.py import progress.ndjson
+
+Users are not part of the export; rows keep their user_id.
+"""
+
+import sys
+
+from app import app, db, export_progress_lines, import_progress_lines
+
+def main(argv):
+    if len(argv) != 2 or argv[0] not in ('export', 'import'):
+        print(__doc__)
+        sys.exit(1)
+    command, path = argv
+
+    with app.app_context():
+        db.create_all()
+        if command == 'export':
+            rows = 0
+            with open(path, 'w', encoding='utf-8') as f:
+                for line in export_progress_lines():
+                    f.write(line)
+                    rows += 1
+            print(f"✅ Exported {rows - 1} progress row(s) to {path}")
+            return
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                counts = import_progress_lines(f)
+        except ValueError as e:
+            print(f"❌ Import stopped at {e}")
+            sys.exit(1)
+    print(f"✅ Imported {counts['day']} day row(s) and {counts['task']} task row(s) from {path}")
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
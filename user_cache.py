@@ -0,0 +1,98 @@
+"""Bounded TTL/LRU cache of logged-in users for Flask-Login's user_loader.
+
+Entries hold plain column snapshots rather than ORM instances, so they
+outlive the request session that loaded them. Invalidation reaches every
+gunicorn worker (and the admin scripts, which run in their own process)
+through a stamp file: bumping it makes every process drop its cache the
+next time it is consulted.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+class UserIdentityCache:
+    """Map user id -> column snapshot with a TTL and LRU eviction"""
+
+    def __init__(self, stamp_path, max_entries=1024, ttl=300):
+        self.stamp_path = stamp_path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._generation = self._read_generation()
+
+    def _read_generation(self):
+        try:
+            return os.stat(self.stamp_path).st_mtime_ns
+        except OSError:
+            return 0
+
+    def _check_generation(self):
+        """Clear the cache if another process bumped the stamp file"""
+        generation = self._read_generation()
+        if generation != self._generation:
+            self._generation = generation
+            self._entries.clear()
+            self.invalidations += 1
+
+    def get(self, user_id):
+        """Return the cached snapshot for user_id, or None"""
+        now = time.monotonic()
+        with self._lock:
+            self._check_generation()
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user_id, snapshot):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, snapshot)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id=None):
+        """Drop one user (or everyone) here and in every other process"""
+        with self._lock:
+            # Apply bumps from other processes first, or adopting the new
+            # stamp below would swallow them
+            self._check_generation()
+            if user_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(user_id, None)
+            self.invalidations += 1
+            self._generation = self._bump_generation()
+
+    def _bump_generation(self):
+        os.makedirs(os.path.dirname(self.stamp_path), exist_ok=True)
+        with open(self.stamp_path, 'a'):
+            pass
+        # Force a new mtime even if the last bump was within timer resolution
+        stamp = max(time.time_ns(), self._generation + 1)
+        os.utime(self.stamp_path, ns=(stamp, stamp))
+        return self._read_generation()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+            }
@@ -0,0 +1,254 @@
+"""Optional write-behind journal for progress checkbox toggles.
+
+With write-behind enabled, toggle_day and toggle_task no longer commit per
+click. The new state is worked out from the pending journal (or the
+database when the row has nothing pending), appended to an append-only
+journal file and fsync'd before the response is sent, so an acknowledged
+click survives a crash. Pending entries are kept per row, so ten clicks on
+one checkbox become a single write, and are applied as set_day/set_task
+batch mutations in one transaction every interval seconds or once
+max_pending rows are waiting.
+
+Entries hold the resulting state rather than a flip, which makes replaying
+a journal idempotent: a worker replays journals left behind by workers
+that are no longer running when it starts. Every journal file is named
+after its process id plus a random nonce and stays flock'd until its rows
+are committed, so a journal is orphaned exactly when its lock can be
+taken, even if a new worker was given the dead worker's pid.
+
+Pending rows live in the worker that took the click, and a toggle works
+out the new state from them, so another worker would read stale state.
+Write-behind is therefore only for a single worker; app.py and
+gunicorn.conf.py refuse to start it with more.
+"""
+
+import contextlib
+import glob
+import json
+import logging
+import os
+import secrets
+import threading
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows; recovery then skips locking
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_PREFIX = 'journal-'
+DEFAULT_INTERVAL = 0.5
+DEFAULT_MAX_PENDING = 200
+
+def _row_key(user_id, mutation):
+    return (user_id, mutation['op'], mutation['week'], mutation['day'], mutation.get('task_name'))
+
+def _orphaned_without_locks(owner):
+    """Best guess when flock is unavailable: the owning pid is gone, or is
+    this process, which is not the owner since the nonce differs"""
+    try:
+        pid = int(owner.split('-')[0])
+    except ValueError:
+        return False
+    return pid == os.getpid() or not _process_alive(pid)
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+class WriteBehindJournal:
+    """Coalescing, fsync'd journal of toggles flushed in batches.
+
+    apply(entries) must apply a list of (user_id, mutation) pairs in one
+    transaction; it is called from the flush thread. Flushes run inside
+    section(), which callers that write directly may already hold.
+    """
+
+    def __init__(self, directory, apply, section=contextlib.nullcontext, interval=DEFAULT_INTERVAL,
+                 max_pending=DEFAULT_MAX_PENDING):
+        self.directory = directory
+        self.apply = apply
+        self.section = section
+        self.interval = interval
+        self.max_pending = max_pending
+        self._lock = threading.Lock()         # pending rows and the journal file
+        self._flush_lock = threading.Lock()   # one flush at a time
+        self._wake = threading.Event()
+        self._pending = {}                    # row key -> (user_id, mutation)
+        self._file = None
+        self._owner = None
+        self._owner_pid = None
+        self._sequence = 0
+        self._flushing = []                   # (path, open file) rotated out, still locked
+        self._thread = None
+        self.recorded = 0
+        self.coalesced = 0
+        self.flushed = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _owner_name(self):
+        """<pid>-<nonce>, renewed in a forked child"""
+        if self._owner_pid != os.getpid():
+            self._owner_pid = os.getpid()
+            self._owner = f'{self._owner_pid}-{secrets.token_hex(4)}'
+            self._file = None
+            self._flushing = []
+        return self._owner
+
+    def _journal_path(self, sequence=None):
+        suffix = '' if sequence is None else f'.{sequence}'
+        return os.path.join(self.directory, f'{JOURNAL_PREFIX}{self._owner_name()}{suffix}.ndjson')
+
+    def _append(self, user_id, mutation):
+        path = self._journal_path()
+        if self._file is None:
+            self._file = open(path, 'a', encoding='utf-8')
+            if fcntl:
+                # Held until the rows are committed; recover() skips locked journals
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+        self._file.write(json.dumps(dict(mutation, user_id=user_id)) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def toggle(self, user_id, mutation, read_state):
+        """Record a set_day/set_task mutation that flips the row; return the new state.
+
+        read_state() returns the stored state and is only called when the
+        row has nothing pending.
+        """
+        key = _row_key(user_id, mutation)
+        with self._lock:
+            pending = self._pending.get(key)
+            completed = not (pending[1]['completed'] if pending else bool(read_state()))
+            mutation = dict(mutation, completed=completed)
+            self._append(user_id, mutation)
+            self._pending[key] = (user_id, mutation)
+            self.recorded += 1
+            if pending:
+                self.coalesced += 1
+            full = len(self._pending) >= self.max_pending
+        self._start()
+        if full:
+            self._wake.set()
+        return completed
+
+    def pending_for(self, user_id):
+        """Mutations not yet written to the database for user_id"""
+        with self._lock:
+            return [mutation for owner, mutation in self._pending.values() if owner == user_id]
+
+    def flush(self):
+        """Write every pending row in one transaction; returns the number of rows"""
+        # Taking the section before the flush lock keeps the lock order the
+        # same as a write view that flushes from inside its section
+        with self.section(), self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    return 0
+                batch = self._pending
+                self._pending = {}
+                # Later clicks go to a fresh journal file; the rotated one
+                # stays open, and so locked, until its rows are committed
+                if self._file is not None:
+                    self._sequence += 1
+                    flushing_path = self._journal_path(self._sequence)
+                    os.replace(self._journal_path(), flushing_path)
+                    self._flushing.append((flushing_path, self._file))
+                    self._file = None
+
+            try:
+                self.apply(list(batch.values()))
+            except Exception:
+                # Keep the rows (unless clicked again since) for the next flush
+                with self._lock:
+                    for key, entry in batch.items():
+                        self._pending.setdefault(key, entry)
+                raise
+
+            for path, f in self._flushing:
+                os.unlink(path)
+                f.close()
+            self._flushing = []
+            self.flushed += len(batch)
+            return len(batch)
+
+    def _start(self):
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Write-behind flush failed; retrying in %ss', self.interval)
+
+    def recover(self):
+        """Apply journals whose worker is no longer running.
+
+        Returns the number of rows replayed.
+        """
+        own = self._owner_name()
+        journals = []
+        for path in glob.glob(os.path.join(self.directory, f'{JOURNAL_PREFIX}*.ndjson')):
+            owner, _, sequence = os.path.basename(path)[len(JOURNAL_PREFIX):-len('.ndjson')].partition('.')
+            if owner == own:
+                continue
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            # Oldest first; rotated journals were written before the live one
+            journals.append((mtime, int(sequence) if sequence.isdigit() else float('inf'), path, owner))
+
+        replayed = 0
+        for _, _, path, owner in sorted(journals):
+            try:
+                f = open(path, 'r', encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            with f:
+                if fcntl:
+                    try:
+                        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue  # its worker is still running
+                elif not _orphaned_without_locks(owner):
+                    continue
+                # Another worker may have replayed it before we got the lock
+                if not os.path.exists(path) or os.stat(path).st_ino != os.fstat(f.fileno()).st_ino:
+                    continue
+                rows = {}
+                for line in f:
+                    try:
+                        mutation = json.loads(line)
+                    except ValueError:
+                        break  # torn last line from the crash; it was never acknowledged
+                    user_id = mutation.pop('user_id')
+                    rows[_row_key(user_id, mutation)] = (user_id, mutation)
+                if rows:
+                    with self.section():
+                        self.apply(list(rows.values()))
+                os.unlink(path)
+                replayed += len(rows)
+        return replayed
+
+    def stats(self):
+        with self._lock:
+            return {
+                'pending': len(self._pending),
+                'recorded': self.recorded,
+                'coalesced': self.coalesced,
+                'flushed': self.flushed,
+            }